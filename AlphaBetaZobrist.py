@@ -1,27 +1,105 @@
 from NodeState import NodeState
-from TranspositionTable import ZobristTable
+from EndgameSolver import EndgameSolver
+from TranspositionTable import ZobristTable, SharedTranspositionTable, EvaluationCache, EXACT, LOWERBOUND, UPPERBOUND
+from bitboard_abalone import MOVE_EJECT, MOVE_PUSHED_SHIFT
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import threading
 import numpy as np
 import json
+import time
+
+
+class SearchTimeout(Exception):
+    """Levée lorsque le temps alloué à la recherche est écoulé."""
+
+
+NULL_WINDOW = 1 # Largeur de la fenêtre nulle de PVS et du coup nul : evaluate et terminalValue ne retournent que des entiers
+NULL_MOVE_REDUCTION = 2 # Réduction de profondeur de la recherche après un coup nul
+NULL_MOVE_MIN_PLIES = 10 # Pas de coup nul à moins de ce nombre de coups de la fin de la partie
+LMR_MIN_DEPTH = 3 # Profondeur restante minimale pour réduire un coup tardif
+LMR_MIN_INDEX = 3 # Nombre de coups cherchés à pleine profondeur avant de réduire les coups calmes
+ENDGAME_TIME_SHARE = 0.5 # Part du temps alloué donnée à la résolution exacte, le reste à la recherche si elle échoue
+SPLIT_MIN_DEPTH = 3 # Profondeur restante minimale d'un noeud de la variation principale pour répartir ses coups entre les processus
+HORIZON_DEPTH = 128 # Profondeur enregistrée d'une recherche qui atteint la fin de la partie : HORIZON_DEPTH + coups restants
 
 
 class AlphaBetaZobrist:
-    def __init__(self, depth, playerID):
+    def __init__(self, depth, playerID, zobristTable: ZobristTable = None, maxQuiescence=2, workers=1, lazySMP=False,
+                 nullMove=True, lateMoveReductions=True, endgameSolver=True, evalCacheSize=2**16,
+                 medianCut=False):
         """Initialisation de la classe AlphaBetaZobrist.
 
         Args:
             depth (int): Profondeur maximale de l'arbre de recherche.
             playerID (str ou int): Identifiant du joueur.
+            zobristTable (ZobristTable, optional): Table de transposition partagée entre les recherches.
+            maxQuiescence (int, optional): Nombre maximal de captures jouées par la recherche de quiescence.
+            workers (int, optional): Nombre de processus de la recherche parallèle, qui répartit les coups des noeuds
+                de la variation principale (voir searchSplit, 1 : recherche séquentielle).
+            lazySMP (bool, optional): Recherche parallèle Lazy SMP plutôt que le partage des coups de la variation principale.
+                Tous les processus cherchent la racine avec la même table, qui doit être en mémoire partagée.
+            nullMove (bool, optional): Élagage par coup nul : un noeud hors variation principale est coupé si
+                passer le tour avec une profondeur réduite suffit déjà à provoquer la coupure.
+            lateMoveReductions (bool, optional): Réduction d'un niveau des coups calmes ordonnés tard,
+                cherchés de nouveau à pleine profondeur s'ils font mieux que prévu.
+            endgameSolver (bool, optional): Résolution exacte de la fin de partie (EndgameSolver) avant l'approfondissement
+                itératif, quand son temps estimé (EndgameSolver.estimateTime) tient dans ENDGAME_TIME_SHARE du temps alloué.
+            evalCacheSize (int, optional): Nombre d'évaluations gardées par le cache de Heuristic (0 : pas de cache).
+                Les évaluations sont celles du joueur max : le cache est propre à cette recherche.
+            medianCut (bool, optional): Élagage de l'ancien sortActions : ne garde à chaque noeud que les coups dont
+                l'enfant est du meilleur côté de la médiane des valeurs heuristiques (voir cutMoves). Élagage non sûr,
+                qui divise environ par deux le facteur de branchement.
 
         """
         self.depth = depth# Profondeur de recherche maximale
         self.playerID = playerID# Identifiant du joueur
-        self.maxQuiescence = 1
+        self.maxQuiescence = maxQuiescence
+        self.zobristTable = zobristTable if zobristTable is not None else ZobristTable()
+        self.searchDepth = depth # Profondeur de l'itération en cours
+        self.deadline = None # Instant limite de la recherche (None : pas de limite)
+        self.rootMove = None # Meilleur coup de l'itération précédente, cherché en premier à la racine
+        self.completedDepth = 0 # Profondeur de la dernière itération terminée
+        self.killers = {} # Coups calmes ayant provoqué une coupure, par profondeur (2 par profondeur)
+        self.history = {} # Score historique des coups calmes (coup compact -> score)
+        self.workers = workers
+        self.lazySMP = lazySMP
+        self.nullMove = nullMove
+        self.lateMoveReductions = lateMoveReductions
+        self.medianCut = medianCut
+        self.nullMovePly = None # Distance à la racine du dernier coup nul de la branche en cours
+        self.endgameSolver = EndgameSolver() if endgameSolver else None # Garde sa table d'un coup à l'autre
+        self.evalCache = EvaluationCache(evalCacheSize) if evalCacheSize else None
+        if lazySMP and not isinstance(self.zobristTable.table, SharedTranspositionTable):
+            raise ValueError("Lazy SMP requires a ZobristTable created with sharedMB")
+        self.pool = None # Processus de la recherche parallèle, créés à la première recherche
+        self.stopRequested = None # Fonction indiquant qu'un autre processus a demandé l'arrêt de la recherche
+        self.bestMove = None # Coup choisi par la dernière recherche
+        self.ponderThread = None # Recherche en arrière-plan sur la réponse prévue de l'adversaire
+        self.ponderStop = None
+        self.ponderPosition = None
+        self.ponderResult = None
+        self.aspirationWindow = 20 # Demi-largeur de la fenêtre d'aspiration autour du score de l'itération précédente
+        self.principalVariation = [] # Variation principale de la dernière recherche terminée
+        self.pvTable = [] # Table triangulaire : pvTable[ply] est la variation principale depuis la profondeur ply
+        self.pvHashes = {} # ply -> (hash, coup) des positions de la variation principale précédente
 
         self.hits=0 #nombre de fois qu'une position est trouvée dans la table
         self.node_visits=0 #nombre de noeuds visités
         self.pruned_nodes_max=0 #nombre de noeuds prunés par l'agent max
         self.pruned_nodes_min=0 #nombre de noeuds prunés par l'agent min
         self.root_branches=0 #facteur de branchement du noeud racine
+        self.parallel_time=0 #durée des recherches parallèles
+        self.parallel_work=0 #temps de calcul cumulé des recherches parallèles (tous processus)
+        self.parallel_span=0 #durée des recherches parallèles avec un coeur par processus (chemin critique des parts de coups)
+        self.splitSpan=0 #durée du dernier sous-arbre cherché par searchSplit avec un coeur par processus
+        self.pvs_researches=0 #nombre de recherches refaites après l'échec d'une fenêtre nulle
+        self.aspiration_researches=0 #nombre de recherches refaites après l'échec d'une fenêtre d'aspiration
+        self.null_move_tries=0 #nombre de recherches après un coup nul
+        self.null_move_cutoffs=0 #nombre de noeuds coupés par un coup nul
+        self.null_move_nodes=0 #noeuds visités par les recherches après un coup nul
+        self.lmr_reductions=0 #nombre de coups tardifs cherchés avec une profondeur réduite
+        self.lmr_researches=0 #nombre de coups réduits cherchés de nouveau à pleine profondeur
 
 
     def search(self,node: NodeState):
@@ -34,26 +112,589 @@ class AlphaBetaZobrist:
             Tuple: valeur du meilleur coup, meilleur coup
 
         """
-        self.root_branches=len(node.getActions())
-        depth = self.depth
-        v, m = self.MaxValue(node,depth, alpha=float("-inf"), beta=float("inf"), current_depth=0)# Recherche du meilleur coup
+        self.zobristTable.newSearch()
+        v, m = self.searchRoot(node, self.depth)
+        self.printStatistics()
+        return v, self.toAction(node, m)
+
+    def iterativeDeepening(self, node: NodeState, timeLimit: float, maxDepth=None, ponderResult=None):
+        """Recherche par approfondissement itératif dans la limite de temps donnée.
+        Près de la fin de la partie, la position est d'abord résolue exactement si le temps le permet.
+        Chaque itération cherche d'abord la variation principale de l'itération précédente, avec une fenêtre
+        d'aspiration autour de son score. Une itération interrompue par la limite de temps est abandonnée
+        et le résultat de la dernière itération terminée est retourné. La profondeur 1 est toujours terminée.
+
+        Args:
+            node (NodeState): État actuel du plateau.
+            timeLimit (float): Temps alloué à la recherche (s).
+            maxDepth (int, optional): Profondeur maximale. Par défaut, le nombre de coups restant dans la partie.
+            ponderResult (Tuple, optional): Résultat (profondeur, valeur, coup) d'une recherche de cette position
+                déjà terminée pendant le temps de l'adversaire : l'approfondissement reprend à la profondeur suivante.
+
+        Returns:
+            Tuple: valeur du meilleur coup, meilleur coup
+
+        """
+        start = time.time()
+        remainingPlies = node.gameState.max_step - node.gameState.get_step()
+        if self.endgameSolver is not None and self.endgameSolver.estimateTime(node) <= timeLimit * ENDGAME_TIME_SHARE:
+            solved = self.endgameSolver.solve(node, start + timeLimit * ENDGAME_TIME_SHARE)
+            if solved is not None:
+                v, m = solved
+                self.bestMove = m
+                self.principalVariation = [m]
+                return 1000 * v, self.toAction(node, m)
+            # Temps restant donné à la recherche
+            timeLimit -= time.time() - start
+            start = time.time()
+        self.ageHistory()
+        maxDepth = remainingPlies if maxDepth is None else min(maxDepth, remainingPlies)
+        if ponderResult is not None:
+            # Les entrées écrites pendant le temps de l'adversaire sont celles de cette recherche
+            self.completedDepth, v, m = ponderResult
+        else:
+            self.zobristTable.newSearch()
+            self.principalVariation = []
+            v, m = self.searchRoot(node, 1)
+            self.completedDepth = 1
+        self.deadline = start + timeLimit
+        depth = self.completedDepth + 1
+        try:
+            # Une itération coûte plus que toutes les précédentes : inutile de la commencer après la moitié du temps
+            while depth <= maxDepth and time.time() - start < timeLimit / 2:
+                self.rootMove = m
+                v, m = self.aspirationSearch(node, depth, v)
+                self.completedDepth = depth
+                depth += 1
+        except SearchTimeout:
+            pass
+        finally:
+            self.deadline = None
+            self.rootMove = None
+        print(f"Iterative Deepening: depth {self.completedDepth} completed in {time.time() - start:.2f}s (budget {timeLimit:.2f}s)")
+        print(f"Principal Variation: {self.principalVariation}")
+        self.printStatistics()
+        self.bestMove = m
+        return v, self.toAction(node, m)
+
+    def aspirationSearch(self, node: NodeState, depth, previousScore):
+        """Recherche à la racine avec une fenêtre d'aspiration autour du score de l'itération précédente.
+        Si le score sort de la fenêtre, la borne dépassée est ouverte et la recherche est refaite.
+
+        Args:
+            node (NodeState): État actuel du plateau.
+            depth (int): Profondeur de la recherche.
+            previousScore (float): Score de l'itération précédente.
+
+        Returns:
+            Tuple: valeur du meilleur coup, meilleur coup (compact)
+        """
+        alpha, beta = previousScore - self.aspirationWindow, previousScore + self.aspirationWindow
+        while True:
+            v, m = self.searchRoot(node, depth, alpha, beta)
+            if v <= alpha:
+                alpha = float("-inf")
+            elif v >= beta:
+                beta = float("inf")
+            else:
+                return v, m
+            self.aspiration_researches += 1
+
+    def startPondering(self, node: NodeState, move):
+        """Lance en arrière-plan une recherche sur la position attendue après le coup joué et la réponse
+        prévue de l'adversaire (variation principale, ou meilleur coup de la table de transposition pour
+        la position après notre coup).
+        La recherche s'approfondit jusqu'à l'appel de stopPondering.
+
+        Args:
+            node (NodeState): État du plateau sur lequel le coup a été choisi.
+            move: Coup compact joué.
+        """
+        state = node.gameState.search_copy()
+        state.make_move(move)
+        if state.is_done():
+            return
+        if len(self.principalVariation) > 1 and self.principalVariation[0] == move:
+            reply = self.principalVariation[1]
+        else:
+            entry = self.zobristTable.lookup(state.get_hash())
+            if entry is None or entry[4] is None:
+                return
+            reply = entry[4]
+        state.make_move(reply)
+        if state.is_done():
+            return
+        ponderNode = NodeState(state, context=node.context)
+        self.ponderPosition = (state.get_bitboard(), state.get_step())
+        self.ponderResult = None
+        self.ponderStop = threading.Event()
+        self.ponderThread = threading.Thread(target=self.ponderSearch, args=(ponderNode,), daemon=True)
+        self.ponderThread.start()
+
+    def ponderSearch(self, node: NodeState):
+        """Approfondissement itératif sans limite de temps, arrêté par stopPondering.
+        Le résultat de la dernière itération terminée est gardé dans ponderResult.
+        La recherche se fait dans ce processus seulement, pour pouvoir l'arrêter sans attendre le pool.
+
+        Args:
+            node (NodeState): Position attendue au prochain coup.
+        """
+        remainingPlies = node.gameState.max_step - node.gameState.get_step()
+        workers = self.workers
+        self.workers = 1
+        self.stopRequested = self.ponderStop.is_set
+        self.deadline = float("inf")
+        self.ageHistory()
+        self.zobristTable.newSearch()
+        self.principalVariation = []
+        depth = 1
+        try:
+            while depth <= remainingPlies:
+                v, m = self.searchRoot(node, depth) if depth == 1 else self.aspirationSearch(node, depth, v)
+                self.ponderResult = (depth, v, m)
+                self.rootMove = m
+                depth += 1
+        except SearchTimeout:
+            pass
+        finally:
+            self.deadline = None
+            self.stopRequested = None
+            self.rootMove = None
+            self.workers = workers
+
+    def stopPondering(self, node: NodeState):
+        """Arrête la recherche en arrière-plan. La table de transposition, les coups killers et l'historique
+        qu'elle a remplis sont gardés dans tous les cas.
+
+        Args:
+            node (NodeState): État actuel du plateau.
+
+        Returns:
+            Tuple: (profondeur, valeur, coup) de la recherche si l'adversaire a joué la réponse prévue, None sinon.
+        """
+        if self.ponderThread is None:
+            return None
+        self.ponderStop.set()
+        self.ponderThread.join()
+        self.ponderThread = None
+        position = (node.gameState.get_bitboard(), node.gameState.get_step())
+        hit = self.ponderResult is not None and position == self.ponderPosition
+        print(f"Pondering: {'hit' if hit else 'miss'} (depth {self.ponderResult[0] if self.ponderResult else 0})")
+        return self.ponderResult if hit else None
+
+    def searchRoot(self, node: NodeState, depth, alpha=float("-inf"), beta=float("inf")):
+        """Recherche Alpha-Beta à profondeur fixe depuis la racine.
+        Les positions de la variation principale précédente sont cherchées d'abord avec leur coup.
+
+        Args:
+            node (NodeState): État actuel du plateau.
+            depth (int): Profondeur de la recherche.
+            alpha (float, optional): Borne inférieure de la fenêtre.
+            beta (float, optional): Borne supérieure de la fenêtre.
+
+        Returns:
+            Tuple: valeur du meilleur coup, meilleur coup (compact)
+
+        """
+        # La recherche joue et annule les coups sur une seule copie de l'état
+        root = NodeState(node.gameState.search_copy(), context=node.context)
+        self.root_branches=len(root.getMoves())
+        self.searchDepth = depth
+        self.pvHashes = self.variationHashes(root, self.principalVariation)
+        self.pvTable = [[] for _ in range(depth + 2)]
+        if self.workers > 1 and depth > 1:
+            if self.lazySMP:
+                v, m = self.searchRootLazySMP(root, depth, alpha, beta)
+            else:
+                v, m = self.searchRootParallel(root, depth, alpha, beta)
+        else:
+            v, m = self.MaxValue(root,depth, alpha=alpha, beta=beta, current_depth=0)# Recherche du meilleur coup
+        if alpha < v < beta and self.pvTable[0]:
+            self.principalVariation = self.completeVariation(root, self.pvTable[0], depth)
+        return v, m
+
+    def completeVariation(self, root: NodeState, variation, depth):
+        """Complète une variation principale coupée par la table de transposition avec les meilleurs coups
+        de la table, jusqu'à la profondeur de la recherche.
+
+        Args:
+            root (NodeState): Racine de la recherche (état obtenu par search_copy).
+            variation (List): Coups de la variation trouvée par la recherche.
+            depth (int): Profondeur de la recherche.
+
+        Returns:
+            List: Variation complétée.
+        """
+        state = root.gameState
+        variation = list(variation)
+        tokens = [state.make_move(move) for move in variation]
+        while len(variation) < depth and not state.is_done():
+            entry = self.zobristTable.lookup(state.get_hash())
+            if entry is None or entry[4] not in state.legal_moves():
+                break
+            variation.append(entry[4])
+            tokens.append(state.make_move(entry[4]))
+        for token in reversed(tokens):
+            state.unmake_move(token)
+        return variation
+
+    def variationHashes(self, root: NodeState, variation):
+        """Hachages des positions d'une variation principale jouée depuis la racine.
+
+        Args:
+            root (NodeState): Racine de la recherche (état obtenu par search_copy).
+            variation (List): Coups de la variation.
+
+        Returns:
+            dict: ply -> (hash de la position, coup de la variation joué dans cette position)
+        """
+        state = root.gameState
+        hashes = {}
+        tokens = []
+        for ply, move in enumerate(variation):
+            if move not in state.legal_moves():
+                break
+            hashes[ply] = (state.get_hash(), move)
+            tokens.append(state.make_move(move))
+        for token in reversed(tokens):
+            state.unmake_move(token)
+        return hashes
+
+    def searchRootParallel(self, root: NodeState, depth, alpha=float("-inf"), beta=float("inf")):
+        """Recherche Alpha-Beta parallèle (Young Brothers Wait) : voir searchSplit, appelée à la racine.
+
+        Args:
+            root (NodeState): Racine de la recherche (état obtenu par search_copy).
+            depth (int): Profondeur de la recherche.
+            alpha (float, optional): Borne inférieure de la fenêtre.
+            beta (float, optional): Borne supérieure de la fenêtre.
+
+        Returns:
+            Tuple: valeur du meilleur coup, meilleur coup (compact)
+
+        """
+        start, startCPU = time.time(), time.process_time()
+        v_star, m_star = self.searchSplit(root, depth, alpha, beta, 0, maximizing=True)
+        self.parallel_time += time.time() - start
+        self.parallel_work += time.process_time() - startCPU
+        self.parallel_span += self.splitSpan
+        return v_star, m_star
+
+    def searchSplit(self, node: NodeState, depth, alpha: float, beta: float, current_depth, maximizing: bool):
+        """Noeud de la variation principale de la recherche parallèle (Young Brothers Wait) : le premier coup
+        est cherché d'abord, de la même façon, puis les autres coups sont répartis entre ce processus et
+        ceux du pool, qui les cherchent comme MaxValue ou MinValue (voir searchMoves) à partir des coups
+        killers et de l'historique de cette recherche. Sous SPLIT_MIN_DEPTH, le noeud est cherché par
+        MaxValue ou MinValue dans ce processus.
+        Les résultats sont repris dans l'ordre des coups avec la règle de MaxValue et MinValue : un coup n'est
+        retenu que s'il fait strictement mieux que le meilleur coup précédent. Un coup cherché avec une borne
+        moins serrée que celle de la recherche séquentielle à son rang, et qui la dépasse, est cherché de nouveau
+        avec celle-ci : l'élagage par coup nul et la réduction des coups tardifs dépendent de la fenêtre.
+        Le résultat est ainsi celui de la recherche séquentielle, aux différences près du contenu des tables
+        de transposition, des coups killers et de l'historique des processus.
+        La durée du sous-arbre avec un coeur par processus est gardée dans splitSpan.
+
+        Args:
+            node (NodeState): État actuel du plateau.
+            depth (int): Profondeur restante.
+            alpha (float): Valeur alpha pour l'élagage.
+            beta (float): Valeur beta pour l'élagage.
+            current_depth (int): Distance à la racine.
+            maximizing (bool): True si le joueur max est à jouer.
+
+        Returns:
+            Tuple: valeur du noeud, meilleur coup
+        """
+        startCPU = time.process_time()
+        if depth < SPLIT_MIN_DEPTH or node.isTerminal():
+            search = self.MaxValue if maximizing else self.MinValue
+            v_star, m_star = search(node, depth, alpha, beta, current_depth)
+            self.splitSpan = time.process_time() - startCPU
+            return v_star, m_star
+
+        self.node_visits += 1
+        if self.deadline is not None and self.timeIsUp():
+            raise SearchTimeout()
+        self.pvTable[current_depth] = []
+        alphaOrig, betaOrig = alpha, beta
+        nodeHash = self.zobristTable.boardHash(node)
+        remaining = node.gameState.max_step - node.gameState.get_step()
+        entry, alpha, beta = self.probeTable(nodeHash, depth, alpha, beta, current_depth, remaining)
+        if entry is not None and alpha >= beta:
+            self.splitSpan = time.process_time() - startCPU
+            return entry[3], entry[4]
+        sortedActions = self.orderMoves(node, current_depth, self.hashMove(nodeHash, entry, current_depth))
+
+        token = node.makeMove(sortedActions[0])
+        firstStart = time.process_time()
+        v_star, _ = self.searchSplit(node, depth-1, alpha, beta, current_depth + 1, not maximizing)
+        firstEnd = time.process_time()
+        node.unmakeMove(token)
+        span = firstStart - startCPU + self.splitSpan
+        results = [(0, sortedActions[0], v_star, alpha if maximizing else beta, self.pvTable[current_depth + 1])]
+        spans = [0]
+        cutoff = v_star >= beta if maximizing else v_star <= alpha
+        if not cutoff and len(sortedActions) > 1:
+            bound = max(alpha, v_star) if maximizing else min(beta, v_star)
+            alphaShare, betaShare = (bound, beta) if maximizing else (alpha, bound)
+            # Parts de coups : un coup sur workers dans l'ordre des coups, pour équilibrer les parts
+            moves = list(enumerate(sortedActions))[1:]
+            shares = [moves[k::self.workers] for k in range(self.workers)]
+            state = node.gameState.detached_copy()
+            pool = self.getPool()
+            futures = [pool.submit(_searchMoves, state, node.maxPlayerID, node.maxPlayerName, node.maxPlayerPieceType,
+                                   share, depth, alphaShare, betaShare, current_depth, maximizing, self.deadline, self.maxQuiescence,
+                                   self.sharedTable(), self.nullMove, self.lateMoveReductions, self.zobristTable.symmetric,
+                                   self.killers, self.history, self.medianCut)
+                       for share in shares[1:] if share]
+            try:
+                shareStart = time.process_time()
+                results += self.searchMoves(node, shares[0], depth, alphaShare, betaShare, current_depth, maximizing)
+                spans = [time.process_time() - shareStart]
+                for future in futures:
+                    shareResults, nodes, elapsed = future.result()
+                    results += shareResults
+                    self.node_visits += nodes
+                    self.parallel_work += elapsed
+                    spans.append(elapsed)
+            finally:
+                for future in futures:
+                    future.cancel()
+
+        m_star = None
+        for index, move, v, bound, variation in sorted(results, key=lambda result: result[0]):
+            if maximizing:
+                if bound < alpha < v:
+                    (_, _, v, _, variation), = self.searchMoves(node, [(index, move)], depth, alpha, beta, current_depth, True)
+                if v > v_star or m_star is None:
+                    v_star = v
+                    m_star = move
+                    if v_star > alpha:
+                        alpha = v_star
+                        self.pvTable[current_depth] = [move] + variation
+                if v_star >= beta:
+                    self.pruned_nodes_max += 1
+                    self.updateOrdering(move, depth, current_depth)
+                    break
+            else:
+                if bound > beta > v:
+                    (_, _, v, _, variation), = self.searchMoves(node, [(index, move)], depth, alpha, beta, current_depth, False)
+                if v < v_star or m_star is None:
+                    v_star = v
+                    m_star = move
+                    if v_star < beta:
+                        beta = v_star
+                        self.pvTable[current_depth] = [move] + variation
+                if v_star <= alpha:
+                    self.pruned_nodes_min += 1
+                    self.updateOrdering(move, depth, current_depth)
+                    break
+
+        self.storeTable(nodeHash, depth, alphaOrig, betaOrig, v_star, m_star, remaining)
+        self.splitSpan = span + time.process_time() - firstEnd - spans[0] + max(spans)
+        return v_star, m_star
+
+    def searchMoves(self, node: NodeState, moves, depth, alpha: float, beta: float, current_depth, maximizing: bool):
+        """Cherche des coups d'un noeud après le premier, comme MaxValue (maximizing) ou MinValue : fenêtre nulle
+        contre la meilleure valeur connue (avec réduction des coups tardifs), puis fenêtre (alpha, beta) si le coup
+        fait mieux. La borne suit les coups qui font mieux et la recherche s'arrête au premier coup qui provoque
+        une coupure.
+
+        Args:
+            node (NodeState): État actuel du plateau.
+            moves (List): (rang dans l'ordre des coups du noeud, coup), dans cet ordre.
+            depth (int): Profondeur restante.
+            alpha (float): Valeur alpha pour l'élagage.
+            beta (float): Valeur beta pour l'élagage.
+            current_depth (int): Distance à la racine.
+            maximizing (bool): True si le joueur max est à jouer.
+
+        Returns:
+            List: (rang, coup, valeur, borne de la recherche du coup (alpha ou beta), variation principale après le coup)
+                des coups cherchés
+        """
+        results = []
+        for index, move in moves:
+            token = node.makeMove(move)
+            reduction = self.lateMoveReduction(move, index, depth, current_depth)
+            if maximizing:
+                v, _ = self.MinValue(node, depth-1-reduction, alpha, alpha + NULL_WINDOW, current_depth + 1)
+                if reduction and v > alpha:
+                    self.lmr_researches += 1
+                    v, _ = self.MinValue(node, depth-1, alpha, alpha + NULL_WINDOW, current_depth + 1)
+            else:
+                v, _ = self.MaxValue(node, depth-1-reduction, beta - NULL_WINDOW, beta, current_depth + 1)
+                if reduction and v < beta:
+                    self.lmr_researches += 1
+                    v, _ = self.MaxValue(node, depth-1, beta - NULL_WINDOW, beta, current_depth + 1)
+            if alpha < v < beta:
+                self.pvs_researches += 1
+                search = self.MinValue if maximizing else self.MaxValue
+                v, _ = search(node, depth-1, alpha, beta, current_depth + 1)
+            node.unmakeMove(token)
+            results.append((index, move, v, alpha if maximizing else beta, self.pvTable[current_depth + 1]))
+            if maximizing:
+                if v >= beta:
+                    break
+                alpha = max(alpha, v)
+            else:
+                if v <= alpha:
+                    break
+                beta = min(beta, v)
+        return results
+
+    def measureSpeedup(self, node: NodeState, depth):
+        """Mesure l'accélération de la recherche parallèle par rapport à la recherche séquentielle.
+        La position est cherchée par approfondissement jusqu'à depth, une fois avec un seul processus et une fois
+        avec les processus de cette recherche, chacune avec des tables neuves. Seule la dernière itération
+        est chronométrée : le pool est alors déjà démarré, comme en partie.
+
+        Args:
+            node (NodeState): État du plateau.
+            depth (int): Profondeur de l'itération chronométrée (au moins 2).
+
+        Returns:
+            Tuple: accélération (durée séquentielle / durée parallèle), True si les deux recherches choisissent le même coup
+        """
+        measures = []
+        for workers in (1, self.workers):
+            search = AlphaBetaZobrist(depth, self.playerID, maxQuiescence=self.maxQuiescence, workers=workers,
+                                      nullMove=self.nullMove, lateMoveReductions=self.lateMoveReductions, endgameSolver=False,
+                                      medianCut=self.medianCut)
+            try:
+                search.zobristTable.newSearch()
+                for d in range(1, depth):
+                    search.searchRoot(node, d)
+                search.node_visits = 0
+                search.parallel_span = 0
+                start = time.time()
+                v, m = search.searchRoot(node, depth)
+                measures.append((time.time() - start, search.node_visits, search.parallel_span, v, m))
+            finally:
+                search.close()
+        (serialTime, serialNodes, _, v, m), (parallelTime, parallelNodes, span, pv, pm) = measures
+        speedup = serialTime / parallelTime
+        print(f"Parallel Search: speed-up {speedup:.2f} at depth {depth} with {self.workers} workers "
+              f"(serial {serialTime:.2f}s, {serialNodes} nodes; parallel {parallelTime:.2f}s, {parallelNodes} nodes, "
+              f"critical path {span:.2f}s; {'same' if (v, m) == (pv, pm) else 'different'} result)")
+        return speedup, m == pm
+
+    def searchRootLazySMP(self, root: NodeState, depth, alpha=float("-inf"), beta=float("inf")):
+        """Recherche parallèle Lazy SMP : les autres processus cherchent la même racine, à la profondeur
+        depth ou depth+1, avec la table de transposition partagée, et remplissent la table pour
+        la recherche de ce processus. Leur recherche est arrêtée dès que celle-ci est terminée.
+
+        Args:
+            root (NodeState): Racine de la recherche (état obtenu par search_copy).
+            depth (int): Profondeur de la recherche.
+            alpha (float, optional): Borne inférieure de la fenêtre de la recherche principale.
+            beta (float, optional): Borne supérieure de la fenêtre de la recherche principale.
+
+        Returns:
+            Tuple: valeur du meilleur coup, meilleur coup (compact)
+
+        """
+        start, startCPU = time.time(), time.process_time()
+        table = self.zobristTable.table
+        table.clearStop()
+        state = root.gameState.detached_copy()
+        pool = self.getPool()
+        futures = [pool.submit(_searchLazySMP, state, root.maxPlayerID, root.maxPlayerName, root.maxPlayerPieceType,
+                               depth + k % 2, self.deadline, self.maxQuiescence, self.sharedTable(),
+                               self.nullMove, self.lateMoveReductions, self.zobristTable.symmetric, self.medianCut)
+                   for k in range(1, self.workers)]
+        try:
+            v_star, m_star = self.MaxValue(root, depth, alpha=alpha, beta=beta, current_depth=0)
+        finally:
+            table.requestStop()
+            work = time.process_time() - startCPU
+            for future in futures:
+                nodes, elapsed = future.result()
+                self.node_visits += nodes
+                work += elapsed
+        self.parallel_time += time.time() - start
+        self.parallel_work += work
+        return v_star, m_star
+
+    def sharedTable(self):
+        """Retourne (nom, taille en Mo) de la table de transposition partagée, None si elle est propre au processus."""
+        table = self.zobristTable.table
+        if isinstance(table, SharedTranspositionTable):
+            return table.name, table.sizeMB
+        return None
+
+    def timeIsUp(self):
+        """Indique si la recherche doit s'arrêter : limite de temps atteinte ou arrêt demandé par un autre processus."""
+        return time.time() > self.deadline or (self.stopRequested is not None and self.stopRequested())
+
+    def getPool(self):
+        """Crée au besoin et retourne le pool de processus de la recherche parallèle."""
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self.pool
+
+    def close(self):
+        """Arrête les processus de la recherche parallèle."""
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    def toAction(self, node: NodeState, move):
+        """Construit l'action correspondant au coup choisi à la racine.
+
+        Args:
+            node (NodeState): État actuel du plateau.
+            move: Coup compact (ou None).
+
+        Returns:
+            Action: action à jouer (ou None)
+
+        """
+        if move is None:
+            return None
+        return node.gameState.move_to_action(move)
+
+    def printStatistics(self):
+        """Affiche les statistiques de la recherche et les remet à zéro."""
         print("Pruning Efficiency:")
         print(f"    Pruned Nodes (MaxValue): {self.pruned_nodes_max}")
         print(f"    Pruned Nodes (MinValue): {self.pruned_nodes_min}")
         print(f"    Number of Branches at Root Node: {self.root_branches}")
         print(f"    Nodes Visited: {self.node_visits}")
+        print(f"    Transposition Cutoffs: {self.hits}")
+        print(f"    PVS Re-searches: {self.pvs_researches}, Aspiration Re-searches: {self.aspiration_researches}")
+        if self.nullMove:
+            print(f"    Null Move: {self.null_move_cutoffs} cutoffs / {self.null_move_tries} tries ({self.null_move_nodes} nodes)")
+        if self.lateMoveReductions:
+            print(f"    Late Move Reductions: {self.lmr_reductions} reductions, {self.lmr_researches} re-searches")
+        print(f"    {self.zobristTable.calculate_hit_rate()}")
+        if self.evalCache is not None:
+            print(f"    {self.evalCache.calculate_hit_rate()}")
+        if self.parallel_time > 0:
+            print(f"    Parallel Search: {self.workers} workers, {self.parallel_time:.2f}s, {self.parallel_work:.2f}s of CPU time"
+                  + (f", critical path {self.parallel_span:.2f}s" if self.parallel_span else ""))
 
         self.hits=0 #nombre de fois qu'une position est trouvée dans la table
         self.node_visits=0 #nombre de noeuds visités
         self.pruned_nodes_max=0 #nombre de noeuds prunés par l'agent max
         self.pruned_nodes_min=0 #nombre de noeuds prunés par l'agent min
         self.root_branches=0 #facteur de branchement du noeud racine
-
-        return v, m
+        self.parallel_time=0 #durée des recherches parallèles
+        self.parallel_work=0 #temps de calcul cumulé des recherches parallèles (tous processus)
+        self.parallel_span=0 #durée des recherches parallèles avec un coeur par processus
+        self.pvs_researches=0 #nombre de recherches refaites après l'échec d'une fenêtre nulle
+        self.aspiration_researches=0 #nombre de recherches refaites après l'échec d'une fenêtre d'aspiration
+        self.null_move_tries=0 #nombre de recherches après un coup nul
+        self.null_move_cutoffs=0 #nombre de noeuds coupés par un coup nul
+        self.null_move_nodes=0 #noeuds visités par les recherches après un coup nul
+        self.lmr_reductions=0 #nombre de coups tardifs cherchés avec une profondeur réduite
+        self.lmr_researches=0 #nombre de coups réduits cherchés de nouveau à pleine profondeur
         
     
     def MaxValue(self ,node: NodeState, depth, alpha: float, beta: float, current_depth):
-        """Fonction MaxValue pour l'algorithme Alpha-Beta.
+        """Fonction MaxValue pour l'algorithme Alpha-Beta (Principal Variation Search).
+        Le premier coup est cherché avec la fenêtre (alpha, beta), les suivants avec une fenêtre nulle
+        pour vérifier qu'ils ne font pas mieux, et cherchés de nouveau s'ils font mieux.
         Args:
             node (NodeState): État actuel du plateau.
             nodeHash: Hash de l'état actuel.
@@ -64,45 +705,69 @@ class AlphaBetaZobrist:
             Tuple: valeur maximale, action associée
         """
         self.node_visits += 1 
+        if self.deadline is not None and self.timeIsUp():
+            raise SearchTimeout()
         v_star = float('-inf')
         m_star = None
+        self.pvTable[current_depth] = []
 
         if node.isTerminal() or depth == 0:
             if node.isTerminal() == False :
-                if current_depth > self.maxQuiescence + self.depth : 
-                    MaxPlayerScore = self.Heuristic(node)
-                else: 
-                    sortedActions = self.sortActions(node, descending=False)
-                    if node.isQuiescent(sortedActions, playerType="max") :  
-                        MaxPlayerScore = self.Heuristic(node)
-                    else :
-                        MaxPlayerScore, _  = self.MinValue(node, 1, alpha, beta, current_depth+1)
+                MaxPlayerScore = self.Quiescence(node, alpha, beta, self.maxQuiescence, maximizing=True)
                 return MaxPlayerScore, None
             
             else : 
-                if node.isWin() == True :  MaxPlayerScore = 1000
-                elif node.isWin() == False : MaxPlayerScore = -1000
-                else : MaxPlayerScore = 0
+                MaxPlayerScore = self.terminalValue(node)
             return MaxPlayerScore, None
         
-        sortedActions = self.sortActions(node, descending=True)
+        alphaOrig, betaOrig = alpha, beta
+        nodeHash = self.zobristTable.boardHash(node)
+        remaining = node.gameState.max_step - node.gameState.get_step()
+        entry, alpha, beta = self.probeTable(nodeHash, depth, alpha, beta, current_depth, remaining)
+        if entry is not None and alpha >= beta:
+            return entry[3], entry[4]
+
+        if self.tryNullMove(node, depth, alpha, beta, current_depth):
+            self.null_move_tries += 1
+            nodes = self.node_visits
+            v = self.nullMoveSearch(node, self.MinValue, depth, beta - NULL_WINDOW, beta, current_depth)
+            self.null_move_nodes += self.node_visits - nodes
+            if v >= beta:
+                self.null_move_cutoffs += 1
+                return v, None
+
+        sortedActions = self.orderMoves(node, current_depth, self.hashMove(nodeHash, entry, current_depth))
 
-        for action in sortedActions:
-            nextNode = node.applyAction(action)
-            #depth -= 1
-            v, m = self.MinValue(nextNode, depth-1, alpha, beta, current_depth + 1)
-            if v > v_star:
+        for index, move in enumerate(sortedActions):
+            token = node.makeMove(move)
+            if m_star is None:
+                v, m = self.MinValue(node, depth-1, alpha, beta, current_depth + 1)
+            else:
+                reduction = self.lateMoveReduction(move, index, depth, current_depth)
+                v, m = self.MinValue(node, depth-1-reduction, alpha, alpha + NULL_WINDOW, current_depth + 1)
+                if reduction and v > alpha:
+                    self.lmr_researches += 1
+                    v, m = self.MinValue(node, depth-1, alpha, alpha + NULL_WINDOW, current_depth + 1)
+                if alpha < v < beta:
+                    self.pvs_researches += 1
+                    v, m = self.MinValue(node, depth-1, alpha, beta, current_depth + 1)
+            node.unmakeMove(token)
+            if v > v_star or m_star is None:
                 v_star = v
-                m_star = action
-                alpha = max(alpha, v_star)
+                m_star = move
+                if v_star > alpha:
+                    alpha = v_star
+                    self.pvTable[current_depth] = [move] + self.pvTable[current_depth + 1]
             if v_star >= beta:
                 self.pruned_nodes_max += 1
-                return v_star, m_star
-                    
+                self.updateOrdering(move, depth, current_depth)
+                break
+
+        self.storeTable(nodeHash, depth, alphaOrig, betaOrig, v_star, m_star, remaining)
         return v_star, m_star
 
     def MinValue(self,node: NodeState, depth, alpha: float, beta: float, current_depth):
-        """Fonction MinValue pour l'algorithme Alpha-Beta.
+        """Fonction MinValue pour l'algorithme Alpha-Beta (Principal Variation Search, voir MaxValue).
         Args:
             node (NodeState): État actuel du plateau.
             nodeHash: Hash de l'état actuel.
@@ -114,46 +779,363 @@ class AlphaBetaZobrist:
             Tuple: valeur minimale, action associée
         """
         self.node_visits += 1 
+        if self.deadline is not None and self.timeIsUp():
+            raise SearchTimeout()
         v_star = float('inf')
         m_star = None
+        self.pvTable[current_depth] = []
 
         if node.isTerminal() or depth == 0:
             if node.isTerminal() == False :
-                if current_depth > self.maxQuiescence + self.depth : 
-                    MaxPlayerScore = self.Heuristic(node)
-                else: 
-                    sortedActions = self.sortActions(node, descending=True)
-                    if node.isQuiescent(sortedActions, playerType="min") :  
-                        MaxPlayerScore = self.Heuristic(node)
-                    else :
-                        MaxPlayerScore, _  = self.MinValue(node, 1, alpha, beta, current_depth+1)
+                MaxPlayerScore = self.Quiescence(node, alpha, beta, self.maxQuiescence, maximizing=False)
                 return MaxPlayerScore, None
             else : 
-                if node.isWin() == True :  MaxPlayerScore = 1000
-                elif node.isWin() == False : MaxPlayerScore = -1000
-                else : MaxPlayerScore = 0
+                MaxPlayerScore = self.terminalValue(node)
             return MaxPlayerScore, None
 
 
-        sortedActions = self.sortActions(node, descending=False)
+        alphaOrig, betaOrig = alpha, beta
+        nodeHash = self.zobristTable.boardHash(node)
+        remaining = node.gameState.max_step - node.gameState.get_step()
+        entry, alpha, beta = self.probeTable(nodeHash, depth, alpha, beta, current_depth, remaining)
+        if entry is not None and alpha >= beta:
+            return entry[3], entry[4]
+
+        if self.tryNullMove(node, depth, alpha, beta, current_depth):
+            self.null_move_tries += 1
+            nodes = self.node_visits
+            v = self.nullMoveSearch(node, self.MaxValue, depth, alpha, alpha + NULL_WINDOW, current_depth)
+            self.null_move_nodes += self.node_visits - nodes
+            if v <= alpha:
+                self.null_move_cutoffs += 1
+                return v, None
 
+        sortedActions = self.orderMoves(node, current_depth, self.hashMove(nodeHash, entry, current_depth))
 
-        for action in sortedActions:
-            nextNode = node.applyAction(action)
-            #depth -= 1
-            v, m  = self.MaxValue(nextNode, depth-1, alpha, beta, current_depth+1)
-            if v < v_star:
+        for index, move in enumerate(sortedActions):
+            token = node.makeMove(move)
+            if m_star is None:
+                v, m  = self.MaxValue(node, depth-1, alpha, beta, current_depth+1)
+            else:
+                reduction = self.lateMoveReduction(move, index, depth, current_depth)
+                v, m  = self.MaxValue(node, depth-1-reduction, beta - NULL_WINDOW, beta, current_depth+1)
+                if reduction and v < beta:
+                    self.lmr_researches += 1
+                    v, m  = self.MaxValue(node, depth-1, beta - NULL_WINDOW, beta, current_depth+1)
+                if alpha < v < beta:
+                    self.pvs_researches += 1
+                    v, m  = self.MaxValue(node, depth-1, alpha, beta, current_depth+1)
+            node.unmakeMove(token)
+            if v < v_star or m_star is None:
                 v_star = v
-                m_star = action
-                beta = min(beta, v_star)
+                m_star = move
+                if v_star < beta:
+                    beta = v_star
+                    self.pvTable[current_depth] = [move] + self.pvTable[current_depth + 1]
             if v_star <= alpha:
                 self.pruned_nodes_min+=1
-                return v_star, m_star
-             
+                self.updateOrdering(move, depth, current_depth)
+                break
+
+        self.storeTable(nodeHash, depth, alphaOrig, betaOrig, v_star, m_star, remaining)
         return v_star, m_star
-    
+
+    def tryNullMove(self, node: NodeState, depth, alpha: float, beta: float, current_depth):
+        """Indique si le coup nul doit être essayé dans ce noeud : noeud hors variation principale (fenêtre nulle),
+        assez de profondeur restante, pas de coup nul au coup précédent et évaluation statique déjà au-delà de
+        la borne. Le coup nul n'est pas essayé près de la fin de la partie ni quand un joueur est à une bille de
+        perdre, où passer son tour peut changer le résultat (zugzwang).
+        Args:
+            node (NodeState): État actuel du plateau (non terminal).
+            depth (int): Profondeur restante.
+            alpha (float): Valeur alpha pour l'élagage.
+            beta (float): Valeur beta pour l'élagage.
+            current_depth (int): Distance à la racine.
+
+        Returns:
+            bool: True si le coup nul doit être essayé
+        """
+        if not self.nullMove or current_depth == 0 or beta - alpha > NULL_WINDOW or depth <= NULL_MOVE_REDUCTION:
+            return False
+        if self.nullMovePly == current_depth - 1:
+            return False
+        game = node.gameState
+        if game.max_step - game.get_step() <= NULL_MOVE_MIN_PLIES or max(node.maxPlayerScore, node.minPlayerScore) >= -game.max_score - 1:
+            return False
+        maximizing = game.next_player.get_id() == node.maxPlayerID
+        staticValue = self.Heuristic(node)
+        return staticValue >= beta if maximizing else staticValue <= alpha
+
+    def nullMoveSearch(self, node: NodeState, search, depth, alpha: float, beta: float, current_depth):
+        """Passe le tour et cherche la position obtenue avec une profondeur réduite.
+        Args:
+            node (NodeState): État actuel du plateau.
+            search: MinValue ou MaxValue, selon le joueur qui joue après le coup nul.
+            depth (int): Profondeur restante.
+            alpha (float): Valeur alpha de la recherche (fenêtre nulle).
+            beta (float): Valeur beta de la recherche.
+            current_depth (int): Distance à la racine.
+
+        Returns:
+            float: valeur de la position après le coup nul
+        """
+        previousPly, self.nullMovePly = self.nullMovePly, current_depth
+        token = node.makeNullMove()
+        try:
+            v, _ = search(node, depth - 1 - NULL_MOVE_REDUCTION, alpha, beta, current_depth + 1)
+        finally:
+            node.unmakeNullMove(token)
+            self.nullMovePly = previousPly
+        return v
+
+    def lateMoveReduction(self, move, index, depth, current_depth):
+        """Réduction de profondeur d'un coup : un niveau pour les coups calmes (sans poussée, hors coups killers)
+        ordonnés après les LMR_MIN_INDEX premiers coups, 0 sinon.
+        Args:
+            move: Coup compact.
+            index (int): Rang du coup dans l'ordre de recherche.
+            depth (int): Profondeur restante.
+            current_depth (int): Distance à la racine.
+
+        Returns:
+            int: réduction de profondeur
+        """
+        if not self.lateMoveReductions or depth < LMR_MIN_DEPTH or index < LMR_MIN_INDEX:
+            return 0
+        if move >> MOVE_PUSHED_SHIFT & 3 or move in self.killers.get(current_depth, ()):
+            return 0
+        self.lmr_reductions += 1
+        return 1
+
+    def Quiescence(self, node: NodeState, alpha: float, beta: float, qDepth, maximizing: bool):
+        """Recherche de quiescence : prolonge une feuille par les seules captures, pour ne pas
+        évaluer une position où une bille est sur le point d'être sortie.
+        Le joueur à jouer peut aussi ne pas capturer (évaluation statique).
+        Args:
+            node (NodeState): État actuel du plateau (non terminal).
+            alpha (float): Valeur alpha pour l'élagage.
+            beta (float): Valeur beta pour l'élagage.
+            qDepth (int): Nombre de captures encore autorisées.
+            maximizing (bool): True si le joueur max est à jouer.
+
+        Returns:
+            float: valeur de la position
+        """
+        v_star = self.Heuristic(node)
+        if qDepth == 0:
+            return v_star
+        if maximizing:
+            if v_star >= beta:
+                return v_star
+            alpha = max(alpha, v_star)
+        else:
+            if v_star <= alpha:
+                return v_star
+            beta = min(beta, v_star)
+
+        for move in node.getCaptureMoves():
+            self.node_visits += 1
+            if self.deadline is not None and self.timeIsUp():
+                raise SearchTimeout()
+            token = node.makeMove(move)
+            if node.isTerminal():
+                v = self.terminalValue(node)
+            else:
+                v = self.Quiescence(node, alpha, beta, qDepth - 1, not maximizing)
+            node.unmakeMove(token)
+            if maximizing:
+                v_star = max(v_star, v)
+                alpha = max(alpha, v_star)
+            else:
+                v_star = min(v_star, v)
+                beta = min(beta, v_star)
+            if alpha >= beta:
+                break
+        return v_star
+
+    def terminalValue(self, node: NodeState):
+        """Valeur d'un état terminal pour le joueur max.
+        Args:
+            node (NodeState): État terminal.
+
+        Returns:
+            int: 1000 en cas de victoire, -1000 en cas de défaite, 0 en cas d'égalité
+        """
+        if node.isWin() == True : return 1000
+        elif node.isWin() == False : return -1000
+        return 0
+
+    def hashMove(self, nodeHash, entry, current_depth):
+        """Coup à chercher en premier : meilleur coup de l'itération précédente à la racine, coup de la
+        variation principale précédente si la position en fait partie, sinon coup de la table de transposition.
+        Args:
+            nodeHash: Hash de l'état actuel.
+            entry: Entrée de la table de transposition (ou None).
+            current_depth (int): Distance à la racine.
+
+        Returns:
+            Coup compact (ou None)
+        """
+        if current_depth == 0 and self.rootMove is not None:
+            return self.rootMove
+        pvEntry = self.pvHashes.get(current_depth)
+        if pvEntry is not None and pvEntry[0] == nodeHash:
+            return pvEntry[1]
+        return entry[4] if entry is not None else None
+
+    def probeTable(self, nodeHash, depth, alpha: float, beta: float, current_depth, remaining):
+        """Consulte la table de transposition pour le noeud courant.
+        Le hachage ne contient pas l'étape de la partie : une entrée dont la recherche a atteint la fin de la partie
+        n'est utilisée que pour le même nombre de coups restants, et une entrée ordinaire ne l'est que si sa recherche
+        s'arrête avant la fin de la partie de ce noeud (voir tableDepth).
+        Args:
+            nodeHash: Hash de l'état actuel.
+            depth: Profondeur restante.
+            alpha (float): Valeur alpha pour l'élagage.
+            beta (float): Valeur beta pour l'élagage.
+            current_depth: Profondeur du noeud depuis la racine.
+            remaining (int): Nombre de coups restant dans la partie.
+
+        Returns:
+            Tuple: entrée de la table (ou None), alpha et beta resserrés (alpha >= beta si l'entrée permet une coupure)
+        """
+        entry = self.zobristTable.lookup(nodeHash)
+        # La racine est toujours recherchée pour obtenir un coup à jouer
+        if entry is None or current_depth == 0:
+            return entry, alpha, beta
+        if entry[1] >= HORIZON_DEPTH:
+            if entry[1] - HORIZON_DEPTH != remaining:
+                return entry, alpha, beta
+        elif not depth <= entry[1] < remaining:
+            return entry, alpha, beta
+        flag, score = entry[2], entry[3]
+        if flag == EXACT:
+            self.hits += 1
+            return entry, score, score
+        if flag == LOWERBOUND:
+            alpha = max(alpha, score)
+        elif flag == UPPERBOUND:
+            beta = min(beta, score)
+        if alpha >= beta:
+            self.hits += 1
+        return entry, alpha, beta
+
+    def storeTable(self, nodeHash, depth, alpha: float, beta: float, value: float, move, remaining):
+        """Enregistre le résultat de la recherche d'un noeud dans la table de transposition.
+        Args:
+            nodeHash: Hash de l'état actuel.
+            depth: Profondeur restante.
+            alpha (float): Valeur alpha à l'entrée du noeud.
+            beta (float): Valeur beta à l'entrée du noeud.
+            value (float): Valeur trouvée.
+            move: Meilleur coup trouvé.
+            remaining (int): Nombre de coups restant dans la partie.
+        """
+        if value <= alpha:
+            flag = UPPERBOUND
+        elif value >= beta:
+            flag = LOWERBOUND
+        else:
+            flag = EXACT
+        self.zobristTable.store(nodeHash, self.tableDepth(depth, remaining), flag, value, move)
+
+    def tableDepth(self, depth, remaining):
+        """Profondeur enregistrée dans la table de transposition pour une recherche de profondeur depth.
+        Une recherche qui atteint la fin de la partie (max_step) a évalué ses feuilles comme des positions finales :
+        elle est enregistrée comme HORIZON_DEPTH + coups restants, valable seulement au même nombre de coups restants.
+        Args:
+            depth (int): Profondeur restante.
+            remaining (int): Nombre de coups restant dans la partie.
+
+        Returns:
+            int: profondeur de l'entrée
+        """
+        return depth if depth < remaining else HORIZON_DEPTH + remaining
+
+    def orderMoves(self, node: NodeState, current_depth, hashMove=None):
+        """Ordonne les coups sans les jouer : coup de la table de transposition, captures, poussées,
+        coups killers de cette profondeur puis coups calmes selon la table d'historique.
+        Les coups qui sortent une de ses propres billes ne sont gardés que s'il n'y en a pas d'autres.
+        Avec medianCut, seule la meilleure moitié des coups est gardée (voir cutMoves).
+        Args:
+            node (NodeState): État actuel du plateau.
+            current_depth (int): Distance à la racine.
+            hashMove: Coup à chercher en premier (ou None).
+
+        Returns:
+            List: Coups triés.
+        """
+        moves = node.getMoves()
+        # Un coup qui sort une bille sans pousser d'adversaire sort une bille du joueur
+        safeMoves = [move for move in moves if not (move & MOVE_EJECT) or move >> MOVE_PUSHED_SHIFT & 3]
+        if safeMoves:
+            moves = safeMoves
+        killers = self.killers.get(current_depth, ())
+        history = self.history
+
+        def priority(move):
+            if move == hashMove:
+                return (4, 0)
+            if move >> MOVE_PUSHED_SHIFT & 3:
+                return (3 if move & MOVE_EJECT else 2, 0)
+            if move in killers:
+                return (1, 0)
+            return (0, history.get(move, 0))
+
+        moves = sorted(moves, key=priority, reverse=True)
+        if self.medianCut:
+            moves = self.cutMoves(node, moves, hashMove)
+        return moves
+
+    def cutMoves(self, node: NodeState, moves, hashMove=None):
+        """Coupure à la médiane de l'ancien sortActions : ne garde que les coups dont l'enfant a une valeur heuristique
+        au moins égale à la médiane pour le joueur max, au plus égale pour le joueur min. L'ordre des coups est conservé
+        et le coup de la table de transposition est toujours gardé.
+        Args:
+            node (NodeState): État actuel du plateau.
+            moves (List): Coups triés.
+            hashMove: Coup de la table de transposition (ou None).
+
+        Returns:
+            List: Coups gardés.
+        """
+        values = []
+        for move in moves:
+            token = node.makeMove(move)
+            values.append(self.Heuristic(node))
+            node.unmakeMove(token)
+        medianValue = np.median(values)
+        if node.gameState.next_player.get_id() == node.maxPlayerID:
+            return [move for move, value in zip(moves, values) if value >= medianValue or move == hashMove]
+        return [move for move, value in zip(moves, values) if value <= medianValue or move == hashMove]
+
+    def updateOrdering(self, move, depth, current_depth):
+        """Met à jour les coups killers et l'historique après une coupure.
+        Seuls les coups calmes (sans poussée) sont retenus, les poussées étant déjà cherchées en premier.
+        Args:
+            move: Coup ayant provoqué la coupure.
+            depth (int): Profondeur restante.
+            current_depth (int): Distance à la racine.
+        """
+        if move >> MOVE_PUSHED_SHIFT & 3:
+            return
+        killers = self.killers.setdefault(current_depth, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+        self.history[move] = self.history.get(move, 0) + depth * depth
+
+    def ageHistory(self):
+        """Divise les scores d'historique par deux entre deux recherches, pour favoriser les coupures récentes."""
+        for move in list(self.history):
+            score = self.history[move] // 2
+            if score:
+                self.history[move] = score
+            else:
+                del self.history[move]
+
     def Heuristic(self,node:NodeState) -> int :
-        """Heuristique pour évaluer un état du plateau.
+        """Heuristique pour évaluer un état du plateau, gardée dans le cache des évaluations.
 
         Args:
             node (NodeState): État actuel du plateau.
@@ -162,32 +1144,30 @@ class AlphaBetaZobrist:
             int: valeur heuristique
 
         """
-        cohesion_score = node.calculateCohesion()
-        return -5*node.maxPlayerDistance + node.minPlayerDistance + 12 * self.getScoreDiff(node) - cohesion_score 
+        if self.evalCache is not None:
+            key = node.gameState.get_hash()
+            value = self.evalCache.get(key)
+            if value is None:
+                value = self.evaluate(node)
+                self.evalCache.put(key, value)
+            return value
+        return self.evaluate(node)
 
+    def evaluate(self,node:NodeState) -> int :
+        """Calcul de l'heuristique (voir Heuristic).
+        Tous les termes sont entiers, ce que suppose NULL_WINDOW. La cohésion (NodeState.calculateCohesion)
+        n'en fait pas partie : elle valait toujours 0 dans la version d'origine.
 
-    def sortActions(self,node : NodeState, descending = False) :
-        """Trie les actions en fonction de leur évaluation.
         Args:
             node (NodeState): État actuel du plateau.
-            descending (bool, optional): Ordre du tri. Par défaut False.
 
         Returns:
-            List: Actions triées.
+            int: valeur heuristique
+
         """
-        if descending == True : 
-            actionValues = [(action, self.Heuristic(child_node)) for action,child_node in node.getChildren("max")]
-        else : 
-            actionValues = [(action, self.Heuristic(child_node)) for action,child_node in node.getChildren("min")]
+        return -5*node.maxPlayerDistance + node.minPlayerDistance + 12 * self.getScoreDiff(node)
 
-        sortedActions = [(action, value) for action, value in sorted(actionValues, reverse= descending ,key=lambda x: x[1])]
-        medianValue = np.median([value for _, value in actionValues])
 
-        if descending == True: #Pour max player 
-            return [action for action, value in sortedActions if value >= medianValue]
-        else : #Pour min player 
-            return [action for action, value in sortedActions if value <= medianValue]
-    
     def getScoreDiff(self,node:NodeState) -> int:
         """Calcule la différence de score entre les joueurs.
         Args:
@@ -202,3 +1182,75 @@ class AlphaBetaZobrist:
     def to_json(cls) :
         """Conversion de l'objet en JSON. Non implémenté pour le moment."""
         return json.dumps(None)
+
+
+_workerSearches = {} # Recherches propres à chaque processus du pool, par (table partagée (None : table du processus), table symétrique)
+
+
+def _getWorkerSearch(maxPlayerID, maxQuiescence, sharedTable, nullMove=True, lateMoveReductions=True, symmetric=False,
+                     medianCut=False):
+    """Retourne la recherche du processus associée à une table de transposition, conservée d'une tâche à l'autre."""
+    search = _workerSearches.get((sharedTable, symmetric))
+    if search is None:
+        if sharedTable is None:
+            zobristTable = ZobristTable(symmetric=symmetric)
+        else:
+            name, sizeMB = sharedTable
+            zobristTable = ZobristTable(sharedMB=sizeMB, sharedName=name, symmetric=symmetric)
+        search = AlphaBetaZobrist(depth=1, playerID=maxPlayerID, zobristTable=zobristTable, maxQuiescence=maxQuiescence)
+        _workerSearches[(sharedTable, symmetric)] = search
+    search.maxQuiescence = maxQuiescence
+    search.nullMove = nullMove
+    search.lateMoveReductions = lateMoveReductions
+    search.medianCut = medianCut
+    search.node_visits = 0
+    search.pvHashes = {}
+    return search
+
+
+def _searchMoves(state, maxPlayerID, maxPlayerName, maxPlayerPieceType, moves, depth, alpha, beta, current_depth, maximizing, deadline,
+                 maxQuiescence, sharedTable=None, nullMove=True, lateMoveReductions=True, symmetric=False, killers=None, history=None,
+                 medianCut=False):
+    """Tâche d'un processus de la recherche parallèle : cherche une part des coups d'un noeud de la variation principale
+    (voir searchMoves), à partir des coups killers et de l'historique de la recherche principale.
+
+    Returns:
+        Tuple: résultats de searchMoves, noeuds visités, temps de calcul de la tâche (s)
+    """
+    start = time.process_time()
+    search = _getWorkerSearch(maxPlayerID, maxQuiescence, sharedTable, nullMove, lateMoveReductions, symmetric, medianCut)
+    search.killers = killers if killers is not None else {}
+    search.history = history if history is not None else {}
+    search.searchDepth = current_depth + depth
+    search.pvTable = [[] for _ in range(current_depth + depth + 2)]
+    search.deadline = deadline
+    node = NodeState(state, maxPlayerID, maxPlayerName, maxPlayerPieceType)
+    try:
+        results = search.searchMoves(node, moves, depth, alpha, beta, current_depth, maximizing)
+    finally:
+        search.deadline = None
+    return results, search.node_visits, time.process_time() - start
+
+
+def _searchLazySMP(state, maxPlayerID, maxPlayerName, maxPlayerPieceType, depth, deadline, maxQuiescence, sharedTable,
+                   nullMove=True, lateMoveReductions=True, symmetric=False, medianCut=False):
+    """Tâche d'un processus de la recherche Lazy SMP : cherche la racine jusqu'à la fin de la recherche principale.
+
+    Returns:
+        Tuple: noeuds visités, temps de calcul de la tâche (s)
+    """
+    start = time.process_time()
+    search = _getWorkerSearch(maxPlayerID, maxQuiescence, sharedTable, nullMove, lateMoveReductions, symmetric, medianCut)
+    search.searchDepth = depth
+    search.pvTable = [[] for _ in range(depth + 2)]
+    search.deadline = deadline if deadline is not None else float("inf")
+    search.stopRequested = search.zobristTable.table.stopRequested
+    node = NodeState(state, maxPlayerID, maxPlayerName, maxPlayerPieceType)
+    try:
+        search.MaxValue(node, depth, float("-inf"), float("inf"), 0)
+    except SearchTimeout:
+        pass
+    finally:
+        search.deadline = None
+        search.stopRequested = None
+    return search.node_visits, time.process_time() - start
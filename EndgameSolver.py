@@ -0,0 +1,190 @@
+from NodeState import NodeState
+from MonteCarloTreeSearch import MonteCarloTreeSearch, legalMoves, playMove, winner
+from TranspositionTable import EXACT, LOWERBOUND, UPPERBOUND
+from bitboard_abalone import centre_distance
+import time
+
+NODE_RATE = 3000 # Estimation initiale du nombre de noeuds visités par seconde
+BRANCHING = 4.8 # Estimation initiale du facteur de branchement effectif : noeuds visités ** (1 / coups restants)
+MIN_ESTIMATE_NODES = 1024 # Nombre minimal de noeuds visités pour mettre à jour les estimations
+
+
+class SolverTimeout(Exception):
+    """Levée lorsque le temps alloué à la résolution est écoulé."""
+
+
+class EndgameSolver:
+    """Résolution exacte de la fin de partie : recherche Alpha-Beta jusqu'à la dernière étape de la partie
+    (GameStateAbalone.max_step), sans heuristique. Les positions finales sont évaluées comme
+    MasterAbalone.compute_winner : le moins de billes perdues, puis la plus petite distance au centre.
+    La valeur d'une position est 1 (victoire), 0 (égalité) ou -1 (défaite) pour le joueur au trait,
+    ce qui donne beaucoup de coupures exactes.
+    """
+
+    def __init__(self, maxEntries=2_000_000):
+        """
+        Args:
+            maxEntries (int, optional): Nombre maximal de positions dans la table de transposition du solveur.
+                La table est vidée quand elle est pleine.
+        """
+        self.maxEntries = maxEntries
+        self.table = {} # (bitboards, billes perdues, étape, joueur au trait) -> (drapeau, valeur, coup)
+        self.deadline = float("inf")
+        self.maxStep = 0
+        self.maxLost = 0
+
+        self.nodeRate = NODE_RATE # Noeuds visités par seconde, mesuré à chaque résolution
+        self.branching = BRANCHING # Facteur de branchement effectif, mesuré à chaque résolution
+
+        self.nodes=0 #nombre de noeuds visités
+        self.hits=0 #nombre de coupures par la table de transposition
+
+    def estimateTime(self, node: NodeState):
+        """Estimation du temps de résolution de la position (s) : branching ** coups restants / nodeRate.
+
+        Args:
+            node (NodeState): État actuel du plateau.
+
+        Returns:
+            float: temps estimé (s)
+        """
+        remainingPlies = node.gameState.max_step - node.gameState.get_step()
+        return self.branching ** remainingPlies / self.nodeRate
+
+    def updateEstimates(self, remainingPlies, elapsed, solved):
+        """Met à jour la vitesse et le facteur de branchement effectif avec la dernière résolution.
+        Après un dépassement du temps, le nombre de noeuds visités n'est qu'une borne inférieure : le facteur
+        est augmenté pour que la position suivante, un coup plus loin, ne soit pas estimée moins chère.
+
+        Args:
+            remainingPlies (int): Nombre de coups restant dans la partie à la racine de la résolution.
+            elapsed (float): Durée de la résolution (s).
+            solved (bool): La résolution s'est terminée avant l'instant limite.
+        """
+        if self.nodes < MIN_ESTIMATE_NODES:
+            return
+        self.nodeRate = self.nodes / max(elapsed, 1e-3)
+        if solved:
+            self.branching = self.nodes ** (1 / remainingPlies)
+        elif remainingPlies > 1:
+            self.branching = max(self.branching, self.nodes ** (1 / (remainingPlies - 1)))
+
+    def solve(self, node: NodeState, deadline=None):
+        """Résout la position jusqu'à la fin de la partie.
+
+        Args:
+            node (NodeState): État actuel du plateau.
+            deadline (float, optional): Instant limite de la résolution (time.time()).
+
+        Returns:
+            Tuple: valeur pour le joueur max (1, 0 ou -1), meilleur coup (compact), ou None si le temps est écoulé
+        """
+        start = time.time()
+        position, self.maxStep, self.maxLost = MonteCarloTreeSearch.toPosition(node)
+        self.deadline = deadline if deadline is not None else float("inf")
+        if len(self.table) > self.maxEntries:
+            self.table.clear()
+        remainingPlies = self.maxStep - position[2]
+        try:
+            v, m = self.negamax(position, -1, 1)
+        except SolverTimeout:
+            self.updateEstimates(remainingPlies, time.time() - start, False)
+            self.printStatistics(time.time() - start, None)
+            return None
+        if node.gameState.next_player.get_id() != node.maxPlayerID:
+            v = -v
+        self.updateEstimates(remainingPlies, time.time() - start, True)
+        self.printStatistics(time.time() - start, v)
+        return v, m
+
+    def negamax(self, position, alpha, beta):
+        """Recherche Alpha-Beta (forme negamax) de la valeur exacte d'une position non terminale.
+
+        Args:
+            position (Tuple): Position (voir MonteCarloTreeSearch.toPosition).
+            alpha (int): Borne inférieure pour le joueur au trait.
+            beta (int): Borne supérieure pour le joueur au trait.
+
+        Returns:
+            Tuple: valeur pour le joueur au trait, meilleur coup (compact)
+        """
+        self.nodes += 1
+        if self.nodes & 1023 == 0 and time.time() > self.deadline:
+            raise SolverTimeout()
+        alphaOrig = alpha
+        hashMove = None
+        entry = self.table.get(position)
+        if entry is not None:
+            flag, value, hashMove = entry
+            if flag == EXACT:
+                self.hits += 1
+                return value, hashMove
+            if flag == LOWERBOUND:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                self.hits += 1
+                return value, hashMove
+
+        v_star, m_star = -2, None
+        for move, child in self.orderChildren(position, hashMove):
+            if self.isTerminal(child):
+                v = -self.terminalValue(child)
+            else:
+                v, _ = self.negamax(child, -beta, -alpha)
+                v = -v
+            if v > v_star:
+                v_star, m_star = v, move
+                alpha = max(alpha, v)
+            if alpha >= beta:
+                break
+
+        if v_star <= alphaOrig:
+            flag = UPPERBOUND
+        elif v_star >= beta:
+            flag = LOWERBOUND
+        else:
+            flag = EXACT
+        self.table[position] = (flag, v_star, m_star)
+        return v_star, m_star
+
+    def orderChildren(self, position, hashMove):
+        """Coups et positions suivantes, triés : coup de la table, puis selon les billes perdues et
+        la distance au centre après le coup (le critère de compute_winner).
+
+        Returns:
+            List: (coup, position suivante)
+        """
+        side = position[3]
+        children = []
+        for move in legalMoves(position):
+            child = playMove(position, move)
+            if move == hashMove:
+                score = float("inf")
+            else:
+                bits, lost, _, _ = child
+                score = 1000 * (lost[1 - side] - lost[side]) + centre_distance(bits[1 - side]) - centre_distance(bits[side])
+            children.append((score, move, child))
+        children.sort(key=lambda item: item[0], reverse=True)
+        return [(move, child) for _, move, child in children]
+
+    def isTerminal(self, position):
+        """Indique si la partie est terminée : dernière étape atteinte ou trop de billes perdues."""
+        return position[2] >= self.maxStep or max(position[1]) >= self.maxLost
+
+    def terminalValue(self, position):
+        """Valeur d'une position terminale pour le joueur au trait : 1, 0 (égalité) ou -1."""
+        result = winner(position)
+        if result is None:
+            return 0
+        return 1 if result == position[3] else -1
+
+    def printStatistics(self, elapsed, value):
+        """Affiche les statistiques de la résolution et les remet à zéro."""
+        result = "timeout" if value is None else {1: "win", 0: "draw", -1: "loss"}[value]
+        print(f"Endgame Solver: {result} in {elapsed:.2f}s")
+        print(f"    Nodes Visited: {self.nodes}, Table Cutoffs: {self.hits}, Table Size: {len(self.table)}")
+        print(f"    Node Rate: {self.nodeRate:.0f}/s, Effective Branching: {self.branching:.2f}")
+        self.nodes=0
+        self.hits=0
@@ -19,14 +19,16 @@ def findAvailablePort(used_ports, start_port=16001, end_port=18000):
 # Classe pour gérer les jeux
 class Gym:
     # Constructeur pour initialiser les chemins des agents et la commande de base
-    def __init__(self, agent1Path, agent2Path):
+    def __init__(self, agent1Path, agent2Path, tablePath=None):
         self.agent1Path = agent1Path #On défini le premier agent
         self.agent2Path = agent2Path #On défini le deuxieme agent
+        #Fichier de la table de transposition gardée d'une partie à l'autre (voir MyPlayer, tablePath)
+        self.tablePath = tablePath
         #Commande de base pour le lancement de parties
         self.baseCommand = ["python", "main_abalone.py", "-t", "local", self.agent1Path, self.agent2Path]
 
     # Méthode pour jouer une partie
-    def play(self, gui=False, record=False, type="classic", port=None, many=False):
+    def play(self, gui=False, record=False, type="classic", port=None, many=False, slot=0):
         """Jouer une partie du jeu.
 
         Args:
@@ -35,6 +37,7 @@ class Gym:
             type (str): Type de jeu ("classic" ou "alien").
             port (int): Port à utiliser pour la partie.
             many (bool): Si plusieurs parties doivent être jouées en parallèle.
+            slot (int): Numéro de la partie parmi les parties jouées en parallèle : chacune a son fichier de table.
 
         Returns:
             subprocess.Popen: Le processus qui exécute la partie, si many=True.
@@ -54,14 +57,34 @@ class Gym:
         playCommand.append(str(port))
         #Indiquer que la partie est sur le point d'être lancée
         print(f"{datetime.now()} - Game run!")
+        env = self.tableEnv(slot)
         playCommand = " ".join(playCommand)
         if many: #Si on veut lancer plusieurs parties simultanément on utiliser subprocess.Popen
             with open(os.devnull, 'w') as fnull:
-                p = subprocess.Popen(playCommand, stdout=fnull, stderr=fnull, shell=True)
+                p = subprocess.Popen(playCommand, stdout=fnull, stderr=fnull, shell=True, env=env)
             return p
         else: #Si on désire lancer une seule partie on run la commande sur un seul process
             with open(os.devnull, 'w') as fnull:
-                subprocess.run(playCommand, shell=True, stdout=fnull, stderr=fnull)
+                subprocess.run(playCommand, shell=True, stdout=fnull, stderr=fnull, env=env)
+
+    # Environnement d'une partie : fichier de table propre à chaque partie jouée en parallèle
+    def tableEnv(self, slot=0):
+        """Retourne l'environnement de la partie, avec ABALONE_TABLE_PATH si une table est enregistrée.
+        Deux processus ne peuvent pas ouvrir la même table : la partie slot utilise le fichier tablePath suffixé de _slot.
+
+        Args:
+            slot (int): Numéro de la partie parmi les parties jouées en parallèle.
+
+        Returns:
+            dict: L'environnement de la partie, ou None pour celui de ce processus.
+        """
+        if not self.tablePath:
+            return None
+        path = self.tablePath
+        if slot:
+            base, extension = os.path.splitext(path)
+            path = f"{base}_{slot}{extension}"
+        return dict(os.environ, ABALONE_TABLE_PATH=path)
 
     # Méthode pour entraîner les agents en jouant plusieurs parties
     def train(self, numberOfGames=10, gui=False, record=False, type="classic", port=None, use_threads=True):
@@ -79,11 +102,11 @@ class Gym:
         popen_list = []
         start = time.time()
         if use_threads: #Si l'on désire lancer des parties en simultanés
-            for _ in range(numberOfGames):
+            for slot in range(numberOfGames):
                 #On trouve un port non utilisé
                 port, usedPorts = findAvailablePort(usedPorts)
                 #On défini le process à lancer
-                p = self.play(gui, record, type, port, use_threads)
+                p = self.play(gui, record, type, port, use_threads, slot)
                 #On rajoute le process à la liste de process 
                 popen_list.append(p)
             for p in popen_list:
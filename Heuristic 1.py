@@ -1,20 +1,10 @@
 from NodeState import NodeState
+from TranspositionTable import EvaluationCache
+from bitboard_abalone import cell_mask
+from geometry_abalone import CELL_EDGE_DISTANCE, CELL_INDEX, CELL_NEIGHBOURS, CELLS, CENTRE, DIRECTION_INDEX, DIRECTIONS, HEX_DISTANCE
 from collections import deque
 import numpy as np
 
-# Utiliser des ensembles pour des vérifications de membres plus rapides
-topLeftEdge = {(6,0),(8,0),(10,0)}
-downLeftEdge = {(13,1),(14,2),(15,3)}
-topRightEdge = {(1,5),(2,6),(3,7)}
-downRightEdge = {(6,8),(8,8),(10,8)}
-
-topLeftCorner = (4,0)
-downLeftCorner = (16,4)
-topRightCorner = (0,4)
-downRightCorner = (12,8)
-leftCorner = (12,0)
-rightCorner = (4,8)
-
 nordWest = (-1,-1)
 nordEast = (-2,0)
 southWest = (2,0)
@@ -22,20 +12,9 @@ southEast = (1,1)
 west = (1,-1)
 east = (-1,1)
 
-# Cartographie de positions spécifiques à leurs directions
-DIRECTIONS_MAP = {
-    topLeftCorner: [east, southEast, southWest],
-    downLeftCorner: [east, nordEast, nordWest],
-    topRightCorner: [west, southEast, southWest],
-    downRightCorner: [west, nordWest, nordEast],
-    leftCorner: [east, nordEast, southEast],
-    rightCorner: [west, nordWest, southWest],
-    **{pos: [east, nordEast, southEast, southWest] for pos in topLeftEdge},
-    **{pos: [east, nordEast, nordWest, southEast] for pos in downLeftEdge},
-    **{pos: [west, nordWest, southEast, southWest] for pos in topRightEdge},
-    **{pos: [west, nordEast, nordWest, southWest] for pos in downRightEdge}
-}
-#cartographie des axes
+# Ordre des voisins retournés par getNeighbors (indices dans geometry_abalone.DIRECTIONS)
+NEIGHBOR_DIRECTIONS = [DIRECTION_INDEX[direction] for direction in (east, west, nordEast, nordWest, southWest, southEast)]
+#cartographie des axes (deux directions opposées sont sur le même axe)
 AXE_MAP = {
     nordWest : "westDiagonal",
     nordEast : "eastDiagonal",
@@ -54,31 +33,9 @@ def getNeighbors(position):
     Retourne:
     - list: liste des positions voisines.
     """
-    x, y = position
-    directions = DIRECTIONS_MAP.get(position)
-    
-    if not directions:
-        total = x + y 
-        if total == 20:  # Bordure inférieure du plateau
-            directions = [east, west, nordEast, nordWest]
-        elif total == 4:  # Bordure supérieure du plateau
-            directions = [east, west, southEast, southWest]
-        else:  # Au milieu du plateau, toutes les six directions possibles
-            directions = [east, west, nordEast, nordWest, southWest, southEast]
-    
-    neighbors = [(x + dx, y + dy) for dx, dy in directions]
-    return neighbors
-# Fonction pour calculer la distance de Manhattan entre deux positions
-def manhattanDistance(A, B):
-    mask1 = [(0,2),(1,3),(2,4)]
-    mask2 = [(0,4)]
-    diff = (abs(B[0] - A[0]),abs(B[1] - A[1]))
-    dist = (abs(B[0] - A[0]) + abs(B[1] - A[1]))/2
-    if diff in mask1:
-        dist += 1
-    if diff in mask2:
-        dist += 2
-    return dist
+    # Voisins lus dans la table de geometry_abalone, sans ceux hors du plateau
+    neighbors = CELL_NEIGHBOURS[CELL_INDEX[position]]
+    return [CELLS[neighbors[d]] for d in NEIGHBOR_DIRECTIONS if neighbors[d] >= 0]
 
 # Fonction pour obtenir la direction de pos1 à pos2
 def getDirection(pos1,pos2):
@@ -204,6 +161,226 @@ def getClusters(boardDict : dict) :
 
 
 
+# Caractéristiques par lots. Un plateau est encodé par une ligne de 61 cases (indices de geometry_abalone.CELLS) :
+# 1 pour une bille du joueur max, -1 pour une bille du joueur min, 0 pour une case vide.
+BOARD_CELLS = len(CELLS)
+PAD = BOARD_CELLS # Case vide ajoutée aux plateaux pour les voisins hors du plateau
+AXES = ["horizontal", "eastDiagonal", "westDiagonal"]
+# Axes des calculs par lots : lignes réelles du plateau (directions opposées sur le même axe),
+# contrairement à AXE_MAP que getClusters et faceOff gardent tel quel
+LINE_AXE_MAP = {
+    nordWest : "westDiagonal",
+    nordEast : "eastDiagonal",
+    southWest : "eastDiagonal",
+    southEast : "westDiagonal",
+    west : "horizontal",
+    east : "horizontal"
+}
+# Voisin et second voisin dans chaque direction (PAD hors du plateau), (62, 6)
+NEIGHBOR_TABLE = np.array([[n if n >= 0 else PAD for n in neighbors] for neighbors in CELL_NEIGHBOURS] + [[PAD] * len(DIRECTIONS)])
+SECOND_NEIGHBOR_TABLE = np.take_along_axis(NEIGHBOR_TABLE[NEIGHBOR_TABLE], np.arange(len(DIRECTIONS))[None, :, None], axis=2)[:, :, 0]
+DIRECTION_AXES = np.array([AXES.index(LINE_AXE_MAP[direction]) for direction in DIRECTIONS])
+EDGE_VECTOR = np.array(CELL_EDGE_DISTANCE, dtype=np.float64)
+CENTER_VECTOR = np.array([abs(i - CENTRE[0]) + abs(j - CENTRE[1]) for i, j in CELLS], dtype=np.float64) # voir NodeState.distanceFromCenter
+
+def encodeNodes(nodes) -> np.ndarray:
+    """
+    Encode des états pour batchFeaturesVector, du point de vue du joueur max de chaque noeud.
+
+    Args:
+    - nodes (list[NodeState]): états du plateau.
+
+    Retourne:
+    - np.ndarray: plateaux (N, 61) int8
+    """
+    boards = np.zeros((len(nodes), BOARD_CELLS), dtype=np.int8)
+    for row, node in zip(boards, nodes):
+        bits = node.gameState.get_bitboard().bits
+        row += cell_mask(bits[node.maxPlayerID]).astype(np.int8)
+        row -= cell_mask(bits[node.minPlayerID]).astype(np.int8)
+    return boards
+
+def encodeScores(nodes) -> np.ndarray:
+    """
+    Scores des états pour batchFeaturesVector : billes adverses sorties par le joueur max puis par le joueur min.
+
+    Args:
+    - nodes (list[NodeState]): états du plateau.
+
+    Retourne:
+    - np.ndarray: scores (N, 2) (NodeState.maxPlayerScore, NodeState.minPlayerScore)
+    """
+    return np.array([(node.maxPlayerScore, node.minPlayerScore) for node in nodes], dtype=np.int64).reshape((len(nodes), 2))
+
+def clusterSizes(own: np.ndarray) -> np.ndarray:
+    """
+    Taille des clusters (composantes connexes) des billes d'un joueur, par propagation de l'étiquette minimale
+    entre voisins et saut de pointeurs.
+
+    Args:
+    - own (np.ndarray): billes du joueur (N, 62) bool, la colonne PAD est vide.
+
+    Retourne:
+    - np.ndarray: (N, 62) nombre de billes du cluster dont la case est la racine (plus petit indice), 0 ailleurs
+    """
+    labels = np.where(own, np.arange(PAD + 1, dtype=np.int8), np.int8(PAD))
+    while True:
+        neighborLabels = labels[:, NEIGHBOR_TABLE].min(axis=2)
+        newLabels = np.where(own, np.minimum(labels, neighborLabels), np.int8(PAD))
+        newLabels = np.take_along_axis(newLabels, newLabels, axis=1)
+        if np.array_equal(newLabels, labels):
+            break
+        labels = newLabels
+    rows = np.broadcast_to(np.arange(len(own))[:, None], labels.shape)
+    sizes = np.bincount((rows * (PAD + 1) + labels.astype(np.int64))[own], minlength=len(own) * (PAD + 1))
+    return sizes.reshape(len(own), PAD + 1)
+
+def lineStrengths(own: np.ndarray) -> np.ndarray:
+    """
+    Force de chaque bille sur les trois axes : 1, plus 1 par voisin allié sur l'axe, plus 1 par bille alliée
+    à deux cases derrière ce voisin (ligne de trois billes).
+
+    Args:
+    - own (np.ndarray): billes du joueur (N, 62) bool.
+
+    Retourne:
+    - np.ndarray: (N, 62, 3) forces par axe (AXES), 0 sur les cases sans bille du joueur
+    """
+    first = own[:, NEIGHBOR_TABLE]
+    line = first.astype(np.int8) + (first & own[:, SECOND_NEIGHBOR_TABLE])
+    strengths = np.ones(own.shape + (len(AXES),), dtype=np.int8)
+    for d, axis in enumerate(DIRECTION_AXES):
+        strengths[:, :, axis] += line[:, :, d]
+    return strengths * own[:, :, None]
+
+def batchFeaturesVector(boards: np.ndarray, scores: np.ndarray) -> np.ndarray:
+    """
+    Calcule les caractéristiques de HeuristicClass.featuresVector(lineFeatures=True) pour N plateaux à la fois,
+    avec des opérations NumPy sur les tables de voisinage.
+
+    Args:
+    - boards (np.ndarray): plateaux (N, 61) int8 (voir encodeNodes).
+    - scores (np.ndarray): scores (N, 2) du joueur max et du joueur min (voir encodeScores).
+
+    Par rapport à featuresVector sans lineFeatures (parcours en largeur de getClusters), les colonnes 6 à 15 changent :
+    - 6, 7 (cohésion des clusters) : le parcours comptait certaines billes plusieurs fois dans un cluster ;
+    - 8 à 11 (force totale et cohésion des forces) : la force d'une bille est symétrique et ne dépend plus
+      de l'ordre de visite, sur les axes de LINE_AXE_MAP ;
+    - 12 à 15 (FaceOff) : mêmes forces, et la bille ennemie est comparée sur l'axe réel de la direction.
+    Les colonnes 0 à 5 et 16 à 31 sont identiques.
+
+    Retourne:
+    - np.ndarray: caractéristiques (N, 32)
+    """
+    boards = np.asarray(boards)
+    padded = np.zeros((len(boards), PAD + 1), dtype=np.int8)
+    padded[:, :PAD] = boards
+    X = np.zeros((len(boards), 32))
+    players = {}
+    for sign, own in ((1, padded == 1), (-1, padded == -1)):
+        cells = own[:, :PAD].astype(np.float64)
+        marbles = cells.sum(axis=1)
+        sizes = clusterSizes(own)
+        clusters = (sizes > 0).sum(axis=1)
+        strengths = lineStrengths(own)
+        totals = (strengths.sum(axis=2, dtype=np.int64) - 2) * own # 1 + voisins et lignes de trois sur les trois axes
+        totalStrength = totals.sum(axis=1)
+        pairs = (cells @ HEX_DISTANCE * cells).sum(axis=1) / 2
+        numberOfPairs = marbles * (marbles - 1) / 2
+        averageDistance = np.divide(pairs, numberOfPairs, out=np.zeros_like(pairs), where=numberOfPairs > 0)
+        players[sign] = {
+            "own": own,
+            "strengths": strengths,
+            "marbles": marbles,
+            "distance": cells @ CENTER_VECTOR,
+            "columns": [
+                clusters,
+                sign * marbles,
+                sign * np.divide(marbles, clusters, out=np.zeros_like(marbles), where=clusters > 0),
+                sign * (sizes.astype(np.float64) ** 2).sum(axis=1) / np.maximum(marbles, 1) ** 2,
+                sign * totalStrength,
+                sign * (totals ** 2).sum(axis=1) / np.maximum(totalStrength, 1) ** 2,
+            ],
+            "edge": sign * (cells @ EDGE_VECTOR),
+            "pairs": [-sign * pairs, -sign * averageDistance, sign / (1.0 + averageDistance)],
+        }
+    maxPlayer, minPlayer = players[1], players[-1]
+    for k in range(6):
+        X[:, 2 * k] = maxPlayer["columns"][k]
+        X[:, 2 * k + 1] = minPlayer["columns"][k]
+
+    # FaceOff : force de la bille alliée sur l'axe moins celle de la bille ennemie voisine
+    for d, axis in enumerate(DIRECTION_AXES):
+        facing = maxPlayer["own"] & minPlayer["own"][:, NEIGHBOR_TABLE[:, d]]
+        enemy = minPlayer["strengths"][:, NEIGHBOR_TABLE[:, d], axis]
+        delta = ((maxPlayer["strengths"][:, :, axis] - enemy) * facing).sum(axis=1)
+        X[:, 12] += delta
+        X[:, 13 + axis] += delta
+
+    X[:, 16], X[:, 17] = maxPlayer["edge"], minPlayer["edge"]
+    X[:, 18:21] = np.stack(maxPlayer["pairs"], axis=1)
+    X[:, 21:24] = np.stack(minPlayer["pairs"], axis=1)
+    X[:, 24], X[:, 25] = -maxPlayer["distance"], minPlayer["distance"]
+    maxPlayerScore, minPlayerScore = np.asarray(scores).T
+    X[:, 26], X[:, 27] = minPlayerScore == 6, maxPlayerScore == 6
+    X[:, 28], X[:, 29] = maxPlayerScore > minPlayerScore, minPlayerScore > maxPlayerScore
+    X[:, 30], X[:, 31] = minPlayer["distance"] > maxPlayer["distance"], maxPlayer["distance"] > minPlayer["distance"]
+    return X
+
+
+# Vecteurs de caractéristiques déjà calculés, par (hachage Zobrist, couleur du joueur max)
+FEATURES_CACHE = EvaluationCache(2**16)
+
+def cachedFeaturesVector(node : NodeState, cache : EvaluationCache = FEATURES_CACHE, lineFeatures=False):
+    """
+    Retourne le vecteur de caractéristiques de HeuristicClass.featuresVector, calculé une seule fois par position.
+    Le tableau retourné est partagé avec le cache et ne doit pas être modifié.
+
+    Args:
+    - node (NodeState): état du plateau.
+    - cache (EvaluationCache): cache des vecteurs.
+    - lineFeatures (bool): colonnes 6 à 15 de batchFeaturesVector (voir HeuristicClass.featuresVector).
+
+    Retourne:
+    - np.ndarray: vecteur (1, 32)
+    """
+    key = (node.gameState.get_hash(), node.maxPlayerPieceType, lineFeatures)
+    X = cache.get(key)
+    if X is None:
+        X = HeuristicClass(node).featuresVector(lineFeatures)
+        cache.put(key, X)
+    return X
+
+def cachedFeaturesMatrix(nodes, cache : EvaluationCache = FEATURES_CACHE, lineFeatures=False):
+    """
+    Comme cachedFeaturesVector pour une liste d'états (par exemple les enfants d'un noeud). Avec lineFeatures,
+    les positions absentes du cache sont calculées en un seul appel à batchFeaturesVector.
+
+    Args:
+    - nodes (list[NodeState]): états du plateau.
+    - cache (EvaluationCache): cache des vecteurs.
+    - lineFeatures (bool): colonnes 6 à 15 de batchFeaturesVector (voir HeuristicClass.featuresVector).
+
+    Retourne:
+    - np.ndarray: matrice (N, 32)
+    """
+    keys = [(node.gameState.get_hash(), node.maxPlayerPieceType, lineFeatures) for node in nodes]
+    rows = [cache.get(key) for key in keys]
+    missing = [k for k, X in enumerate(rows) if X is None]
+    if missing and not lineFeatures:
+        for k in missing:
+            rows[k] = HeuristicClass(nodes[k]).featuresVector()
+            cache.put(keys[k], rows[k])
+    elif missing:
+        missingNodes = [nodes[k] for k in missing]
+        features = batchFeaturesVector(encodeNodes(missingNodes), encodeScores(missingNodes))
+        for k, X in zip(missing, features):
+            rows[k] = X.reshape((1,32))
+            cache.put(keys[k], rows[k])
+    if not rows:
+        return np.zeros((0, 32))
+    return np.concatenate(rows)
+
 class HeuristicClass : 
     def __init__(self, node : NodeState):
         # Initialisation de la classe avec un objet NodeState
@@ -212,49 +389,78 @@ class HeuristicClass :
         self.boardDict = node.gameState.get_rep().env
         self.boardHeight = node.gameState.get_rep().get_dimensions()[0]
         self.boardWidth = node.gameState.get_rep().get_dimensions()[1]
-        # Calcul des clusters
-        self.clustersDict = getClusters(self.boardDict)
-        # Clusters pour chaque joueur
-        self.maxClusters, self.minClusters, self.maxClustersCount, self.minClustersCount = self.clusters()
+        # Clusters et forces tenus à jour par l'état du jeu à chaque coup (voir cluster_abalone)
+        clusters = node.gameState.get_clusters()
+        maxClusters, minClusters = clusters[node.maxPlayerID], clusters[node.minPlayerID]
+        self.maxClustersCount, self.minClustersCount = maxClusters.get_clusters(), minClusters.get_clusters()
         # Nombre de marbres pour chaque joueur
         self.maxMarbles, self.minMarbles = self.totalMarbles()
         # Moyenne de marbres par cluster pour chaque joueur
-        self.maxMean, self.minMean = self.maxMarbles/self.maxClustersCount , self.minMarbles/self.minClustersCount
+        self.maxMean, self.minMean = maxClusters.get_mean_size(), minClusters.get_mean_size()
         #Cohesion des clusters en terme de quantité de marbres par cluster
-        self.maxCountCohesion = self.countCohesion(self.node.maxPlayerPieceType,self.maxMarbles)
-        self.minCountCohesion = self.countCohesion(self.node.minPlayerPieceType,self.minMarbles)
+        self.maxCountCohesion = maxClusters.get_count_cohesion()
+        self.minCountCohesion = minClusters.get_count_cohesion()
         # Cohésion des forces des marbres pour chaque joueur
-        self.maxStrengthsDict, self.minStrengthsDict = self.marbleStrenght()
-        self.maxTotalStrength = self.totalStrenght(self.maxStrengthsDict)
-        self.minTotalStrength = self.totalStrenght(self.minStrengthsDict)
-        self.maxMarbleStrengthCohesion = self.marbleStrengthCohesion(self.maxStrengthsDict,self.maxTotalStrength)
-        self.minMarbleStrengthCohesion = self.marbleStrengthCohesion(self.minStrengthsDict,self.minTotalStrength)
-
-    def featuresVector(self): 
+        self.maxTotalStrength = maxClusters.total_strength
+        self.minTotalStrength = minClusters.total_strength
+        self.maxMarbleStrengthCohesion = maxClusters.get_strength_cohesion()
+        self.minMarbleStrengthCohesion = minClusters.get_strength_cohesion()
+        # Parcours complet des clusters (getClusters), calculé seulement pour les méthodes qui détaillent chaque bille
+        self._clustersDict = None
+
+    @property
+    def clustersDict(self):
+        if self._clustersDict is None:
+            self._clustersDict = getClusters(self.boardDict)
+        return self._clustersDict
+
+    @property
+    def maxClusters(self):
+        return self.clusters()[0]
+
+    @property
+    def minClusters(self):
+        return self.clusters()[1]
+
+    @property
+    def maxStrengthsDict(self):
+        return self.marbleStrenght()[0]
+
+    @property
+    def minStrengthsDict(self):
+        return self.marbleStrenght()[1]
+
+    def featuresVector(self, lineFeatures=False): 
         # Crée un vecteur de caractéristiques pour l'heuristique
-
-        _, _, maxClustersCount, minClustersCount = self.clusters()
+        # Ordre : clusters, billes, moyenne, cohésion des clusters, force totale, cohésion des forces (max puis min),
+        # FaceOff (total, horizontal, eastDiagonal, westDiagonal), bords, paires de billes, distance au centre, scores
+        # Avec lineFeatures, calcul par lots d'un seul plateau : les colonnes 6 à 15 sont celles de batchFeaturesVector.
+        # Sinon, les colonnes 6 à 15 viennent du parcours getClusters, comme avant le calcul par lots.
+        if lineFeatures:
+            return batchFeaturesVector(encodeNodes([self.node]), encodeScores([self.node])).reshape((1,32))
+
+        maxTotalStrength = self.totalStrenght(self.maxStrengthsDict)
+        minTotalStrength = self.totalStrenght(self.minStrengthsDict)
         X = {
-            "maxClustersCount" : maxClustersCount,
-            "minClustersCount" : minClustersCount,
+            "maxClustersCount" : self.maxClustersCount,
+            "minClustersCount" : self.minClustersCount,
             "maxMarbles" : + self.maxMarbles,
             "minMarbles" : - self.minMarbles,
             "maxMean" : + self.maxMean,
             "minMean" : - self.minMean,
-            "maxCountCohesion" : + self.maxCountCohesion,
-            "minCountCohesion" : - self.minCountCohesion,
-            "maxTotalStrength" : + self.maxTotalStrength,
-            "minTotalStrength" : - self.minTotalStrength,
-            "maxMarbleStrengthCohesion" : + self.maxMarbleStrengthCohesion,
-            "minMarbleStrengthCohesion" : - self.minMarbleStrengthCohesion
+            "maxCountCohesion" : + self.countCohesion(self.node.maxPlayerPieceType, self.maxMarbles),
+            "minCountCohesion" : - self.countCohesion(self.node.minPlayerPieceType, self.minMarbles),
+            "maxTotalStrength" : + maxTotalStrength,
+            "minTotalStrength" : - minTotalStrength,
+            "maxMarbleStrengthCohesion" : + self.marbleStrengthCohesion(self.maxStrengthsDict, maxTotalStrength),
+            "minMarbleStrengthCohesion" : - self.marbleStrengthCohesion(self.minStrengthsDict, minTotalStrength)
         }
         # Ajoute d'autres caractéristiques au vecteur
         X = self.addFacingsToFeatures(X)
         maxTotalEdge , minTotalEdge, maxEdges , minEdges = self.DistanceFromEdge()
         X["maxTotalEdge"] = + maxTotalEdge
         X["minTotalEdge"] = - minTotalEdge
-        
-        
+
         total, average_distance, inverse_average = self.totalDistancePairs(self.maxStrengthsDict)
         X["maxTotalDist"] = - total
         X["maxAverageDist"] = - average_distance
@@ -269,8 +475,6 @@ class HeuristicClass :
         X["maxPlayerDistance"] = - maxPlayerDistance
         X["minPlayerDistance"] = + minPlayerDistance
 
-
-
         X["minPlayerScoreIs6"] = self.node.minPlayerScore == 6
         X["maxPlayerScoreIs6"] = self.node.maxPlayerScore == 6
 
@@ -353,8 +557,9 @@ class HeuristicClass :
         return self.node.maxPlayerDistance, self.node.minPlayerDistance 
     
     def totalMarbles(self):
-        # nombre total de billes
-        return 14 - self.node.minPlayerScore, 14 - self.node.maxPlayerScore
+        # nombre total de billes, tenu à jour par l'état du jeu
+        terms = self.node.gameState.get_terms()
+        return terms[self.node.maxPlayerID][0], terms[self.node.minPlayerID][0]
     
     def marbleStrenght(self):
         # Force de la bille : évalue la force d'une bille en fonction du nombre de groupes auxquels elle appartient. Une bille qui fait partie de plusieurs groupes est plus forte.
@@ -376,22 +581,22 @@ class HeuristicClass :
     
     def DistanceFromEdge(self) :
         """
-        Calcule la distance min aux bords des pieces de l'opposant
+        Calcule la distance min aux bords des pieces de chaque joueur (nombre de cases entre la bille et l'extérieur
+        du plateau, lu dans la table de geometry_abalone)
         Args: node (NodeState)
-        retourne: score de distance aux bords du jeu pour les opposants
+        retourne: score de distance aux bords du jeu pour chaque joueur
         """
-        board = self.node.gameState.get_rep()
         minEdges = dict()
         minTotalEdge = 0
         for piece in self.minStrengthsDict:
-            edgeDistance = min(piece[0], board.dimensions[0] - 1 - piece[0], piece[1], board.dimensions[1] - 1 - piece[1])
+            edgeDistance = CELL_EDGE_DISTANCE[CELL_INDEX[piece]]
             minEdges[piece] = edgeDistance
             minTotalEdge += edgeDistance
 
         maxEdges = dict()
         maxTotalEdge = 0
-        for piece in self.minStrengthsDict:
-            edgeDistance = min(piece[0], board.dimensions[0] - 1 - piece[0], piece[1], board.dimensions[1] - 1 - piece[1])
+        for piece in self.maxStrengthsDict:
+            edgeDistance = CELL_EDGE_DISTANCE[CELL_INDEX[piece]]
             maxEdges[piece] = edgeDistance
             maxTotalEdge += edgeDistance
 
@@ -399,12 +604,10 @@ class HeuristicClass :
 
 
     def totalDistancePairs(self, strengthsDict):
-        total = 0
-        positions = list(strengthsDict.keys())
-        totalMarbles = len(positions)
-        for i, pos1 in enumerate(positions):
-            for pos2 in positions[i+1:]:  # Commencez à partir de la position suivante pour éviter les paires en double
-                total += manhattanDistance(pos1, pos2)
+        # Distances hexagonales entre toutes les paires de billes, lues dans la matrice HEX_DISTANCE
+        cells = [CELL_INDEX[pos] for pos in strengthsDict]
+        totalMarbles = len(cells)
+        total = int(HEX_DISTANCE[np.ix_(cells, cells)].sum()) // 2 # Chaque paire est comptée deux fois
         numberOfPairs = totalMarbles * (totalMarbles - 1) / 2
         # Pour éviter une division par zéro s'il y a une ou aucune bille
         average_distance = total / numberOfPairs if numberOfPairs else 0  
@@ -0,0 +1,325 @@
+from NodeState import NodeState
+from bitboard_abalone import (MOVE_DIRECTION_SHIFT, MOVE_EJECT, MOVE_LENGTH_SHIFT, MOVE_SQUARE_MASK, MOVE_PUSHED_SHIFT, RAYS, apply_move,
+                              centre_distance, complete_move, generate_captures, generate_moves, iter_bits)
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import random
+import math
+import json
+import time
+
+class MCTSNode:
+    """Noeud de l'arbre de recherche Monte Carlo.
+    Les positions ne sont pas stockées : elles sont recalculées en jouant les coups depuis la racine.
+    """
+    __slots__ = ("move", "parent", "children", "untried", "visits", "wins", "side")
+
+    def __init__(self, move, parent, side):
+        """
+        Args:
+            move: Coup compact menant au noeud (None pour la racine).
+            parent (MCTSNode): Noeud parent.
+            side (int): Indice du joueur qui a joué le coup menant au noeud.
+        """
+        self.move = move
+        self.parent = parent
+        self.children = {} # coup -> MCTSNode
+        self.untried = None # Coups pas encore développés, générés à la première visite
+        self.visits = 0
+        self.wins = 0.0 # Victoires du joueur side (0.5 par égalité)
+        self.side = side
+
+
+def isSuicide(move) -> bool:
+    """Indique si le coup sort une bille du joueur (sortie sans bille adverse poussée)."""
+    return bool(move & MOVE_EJECT) and not move >> MOVE_PUSHED_SHIFT & 3
+
+
+def playMove(position, move):
+    """Joue un coup sur une position (bitboards, billes perdues, étape, indice du joueur au trait).
+
+    Returns:
+        Tuple: la nouvelle position
+    """
+    bits, lost, step, side = position
+    own, opp = apply_move(bits[side], bits[1 - side], move)
+    bits = (own, opp) if side == 0 else (opp, own)
+    if move & MOVE_EJECT:
+        loser = 1 - side if move >> MOVE_PUSHED_SHIFT & 3 else side
+        lost = (lost[0] + 1, lost[1]) if loser == 0 else (lost[0], lost[1] + 1)
+    return bits, lost, step + 1, 1 - side
+
+
+def legalMoves(position):
+    """Coups du joueur au trait, sans les coups qui sortent une de ses billes s'il en a d'autres."""
+    bits, _, _, side = position
+    moves = list(generate_moves(bits[side], bits[1 - side]))
+    safeMoves = [move for move in moves if not isSuicide(move)]
+    return safeMoves if safeMoves else moves
+
+
+def sampleMove(own, opp, rng, captureBias, squares, tries=64):
+    """Tire un coup au hasard sans générer tous les coups.
+    Un coup est déterminé par sa bille de queue et sa direction : on tire une bille du joueur et une direction
+    jusqu'à obtenir un coup légal (qui ne sort pas une bille du joueur), ce qui donne un tirage uniforme.
+    Avec la probabilité captureBias, une capture est jouée si elle existe.
+
+    Args:
+        own (int): bitboard du joueur au trait
+        opp (int): bitboard de l'adversaire
+        rng (random.Random): générateur aléatoire
+        captureBias (float): probabilité de chercher d'abord une capture
+        squares (list): cases des billes du joueur au trait (les bits de own)
+        tries (int): nombre de tirages avant de générer tous les coups
+
+    Returns:
+        int: coup compact
+    """
+    if captureBias and rng.random() < captureBias:
+        captures = list(generate_captures(own, opp))
+        if captures:
+            return rng.choice(captures)
+    random, nbMoves = rng.random, 6 * len(squares)
+    for _ in range(tries):
+        index, d = divmod(int(random() * nbMoves), 6)
+        move = complete_move(squares[index] | d << MOVE_DIRECTION_SHIFT, own, opp)
+        if move is not None and not isSuicide(move):
+            return move
+    moves = list(generate_moves(own, opp))
+    safeMoves = [move for move in moves if not isSuicide(move)]
+    return rng.choice(safeMoves if safeMoves else moves)
+
+
+def moveSquare(squares, ray, first, end):
+    """Met à jour les cases des billes d'un joueur après le déplacement de sa ligne ray[first:end] d'une case
+    le long de ray : la case ray[first] est remplacée par ray[end], ou retirée si la ligne sort du plateau."""
+    index = squares.index(ray[first])
+    if end < len(ray):
+        squares[index] = ray[end]
+    else:
+        squares[index] = squares[-1]
+        squares.pop()
+
+
+def winner(position):
+    """Gagnant d'une position terminale avec le départage de MasterAbalone.compute_winner :
+    le moins de billes perdues, puis la plus petite distance au centre.
+
+    Returns:
+        int: indice du gagnant, None en cas d'égalité
+    """
+    bits, lost, _, _ = position
+    if lost[0] != lost[1]:
+        return 0 if lost[0] < lost[1] else 1
+    dist0, dist1 = centre_distance(bits[0]), centre_distance(bits[1])
+    if dist0 != dist1:
+        return 0 if dist0 < dist1 else 1
+    return None
+
+
+class MonteCarloTreeSearch:
+    def __init__(self, playerID, timeLimit=1.0, maxPlayouts=None, exploration=math.sqrt(2), captureBias=0.5, workers=1, seed=None):
+        """Initialisation de la recherche Monte Carlo (UCT).
+
+        Args:
+            playerID (int): Identifiant du joueur.
+            timeLimit (float, optional): Temps alloué à une recherche (s).
+            maxPlayouts (int, optional): Nombre maximal de simulations par recherche.
+            exploration (float, optional): Constante d'exploration de UCT.
+            captureBias (float, optional): Probabilité de jouer une capture disponible pendant une simulation.
+            workers (int, optional): Nombre de processus (parallélisation à la racine : un arbre par processus).
+            seed (int, optional): Graine du générateur aléatoire.
+
+        """
+        self.playerID = playerID
+        self.timeLimit = timeLimit
+        self.maxPlayouts = maxPlayouts
+        self.exploration = exploration
+        self.captureBias = captureBias
+        self.workers = workers
+        self.rng = random.Random(seed)
+        self.pool = None # Processus des simulations parallèles, créés à la première recherche
+        self.root = None # Racine de l'arbre, gardée pour la recherche suivante
+        self.rootPosition = None
+        self.bestMove = None # Coup choisi par la dernière recherche
+
+        self.playouts=0 #nombre de simulations
+        self.reused=0 #nombre de simulations de l'arbre réutilisé
+
+    def search(self, node: NodeState):
+        """Recherche du meilleur coup à jouer dans la limite de temps timeLimit.
+
+        Args:
+            node (NodeState): État actuel du plateau.
+
+        Returns:
+            Tuple: taux de victoire du meilleur coup, meilleur coup
+
+        """
+        start = time.time()
+        position, maxStep, maxLost = self.toPosition(node)
+        root = self.reuseTree(position)
+        deadline = start + self.timeLimit
+
+        futures = []
+        if self.workers > 1:
+            pool = self.getPool()
+            futures = [pool.submit(_searchTree, position, maxStep, maxLost, deadline, self.maxPlayouts, self.exploration,
+                                   self.captureBias, self.rng.getrandbits(64)) for _ in range(1, self.workers)]
+        self.playouts += self.runPlayouts(root, position, maxStep, maxLost, deadline, self.maxPlayouts)
+
+        # Parallélisation à la racine : les visites des fils de la racine de chaque arbre sont additionnées
+        stats = {move: [child.visits, child.wins] for move, child in root.children.items()}
+        for future in futures:
+            visits, results = future.result()
+            self.playouts += visits
+            for move, (childVisits, childWins) in results.items():
+                total = stats.setdefault(move, [0, 0.0])
+                total[0] += childVisits
+                total[1] += childWins
+
+        self.root, self.rootPosition = root, position
+        self.printStatistics(time.time() - start)
+        if not stats:
+            return 0, None
+        move, (visits, wins) = max(stats.items(), key=lambda item: item[1][0])
+        self.bestMove = move
+        return wins / visits, node.gameState.move_to_action(move)
+
+    @staticmethod
+    def toPosition(node: NodeState):
+        """Position de la recherche (bitboards et billes perdues dans l'ordre de gameState.players,
+        étape, indice du joueur au trait) et conditions de fin de partie.
+
+        Returns:
+            Tuple: position, nombre maximal d'étapes, nombre de billes perdues qui termine la partie
+        """
+        state = node.gameState
+        ids = [player.get_id() for player in state.players]
+        bits = state.get_bitboard().bits
+        position = (
+            (bits[ids[0]], bits[ids[1]]),
+            (-state.scores[ids[0]], -state.scores[ids[1]]),
+            state.get_step(),
+            ids.index(state.next_player.get_id()),
+        )
+        return position, state.max_step, -state.max_score
+
+    def reuseTree(self, position):
+        """Retourne le noeud de l'arbre précédent correspondant à la position (notre coup puis la réponse
+        de l'adversaire), ou une nouvelle racine.
+        """
+        if self.root is not None:
+            if position == self.rootPosition:
+                return self.root
+            for child in self.root.children.values():
+                childPosition = playMove(self.rootPosition, child.move)
+                for grandChild in child.children.values():
+                    if playMove(childPosition, grandChild.move) == position:
+                        grandChild.parent = None
+                        grandChild.move = None
+                        self.reused = grandChild.visits
+                        return grandChild
+        self.reused = 0
+        return MCTSNode(None, None, 1 - position[3])
+
+    def runPlayouts(self, root: MCTSNode, position, maxStep, maxLost, deadline, maxPlayouts=None):
+        """Boucle sélection / expansion / simulation / rétropropagation jusqu'à la limite de temps.
+
+        Returns:
+            int: nombre de simulations
+        """
+        rng, exploration, captureBias = self.rng, self.exploration, self.captureBias
+        count = 0
+        while time.time() < deadline and (maxPlayouts is None or count < maxPlayouts):
+            node, current = root, position
+            # Sélection
+            while node.untried is not None and not node.untried and node.children:
+                logVisits = math.log(node.visits)
+                node = max(node.children.values(),
+                           key=lambda child: child.wins / child.visits + exploration * math.sqrt(logVisits / child.visits))
+                current = playMove(current, node.move)
+            # Expansion
+            if current[2] < maxStep and max(current[1]) < maxLost:
+                if node.untried is None:
+                    node.untried = legalMoves(current)
+                    rng.shuffle(node.untried)
+                if node.untried:
+                    move = node.untried.pop()
+                    current = playMove(current, move)
+                    child = MCTSNode(move, node, 1 - current[3])
+                    node.children[move] = child
+                    node = child
+            # Simulation puis rétropropagation
+            result = self.playout(current, maxStep, maxLost, rng, captureBias)
+            while node is not None:
+                node.visits += 1
+                if result is None:
+                    node.wins += 0.5
+                elif result == node.side:
+                    node.wins += 1
+                node = node.parent
+            count += 1
+        return count
+
+    @staticmethod
+    def playout(position, maxStep, maxLost, rng, captureBias):
+        """Simulation rapide jusqu'à la fin de la partie (coups tirés par sampleMove).
+
+        Returns:
+            int: indice du gagnant, None en cas d'égalité
+        """
+        bits, lost, step, side = position
+        bits, lost = list(bits), list(lost)
+        squares = [list(iter_bits(bits[0])), list(iter_bits(bits[1]))] # Cases des billes de chaque joueur, pour sampleMove
+        while step < maxStep and lost[0] < maxLost and lost[1] < maxLost:
+            move = sampleMove(bits[side], bits[1 - side], rng, captureBias, squares[side])
+            bits[side], bits[1 - side] = apply_move(bits[side], bits[1 - side], move)
+            # Chaque ligne déplacée quitte sa première case et occupe la case après sa dernière bille, si elle existe
+            ray = RAYS[move & MOVE_SQUARE_MASK][move >> MOVE_DIRECTION_SHIFT & 7]
+            length, pushed = move >> MOVE_LENGTH_SHIFT & 3, move >> MOVE_PUSHED_SHIFT & 3
+            moveSquare(squares[side], ray, 0, length)
+            if pushed:
+                moveSquare(squares[1 - side], ray, length, length + pushed)
+            if move & MOVE_EJECT:
+                lost[1 - side if pushed else side] += 1
+            step += 1
+            side = 1 - side
+        return winner((bits, lost, step, side))
+
+    def getPool(self):
+        """Crée au besoin et retourne le pool de processus des simulations parallèles."""
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers - 1, mp_context=multiprocessing.get_context("spawn"))
+        return self.pool
+
+    def close(self):
+        """Arrête les processus des simulations parallèles."""
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    def printStatistics(self, elapsed):
+        """Affiche les statistiques de la recherche et les remet à zéro."""
+        print("Monte Carlo Tree Search:")
+        print(f"    Playouts: {self.playouts} ({self.playouts / max(elapsed, 1e-9):.0f}/s, {self.workers} workers)")
+        print(f"    Reused Playouts: {self.reused}")
+        self.playouts=0
+        self.reused=0
+
+    @classmethod
+    def to_json(cls) :
+        """Conversion de l'objet en JSON. Non implémenté pour le moment."""
+        return json.dumps(None)
+
+
+def _searchTree(position, maxStep, maxLost, deadline, maxPlayouts, exploration, captureBias, seed):
+    """Tâche d'un processus de la recherche parallèle : construit un arbre indépendant depuis la position.
+
+    Returns:
+        Tuple: nombre de simulations, {coup: (visites, victoires)} des fils de la racine
+    """
+    search = MonteCarloTreeSearch(playerID=None, exploration=exploration, captureBias=captureBias, seed=seed)
+    root = MCTSNode(None, None, 1 - position[3])
+    count = search.runPlayouts(root, position, maxStep, maxLost, deadline, maxPlayouts)
+    return count, {move: (child.visits, child.wins) for move, child in root.children.items()}
@@ -2,55 +2,115 @@ from game_state_abalone import GameStateAbalone
 from seahorse.game.game_state import GameState
 from seahorse.game.action import Action
 from copy import copy
+from bitboard_abalone import pair_distance
 def manhattanDist(A, B):
     dist = abs(B[0] - A[0]) + abs(B[1] - A[1])
     return dist
 
+class NodeContext:
+    """
+    Constantes de la partie partagées par tous les noeuds d'une même recherche : identifiants,
+    noms et types de pièce des joueurs MAX et MIN. Elles sont calculées une seule fois à la racine.
+    """
+    __slots__ = ("maxPlayerID", "maxPlayerName", "maxPlayerPieceType", "minPlayerID", "minPlayerName", "minPlayerPieceType")
+
+    def __init__(self, game: GameState, maxPlayerID: int, maxPlayerName: str, maxPlayerPieceType: str):
+        """
+        Args:
+            game (GameState): Un état de la partie (pour trouver le joueur MIN).
+            maxPlayerID (int): L'ID du joueur MAX.
+            maxPlayerName (str): Le nom du joueur MAX.
+            maxPlayerPieceType (str): Le type de pièce du joueur MAX (noir ou blanc).
+        """
+        self.maxPlayerID = maxPlayerID
+        self.maxPlayerName = maxPlayerName
+        self.maxPlayerPieceType = maxPlayerPieceType
+        self.minPlayerPieceType = "W" if maxPlayerPieceType == "B" else "B"
+        self.minPlayerID = None
+        for player_id in game.scores.keys():
+            if player_id != maxPlayerID:
+                self.minPlayerID = player_id
+                break
+        self.minPlayerName = None
+        for player in game.players:
+            if player.name != maxPlayerName:
+                self.minPlayerName = player.name
+                break
+
+
 # Classe pour représenter l'état d'un nœud dans l'arbre de recherche
 class NodeState:
     """
     Classe NodeState pour représenter l'état d'un nœud dans l'arbre de recherche.
+    Les scores et les termes de l'évaluation (distances au centre, cohésion) sont lus dans l'état du jeu,
+    qui les met à jour à chaque coup (voir GameStateAbalone.get_terms), et les informations sur les joueurs
+    sont partagées entre les noeuds (NodeContext).
     """
-    def __init__(self, game: GameState, maxPlayerID: int, maxPlayerName: str, maxPlayerPieceType: str):
+    __slots__ = ("parent", "action_from_parent", "gameState", "context")
+
+    def __init__(self, game: GameState, maxPlayerID: int = None, maxPlayerName: str = None, maxPlayerPieceType: str = None,
+                 context: NodeContext = None):
         """
         Initialise un nouvel objet NodeState.
         
         Args:
             game (GameState): L'état actuel du jeu.
-            currentPlayerID (int): L'ID du joueur courant.
-            currentPlayerName (str): Le nom du joueur courant.
-            currentPlayerPieceType (str): Le type de pièce du joueur courant (noir ou blanc).
+            maxPlayerID (int): L'ID du joueur MAX.
+            maxPlayerName (str): Le nom du joueur MAX.
+            maxPlayerPieceType (str): Le type de pièce du joueur MAX (noir ou blanc).
+            context (NodeContext, optional): Informations sur les joueurs déjà calculées (celles du noeud parent).
+                Remplace les trois arguments précédents.
         """
         # Informations sur le noeud parent et l'action pour arriver au noeud actuel
         self.parent = None
         self.action_from_parent = None
-        # Type de pièce pour chaque joueur : noir et blanc
-        self.maxPlayerPieceType = maxPlayerPieceType
-        self.minPlayerPieceType = self.getMinPlayerPieceType()
         self.gameState = game
-        
-        # Définition des joueurs
-        self.maxPlayerID = maxPlayerID
-        self.maxPlayerName = maxPlayerName
-        self.minPlayerID = self.getMinPlayerID()
-        self.minPlayerName = self.getMinPlayerName()
+        if context is None:
+            context = NodeContext(game, maxPlayerID, maxPlayerName, maxPlayerPieceType)
+        self.context = context
+
+    @property
+    def maxPlayerID(self) -> int:
+        return self.context.maxPlayerID
+
+    @property
+    def maxPlayerName(self) -> str:
+        return self.context.maxPlayerName
+
+    @property
+    def maxPlayerPieceType(self) -> str:
+        return self.context.maxPlayerPieceType
+
+    @property
+    def minPlayerID(self) -> int:
+        return self.context.minPlayerID
+
+    @property
+    def minPlayerName(self) -> str:
+        return self.context.minPlayerName
+
+    @property
+    def minPlayerPieceType(self) -> str:
+        return self.context.minPlayerPieceType
+
+    @property
+    def minPlayerScore(self) -> int:
         # Informations sur le joueur MIN
-        self.minPlayerScore = self.gameState.scores[self.maxPlayerID] * -1
-        # Informations sur le joueur MAX    
-        self.maxPlayerScore = self.gameState.scores[self.minPlayerID] * -1 # Si l'agent MAX pousse une bille ennemie, le score augmente de 1
-        # Distances de Manhattan
-        self.maxPlayerDistance, self.minPlayerDistance = self.distanceFromCenter()
+        return self.gameState.scores[self.context.maxPlayerID] * -1
 
-    def getMinPlayerPieceType(self) -> str:
-        """
-        Détermine le type de pièce du joueur suivant en fonction du type de pièce du joueur courant.
-        
-        Returns:
-            str: Le type de pièce du joueur suivant ("B" pour noir, "W" pour blanc).
-        """
-        if self.maxPlayerPieceType == "B":
-            return "W"
-        return "B"
+    @property
+    def maxPlayerScore(self) -> int:
+        # Si l'agent MAX pousse une bille ennemie, le score augmente de 1
+        return self.gameState.scores[self.context.minPlayerID] * -1
+
+    @property
+    def maxPlayerDistance(self) -> int:
+        # Distance de Manhattan, tenue à jour par l'état du jeu
+        return self.gameState.get_terms()[self.context.maxPlayerID][1]
+
+    @property
+    def minPlayerDistance(self) -> int:
+        return self.gameState.get_terms()[self.context.minPlayerID][1]
 
     def isTerminal(self) -> bool:
         """
@@ -70,6 +130,63 @@ class NodeState:
         """
         return list(self.gameState.generate_possible_actions())
 
+    def getMoves(self) -> list:
+        """
+        Génère la liste des coups possibles sans construire les états suivants.
+        
+        Returns:
+            list: Liste des coups compacts (voir GameStateAbalone.legal_moves).
+        """
+        return self.gameState.legal_moves()
+
+    def getCaptureMoves(self) -> list:
+        """
+        Génère uniquement les coups qui sortent une bille adverse du plateau.
+        
+        Returns:
+            list: Liste des coups compacts (voir GameStateAbalone.capture_moves).
+        """
+        return self.gameState.capture_moves()
+
+    def makeMove(self, move) -> tuple:
+        """
+        Joue un coup directement sur l'état du noeud (obtenu par GameStateAbalone.search_copy).
+        
+        Args:
+            move: Le coup à jouer.
+        
+        Returns:
+            tuple: Jeton permettant d'annuler le coup avec unmakeMove.
+        """
+        return self.gameState.make_move(move)
+
+    def unmakeMove(self, token: tuple):
+        """
+        Annule un coup joué avec makeMove et restaure exactement l'état précédent.
+        
+        Args:
+            token (tuple): Jeton retourné par makeMove.
+        """
+        self.gameState.unmake_move(token)
+
+    def makeNullMove(self) -> tuple:
+        """
+        Passe le tour du joueur courant (coup nul). Les scores et les distances ne changent pas.
+        
+        Returns:
+            tuple: Jeton permettant d'annuler le coup nul avec unmakeNullMove.
+        """
+        return self.gameState.make_null_move()
+
+    def unmakeNullMove(self, token: tuple):
+        """
+        Annule un coup nul joué avec makeNullMove.
+        
+        Args:
+            token (tuple): Jeton retourné par makeNullMove.
+        """
+        self.gameState.unmake_null_move(token)
+
     def applyAction(self, action : Action):
         """
         Applique une action à l'état actuel du jeu pour obtenir un nouvel état.
@@ -81,7 +198,7 @@ class NodeState:
             NodeState: Le nouvel état du jeu après l'application de l'action.
         """
         nextGameState = action.get_next_game_state()
-        child_node = NodeState(nextGameState, self.maxPlayerID, self.maxPlayerName, self.maxPlayerPieceType)
+        child_node = NodeState(nextGameState, context=self.context)
         return child_node
 
 
@@ -109,30 +226,6 @@ class NodeState:
                     children.append((action, child))
         return children
 
-    def getMinPlayerID(self) -> int:
-        """
-        Trouve l'ID du joueur suivant.
-        
-        Returns:
-            int: L'ID du joueur suivant.
-        """
-        for player_id in self.gameState.scores.keys():
-            if player_id != self.maxPlayerID:
-                return player_id
-        return None
-
-    def getMinPlayerName(self) -> str:
-        """
-        Trouve le nom du joueur suivant.
-        
-        Returns:
-            str: Le nom du joueur suivant.
-        """
-        for player in self.gameState.players:
-            if player.name != self.maxPlayerName:
-                return player.name
-        return None
-
     def get_player_scores(self) -> dict:
         """
         Obtient les scores des joueurs.
@@ -144,7 +237,8 @@ class NodeState:
 
     def distanceFromCenter(self) -> tuple:
         """
-        Calcule la distance de Manhattan depuis le centre pour chaque joueur.
+        Calcule la distance de Manhattan depuis le centre pour chaque joueur à partir du plateau complet
+        (maxPlayerDistance et minPlayerDistance donnent le même résultat sans parcourir le plateau).
         
         Returns:
             tuple: Distance de Manhattan pour le joueur courant et le joueur suivant.
@@ -176,50 +270,42 @@ class NodeState:
         
         return None
     
-    def isCapturingMove(self,action, playerType = "max") -> bool:
+    def isCapturingMove(self,move, playerType = "max") -> bool:
         
-        nextNode = self.applyAction(action)
         if playerType == "max" :
-            score_diff = nextNode.minPlayerScore - self.minPlayerScore
+            currentScore = self.minPlayerScore
+            token = self.makeMove(move)
+            score_diff = self.minPlayerScore - currentScore
+            self.unmakeMove(token)
             return score_diff > 0
         
         elif playerType == "min" : 
-            score_diff = nextNode.maxPlayerScore - self.maxPlayerScore
+            currentScore = self.maxPlayerScore
+            token = self.makeMove(move)
+            score_diff = self.maxPlayerScore - currentScore
+            self.unmakeMove(token)
             return score_diff > 0
         
-    def isQuiescent(self, actions, playerType="max") -> bool:
+    def isQuiescent(self) -> bool:
         if self.isTerminal():
             return True
 
-        # Si les mouvements ultérieurs conduisent à une capture possible par un ennemi, l'état n'est pas quiescent
-        captureMove = any(self.isCapturingMove(action, playerType) for action in actions)
-        return captureMove == False
+        # Si le joueur à jouer peut sortir une bille adverse, l'état n'est pas quiescent
+        return len(self.getCaptureMoves()) == 0
     
     def calculateCohesion(self, playerType = "max") -> float:
-        """Somme des distances de manhattan entre chaque pair de billes"""
-        board = self.gameState.get_rep()
-        player_marbles = []  # Liste des coord. des marbres
-
-        for i in range(board.dimensions[0]):
-            for j in range(board.dimensions[1]):
-                
-                if playerType == "max" :
-                    if board.env.get((i, j)) and board.env[(i, j)].get_owner_id() == self.maxPlayerPieceType:
-                        player_marbles.append((i, j))
-
-                elif playerType == "min" : 
-                    if board.env.get((i, j)) and board.env[(i, j)].get_owner_id() == self.minPlayerPieceType:
-                        player_marbles.append((i, j))
-
-        if len(player_marbles) == 0:
-            return 0.0  # Pas de marbre pour pour le calcul cohesion
-
-        total_distance = 0
-        for marble1 in player_marbles:
-            for marble2 in player_marbles:
-                total_distance += manhattanDist(marble1, marble2)
+        """
+        Cohésion des billes d'un joueur : 1 / (1 + distance hexagonale moyenne entre deux billes), en cases.
+        La somme des distances sur les paires est calculée par un seul produit avec la matrice HEX_DISTANCE.
+        N'est pas utilisée par l'évaluation (AlphaBetaZobrist.evaluate), qui n'a pas de terme de cohésion.
+        """
+        playerID = self.maxPlayerID if playerType == "max" else self.minPlayerID
+        n = self.gameState.get_terms()[playerID][0]
+        if n < 2:
+            return 0.0  # Pas de paire de billes pour le calcul de la cohesion
 
-        average_distance = total_distance / (len(player_marbles) * (len(player_marbles) - 1))
+        total_distance = pair_distance(self.gameState.get_bitboard().bits[playerID])
+        average_distance = total_distance / (n * (n - 1) / 2)
 
         return 1.0 / (1.0 + average_distance)
 
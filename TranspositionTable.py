@@ -1,148 +1,512 @@
 from NodeState import NodeState
 from seahorse.game.action import Action
-import random, json
+from bitboard_abalone import CELL_INDEX, INVERSE_SYMMETRY, transform_move
+from zobrist_abalone import NB_PIECE_TYPES, PIECE_INDEX, SIDE_KEY, ZOBRIST_KEYS, canonical_form
+from collections import OrderedDict
+from multiprocessing import shared_memory
+import numpy as np
+import mmap
+import os
+import struct
+import json
+try:
+    import fcntl
+except ImportError: # Windows : pas de verrou sur le fichier d'une table enregistrée
+    fcntl = None
 
 def indexOf(pieceType):
     """
     Associe chaque type de pièce à un nombre.
     'W' pour les pièces blanches, 'B' pour les pièces noires, et 0 pour les cases vides.
     """
-    if pieceType == 'W':
-        return 1
-    elif pieceType == 'B':
-        return 2
-    elif pieceType == "V":
-        return 0
-
-def randomInt():
-    """
-    Génère un nombre aléatoire de 0 à 3^(dimsRows*dimsCols).
-    Utilisé pour initialiser la table de hachage Zobrist.
-    """
-    dimsRows = 17
-    dimsCols = 9
-    nbPieceTypes = 3  # Noir, blanc ou vide
-    min = 0
-    max = pow(nbPieceTypes, dimsRows * dimsCols)
-    return random.randint(min, max)
+    return PIECE_INDEX[pieceType]
 
-class ZobristTable:
-    def __init__(self):
+# Types de bornes des entrées de la table de transposition
+EXACT = 0
+LOWERBOUND = 1
+UPPERBOUND = 2
+
+class TranspositionTable:
+    def __init__(self, size=2**18):
         """
-        Constructeur de la classe ZobristTable.
-        Initialise la table de hachage.
+        Table de transposition de taille fixe.
+        Chaque index contient deux entrées : une entrée remplacée seulement par une recherche
+        au moins aussi profonde (depth-preferred) et une entrée toujours remplacée (always-replace).
+        Une entrée est un tuple (hash, profondeur, type de borne, score, meilleur coup, génération).
+        La génération est celle de la recherche qui a écrit l'entrée : une entrée d'une recherche
+        précédente est remplacée en premier, quelle que soit sa profondeur.
         """
-        self.initialTable = self.initTable()
+        self.size = size
+        self.depthPreferred = [None] * size
+        self.alwaysReplace = [None] * size
+        self.generation = 0
         self.hits=0
         self.misses=0
+        self.collisions=0
         self.total_lookups=0
 
-    def initTable(self):
+    def probe(self, zobrist_hash):
         """
-        Initialise la table de hachage Zobrist.
-        Retourne un tableau tridimensionnel.
+        Recherche l'entrée associée à un hachage. Retourne None si la position n'est pas dans la table.
         """
-        nbPieceTypes = 3  # Noir, blanc ou vide
-        dimsRows = 17
-        dimsCols = 9
-        return [[[randomInt() for _ in range(nbPieceTypes)] for _ in range(dimsCols)] for _ in range(dimsRows)]
+        self.total_lookups += 1
+        index = zobrist_hash % self.size
+        collision = False
+        for entry in (self.depthPreferred[index], self.alwaysReplace[index]):
+            if entry is not None:
+                if entry[0] == zobrist_hash:
+                    self.hits += 1
+                    return entry
+                collision = True
+        if collision:
+            self.collisions += 1
+        self.misses += 1
+        return None
 
-    def boardHash(self, node: NodeState):
+    def store(self, zobrist_hash, depth, flag, score, move):
         """
-        Calcule le hachage Zobrist du plateau de jeu.
-        """
-        hashRep = 0
-        dimsRows = 17
-        dimsCols = 9
-        final_rep = node.gameState.get_rep()
-        env = final_rep.get_env()
-        populatedSquares = list(env.keys())
-        # Gestion des cases occupées
-        for i, j in list(env.keys()):
-            p = env.get((i, j), None)
-            pieceType = p.get_type()
-            pieceIndex = indexOf(pieceType)
-            hashRep ^= self.initialTable[i][j][pieceIndex]
-        # Gestion des cases vides
-        for row in range(dimsRows):
-            for col in range(dimsCols) :
-                if (row,col) not in populatedSquares : 
-                    pieceType = "V"
-                    pieceIndex = indexOf(pieceType)
-                    hashRep ^= self.initialTable[row][col][pieceIndex]                    
-        return hashRep
-
-    def updateBoard(self, tableHash, oldNode: NodeState, newNode: NodeState):
-        """
-        Met à jour le hachage Zobrist en fonction des mouvements effectués.
-        """
-        toErase = self.getDelta(oldNode, newNode)
-        toMove = self.getDelta(newNode, oldNode)
-
-        for loc in toErase:
-            pieceIndex = indexOf(loc[-1])
-            row, col = loc[0]
-            tableHash = self.eraseMoveHash(tableHash, row, col, pieceIndex)
-
-        for loc in toMove:
-            pieceIndex = indexOf(loc[-1])
-            row, col = loc[0]
-            tableHash = self.makeMoveHash(tableHash, row, col, pieceIndex)
+        Enregistre le résultat de la recherche d'une position.
+        L'entrée depth-preferred n'est remplacée que par une recherche au moins aussi profonde
+        ou si elle date d'une recherche précédente, l'ancienne entrée passe alors dans l'entrée always-replace.
+        """
+        index = zobrist_hash % self.size
+        entry = (zobrist_hash, depth, flag, score, move, self.generation)
+        previous = self.depthPreferred[index]
+        if previous is None or previous[0] == zobrist_hash or previous[5] != self.generation or depth >= previous[1]:
+            self.depthPreferred[index] = entry
+            if previous is not None and previous[0] != zobrist_hash:
+                self.alwaysReplace[index] = previous
+        else:
+            self.alwaysReplace[index] = entry
 
-        return tableHash
+    def clear(self):
+        """
+        Vide la table et remet les compteurs à zéro.
+        """
+        self.depthPreferred = [None] * self.size
+        self.alwaysReplace = [None] * self.size
+        self.generation = 0
+        self.hits=0
+        self.misses=0
+        self.collisions=0
+        self.total_lookups=0
+
+    def occupancy(self):
+        """
+        Retourne la proportion des entrées occupées.
+        """
+        used = sum(entry is not None for entry in self.depthPreferred) + sum(entry is not None for entry in self.alwaysReplace)
+        return used / (2 * self.size)
+
+    def newGeneration(self):
+        """
+        Commence une nouvelle recherche : les entrées déjà présentes deviennent remplaçables en premier.
+        """
+        self.generation += 1
+
+
+class EvaluationCache:
+    def __init__(self, size=2**16):
+        """
+        Cache des évaluations statiques, indexé par le hachage Zobrist de la position,
+        distinct de la table de transposition de la recherche.
+        Il garde au plus size évaluations : la moins récemment utilisée est retirée en premier (LRU).
+        """
+        self.size = size
+        self.entries = OrderedDict()
+        self.hits=0
+        self.misses=0
+
+    def get(self, key):
+        """
+        Retourne l'évaluation gardée pour une position, None si elle n'est pas dans le cache.
+        """
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        Garde l'évaluation d'une position, en retirant la moins récemment utilisée si le cache est plein.
+        """
+        self.entries[key] = value
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Vide le cache et remet les compteurs à zéro.
+        """
+        self.entries.clear()
+        self.hits=0
+        self.misses=0
+
+    def calculate_hit_rate(self):
+        """
+        Calcule et retourne le taux de réussite.
+        """
+        lookups = self.hits + self.misses
+        if lookups > 0:
+            return f"Evaluation Cache Hit Rate: {self.hits / lookups:.2%} (Hits: {self.hits}, Misses: {self.misses}, Size: {len(self.entries)})"
+        return "Evaluation Cache Hit Rate: N/A (No lookups performed)"
+
+
+# Champs d'une entrée compactée sur 64 bits : score (float32), profondeur, type de borne, meilleur coup, génération
+ENTRY_DEPTH_SHIFT = 32
+ENTRY_FLAG_SHIFT = 40
+ENTRY_MOVE_SHIFT = 42
+ENTRY_HAS_MOVE = 1 << 58
+ENTRY_GENERATION_SHIFT = 59
+GENERATION_MASK = 0xF # Générations comptées modulo 16
+ENTRY_USED = 1 << 63
+HEADER_WORDS = 8 # Mots de 64 bits réservés en tête du bloc
+STOP_WORD = 0 # Drapeau d'arrêt de la recherche (Lazy SMP)
+GENERATION_WORD = 1 # Génération de la recherche en cours, commune à tous les processus
+FORMAT_WORD = 2 # Format des entrées d'une table enregistrée sur disque
+BUCKET_WORDS = 4 # (clé ^ données, données) pour l'entrée depth-preferred puis l'entrée always-replace
+
+class PackedTranspositionTable:
+    def __init__(self, buffer, sizeMB):
+        """
+        Table de transposition dont les entrées sont compactées dans un tampon de mots de 64 bits.
+        Même schéma de remplacement que TranspositionTable, mais chaque entrée est compactée en deux mots
+        de 64 bits : (hash ^ données, données). Les écritures se font sans verrou : une entrée écrite à moitié
+        par un autre processus ne vérifie plus hash == mot0 ^ mot1 et est ignorée à la lecture.
+        Le tampon est fourni par SharedTranspositionTable (mémoire partagée) ou MappedTranspositionTable (fichier).
+        """
+        self.sizeMB = sizeMB
+        self.words = buffer.cast("Q")
+        self.size = (len(self.words) - HEADER_WORDS) // BUCKET_WORDS
+        self.hits=0
+        self.misses=0
+        self.collisions=0
+        self.total_lookups=0
+
+    @staticmethod
+    def pack(depth, flag, score, move, generation=0):
+        """
+        Compacte les champs d'une entrée en un entier de 64 bits.
+        """
+        data = struct.unpack("<I", struct.pack("<f", score))[0] | depth << ENTRY_DEPTH_SHIFT | flag << ENTRY_FLAG_SHIFT | ENTRY_USED
+        data |= generation << ENTRY_GENERATION_SHIFT
+        if move is not None:
+            data |= move << ENTRY_MOVE_SHIFT | ENTRY_HAS_MOVE
+        return data
+
+    @staticmethod
+    def unpack(zobrist_hash, data):
+        """
+        Retourne l'entrée (hash, profondeur, type de borne, score, meilleur coup, génération) d'un entier compacté.
+        """
+        score = struct.unpack("<f", struct.pack("<I", data & 0xFFFFFFFF))[0]
+        move = (data >> ENTRY_MOVE_SHIFT) & 0xFFFF if data & ENTRY_HAS_MOVE else None
+        return (zobrist_hash, (data >> ENTRY_DEPTH_SHIFT) & 0xFF, (data >> ENTRY_FLAG_SHIFT) & 3, score, move,
+                (data >> ENTRY_GENERATION_SHIFT) & GENERATION_MASK)
+
+    def probe(self, zobrist_hash):
+        """
+        Recherche l'entrée associée à un hachage. Retourne None si la position n'est pas dans la table.
+        """
+        self.total_lookups += 1
+        words = self.words
+        base = HEADER_WORDS + (zobrist_hash % self.size) * BUCKET_WORDS
+        collision = False
+        for k in (base, base + 2):
+            data = words[k + 1]
+            if data:
+                if words[k] ^ data == zobrist_hash:
+                    self.hits += 1
+                    return self.unpack(zobrist_hash, data)
+                collision = True
+        if collision:
+            self.collisions += 1
+        self.misses += 1
+        return None
+
+    def store(self, zobrist_hash, depth, flag, score, move):
+        """
+        Enregistre le résultat de la recherche d'une position (voir TranspositionTable.store).
+        """
+        words = self.words
+        base = HEADER_WORDS + (zobrist_hash % self.size) * BUCKET_WORDS
+        generation = words[GENERATION_WORD]
+        data = self.pack(min(depth, 0xFF), flag, score, move, generation)
+        previousCheck, previousData = words[base], words[base + 1]
+        previousHash = previousCheck ^ previousData
+        if (not previousData or previousHash == zobrist_hash or (previousData >> ENTRY_GENERATION_SHIFT) & GENERATION_MASK != generation
+                or depth >= (previousData >> ENTRY_DEPTH_SHIFT) & 0xFF):
+            words[base] = zobrist_hash ^ data
+            words[base + 1] = data
+            if previousData and previousHash != zobrist_hash:
+                words[base + 2] = previousCheck
+                words[base + 3] = previousData
+        else:
+            words[base + 2] = zobrist_hash ^ data
+            words[base + 3] = data
+
+    def clear(self):
+        """
+        Vide la table et remet les compteurs à zéro.
+        """
+        np.frombuffer(self.words, dtype=np.uint64)[HEADER_WORDS:] = 0
+        self.hits=0
+        self.misses=0
+        self.collisions=0
+        self.total_lookups=0
+
+    def occupancy(self):
+        """
+        Retourne la proportion des entrées occupées.
+        """
+        data = np.frombuffer(self.words, dtype=np.uint64)[HEADER_WORDS + 1::2]
+        return np.count_nonzero(data) / len(data)
+
+    def newGeneration(self):
+        """
+        Commence une nouvelle recherche : les entrées déjà présentes deviennent remplaçables en premier.
+        """
+        self.words[GENERATION_WORD] = (self.words[GENERATION_WORD] + 1) & GENERATION_MASK
+
+
+class SharedTranspositionTable(PackedTranspositionTable):
+    def __init__(self, sizeMB=16, name=None):
+        """
+        Table de transposition stockée dans un bloc multiprocessing.shared_memory, partagée entre processus.
+        Le premier processus crée le bloc (name=None), les autres s'y attachent par son nom.
+        """
+        self.owner = name is None
+        nbytes = sizeMB * 2**20
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=nbytes) # Bloc initialisé à zéro : table vide
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        super().__init__(self.shm.buf[:nbytes], sizeMB)
+
+    def requestStop(self):
+        """
+        Demande aux processus qui cherchent avec cette table de s'arrêter (Lazy SMP).
+        """
+        self.words[STOP_WORD] = 1
+
+    def clearStop(self):
+        """
+        Autorise de nouveau les recherches avec cette table.
+        """
+        self.words[STOP_WORD] = 0
+
+    def stopRequested(self):
+        """
+        Indique si l'arrêt des recherches a été demandé.
+        """
+        return self.words[STOP_WORD] != 0
+
+    def close(self):
+        """
+        Détache le bloc de mémoire partagée. Le processus qui l'a créé le supprime.
+        """
+        self.words.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __del__(self):
+        # La vue sur le bloc doit être libérée avant que SharedMemory ne le détache
+        self.words.release()
+
+
+class MappedTranspositionTable(PackedTranspositionTable):
+    def __init__(self, path, sizeMB=16, tableFormat=0):
+        """
+        Table de transposition enregistrée dans un fichier projeté en mémoire (mmap) : elle est chargée
+        à la création et les entrées écrites pendant la recherche sont enregistrées par le système.
+        Le fichier est créé (table vide) s'il n'existe pas. Une table d'une autre taille ou d'un autre
+        format (tableFormat, voir ZobristTable) est vidée.
+        Le fichier est verrouillé tant que la table est ouverte (fcntl, sauf sous Windows) : un fichier déjà ouvert
+        par un autre processus n'est jamais vidé, BlockingIOError est levée.
+        """
+        self.path = path
+        nbytes = sizeMB * 2**20
+        self.file = os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT), "r+b")
+        if fcntl is not None:
+            try:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                self.file.close()
+                raise BlockingIOError(f"transposition table {path} is already open in another process")
+        if os.fstat(self.file.fileno()).st_size != nbytes:
+            self.file.truncate(0)
+            self.file.truncate(nbytes) # Fichier rempli de zéros : table vide
+        self.map = mmap.mmap(self.file.fileno(), nbytes)
+        super().__init__(memoryview(self.map), sizeMB)
+        if self.words[FORMAT_WORD] != tableFormat:
+            self.clear()
+            self.words[GENERATION_WORD] = 0
+            self.words[FORMAT_WORD] = tableFormat
+
+    def flush(self):
+        """
+        Écrit sur le disque les entrées modifiées.
+        """
+        self.map.flush()
+
+    def close(self):
+        """
+        Enregistre la table et ferme le fichier, ce qui libère son verrou.
+        """
+        self.flush()
+        self.words.release()
+        self.map.close()
+        self.file.close()
+
+
+# Nombre de formes canoniques gardées par génération (ZobristTable symétrique)
+CANONICAL_CACHE_SIZE = 2**18
+# Format des entrées d'une table enregistrée (MappedTranspositionTable), avec ou sans hachage symétrique
+# (2 : profondeur des recherches qui atteignent la fin de la partie, voir AlphaBetaZobrist.tableDepth ;
+# 3 : formes canoniques sur les seules symétries qui gardent l'évaluation)
+MAPPED_FORMAT = 3
+
+class ZobristTable:
+    def __init__(self, size=2**18, sharedMB=None, sharedName=None, symmetric=False, path=None):
+        """
+        Constructeur de la classe ZobristTable.
+        Initialise la table de hachage et la table de transposition associée.
+        Avec sharedMB, la table de transposition est stockée en mémoire partagée (SharedTranspositionTable)
+        de sharedMB Mo, créée par ce processus ou, avec sharedName, celle d'un autre processus.
+        Avec path, elle est stockée dans ce fichier (MappedTranspositionTable, sharedMB Mo ou 16 Mo par défaut)
+        et retrouvée d'une partie à l'autre.
+        Avec symmetric, les positions images l'une de l'autre par une symétrie du plateau qui garde l'évaluation
+        (bitboard_abalone.EVALUATION_SYMMETRIES) partagent la même entrée : la table est indexée par le hachage
+        de la forme canonique de la position
+        (zobrist_abalone.canonical_form) et les coups y sont stockés dans le repère de la forme canonique.
+        """
+        self.initialTable = self.initTable()
+        self.sideKey = SIDE_KEY # Clé du premier joueur au trait
+        self.symmetric = symmetric
+        # Hachage d'une position -> (hachage canonique, symétrie vers la forme canonique), sur deux générations
+        self.canonicalForms = {}
+        self.previousForms = {}
+        if path is not None:
+            self.table = MappedTranspositionTable(path, sharedMB or 16, MAPPED_FORMAT << 1 | symmetric)
+        elif sharedMB is not None:
+            self.table = SharedTranspositionTable(sharedMB, sharedName)
+        else:
+            self.table = TranspositionTable(size)
 
-    def getDelta(self, oldNode: NodeState, newNode: NodeState):
+    def initTable(self):
         """
-        Retourne les index où un changement a eu lieu.
+        Retourne la table de hachage Zobrist : un tableau plat de clés de 64 bits pour les 61 cases jouables,
+        générées à partir d'une graine fixe et partagées par toutes les instances.
+        L'index de la clé d'une pièce est CELL_INDEX[(row, col)] * NB_PIECE_TYPES + indexOf(pieceType).
         """
-        oldRep = oldNode.gameState.get_rep()
-        newRep = newNode.gameState.get_rep()
-        oldEnv = oldRep.get_env()
-        newEnv = newRep.get_env()
+        return ZOBRIST_KEYS
 
-        # Les cases vides doivent être celles qui ne sont pas des clés dans le dictionnaire newEnv
-        voidSquares =  list(  set([(i,j) for i,j in oldEnv.keys()]) - set([(i,j) for i,j in newEnv.keys()])   )
-        deltaVoid = [(loc,"V") for loc in voidSquares]
-        oldIndexes = [((i, j), oldEnv.get((i, j), None).get_type()) for i, j in list(oldEnv.keys())]
-        newIndexes = [((i, j), newEnv.get((i, j), None).get_type()) for i, j in list(newEnv.keys())]
-        deltaPopulated = list(set(newIndexes) - set(oldIndexes)) 
-        return deltaPopulated + deltaVoid
+    def key(self, row: int, col: int, pieceIndex: int):
+        """
+        Retourne la clé Zobrist d'une pièce sur une case.
+        """
+        return self.initialTable[CELL_INDEX[(row, col)] * NB_PIECE_TYPES + pieceIndex]
+
+    def boardHash(self, node: NodeState):
+        """
+        Retourne le hachage Zobrist du plateau de jeu et du joueur au trait.
+        Il est porté par l'état du jeu et mis à jour à chaque coup à partir des seules pièces déplacées.
+        Avec symmetric, la forme canonique de la position est lue dans les hachages de ses images, eux aussi portés
+        par l'état du jeu, et gardée pour lookup et store.
+        """
+        zobrist_hash = node.gameState.get_hash()
+        if self.symmetric:
+            # Calculés ici à la racine de la recherche, les hachages des images sont ensuite mis à jour à chaque coup
+            hashes = node.gameState.get_symmetric_hashes()
+            if self.canonicalForm(zobrist_hash) is None:
+                if len(self.canonicalForms) >= CANONICAL_CACHE_SIZE:
+                    self.previousForms, self.canonicalForms = self.canonicalForms, {}
+                self.canonicalForms[zobrist_hash] = canonical_form(hashes)
+        return zobrist_hash
+
+    def canonicalForm(self, zobrist_hash):
+        """
+        Retourne (hachage canonique, symétrie) d'une position dont le hachage a été calculé par boardHash,
+        None si elle n'est plus gardée.
+        """
+        form = self.canonicalForms.get(zobrist_hash)
+        if form is None:
+            form = self.previousForms.get(zobrist_hash)
+        return form
 
     def makeMoveHash(self, tableHash, row: int, col: int, pieceIndex: int):
         """
         Met à jour le hachage pour un mouvement donné.
         """
-        tableHash ^= self.initialTable[row][col][pieceIndex]
+        tableHash ^= self.key(row, col, pieceIndex)
         return tableHash
 
     def eraseMoveHash(self, tableHash, row: int, col: int, pieceIndex: int):
         """
         Annule l'impact du mouvement sur le hachage.
         """
-        tableHash ^= self.initialTable[row][col][pieceIndex]
+        tableHash ^= self.key(row, col, pieceIndex)
         return tableHash
     
     
     def lookup(self, zobrist_hash):
         """
         Recherche une entrée dans la table de transposition et met à jour les comptes de réussite/échec.
+        Avec symmetric, le meilleur coup est ramené dans le repère de la position par la symétrie inverse.
         """
-        self.total_lookups += 1
-        if zobrist_hash in self.table:
-            self.hit_count += 1
-            self.hits += 1
-            return self.table[zobrist_hash]
-        else:
-            self.misses += 1
+        if not self.symmetric:
+            return self.table.probe(zobrist_hash)
+        form = self.canonicalForm(zobrist_hash)
+        if form is None:
             return None
+        canonical, symmetry = form
+        entry = self.table.probe(canonical)
+        if entry is None or entry[4] is None or symmetry == 0:
+            return entry
+        return entry[:4] + (transform_move(entry[4], INVERSE_SYMMETRY[symmetry]),)
+
+    def store(self, zobrist_hash, depth, flag, score, move):
+        """
+        Enregistre une entrée dans la table de transposition.
+        Avec symmetric, l'entrée est celle de la forme canonique, avec le coup dans son repère.
+        """
+        if not self.symmetric:
+            self.table.store(zobrist_hash, depth, flag, score, move)
+            return
+        form = self.canonicalForm(zobrist_hash)
+        if form is None:
+            return
+        canonical, symmetry = form
+        if move is not None and symmetry != 0:
+            move = transform_move(move, symmetry)
+        self.table.store(canonical, depth, flag, score, move)
+
+    def newSearch(self):
+        """
+        Commence une nouvelle recherche : les entrées des recherches précédentes sont gardées
+        mais remplacées en premier.
+        """
+        self.table.newGeneration()
+
+    def flush(self):
+        """
+        Enregistre sur le disque une table créée avec path.
+        """
+        if isinstance(self.table, MappedTranspositionTable):
+            self.table.flush()
 
     def calculate_hit_rate(self):
         """
         Calcule et retourne le taux de réussite.
         """
-        if self.total_lookups > 0:
-            hit_rate = self.hits / self.total_lookups
-            return f"Hit Rate: {hit_rate:.2%} (Hits: {self.hits}, Misses: {self.misses})"
+        if self.table.total_lookups > 0:
+            hit_rate = self.table.hits / self.table.total_lookups
+            return f"Hit Rate: {hit_rate:.2%} (Hits: {self.table.hits}, Misses: {self.table.misses}, Collisions: {self.table.collisions}, Occupancy: {self.table.occupancy():.2%})"
         else:
             return "Hit Rate: N/A (No lookups performed)"
 
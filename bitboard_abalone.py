@@ -0,0 +1,597 @@
+from __future__ import annotations
+from operator import add
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from geometry_abalone import CELL_INDEX, CELL_RAYS, CELLS, CENTRE, COLS, DIRECTIONS, HEX_DISTANCE, ROWS, hex_distance
+from seahorse.game.game_layout.board import Piece
+
+
+OPPOSITE = [3, 2, 1, 0, 5, 4]
+
+
+def square_of(i: int, j: int) -> int:
+    """
+    Return the bit index of the cell (i,j) on the 17x9 doubled-coordinate grid.
+
+    Args:
+        i (int): line indice
+        j (int): column indice
+
+    Returns:
+        int: bit index (i*9 + j)
+    """
+    return i * COLS + j
+
+
+def cell_of(square: int) -> Tuple[int, int]:
+    """
+    Return the (i,j) cell of a bit index.
+
+    Args:
+        square (int): bit index
+
+    Returns:
+        Tuple[int,int]: cell coordinates
+    """
+    return divmod(square, COLS)
+
+
+def _build_tables():
+    valid = 0
+    for i, j in CELLS:
+        valid |= 1 << square_of(i, j)
+
+    shifts = [di * COLS + dj for di, dj in DIRECTIONS]
+
+    # A shift along a direction with a column component must not wrap around a row
+    source_masks = []
+    for di, dj in DIRECTIONS:
+        mask = 0
+        for i in range(ROWS):
+            for j in range(COLS):
+                if 0 <= j + dj < COLS:
+                    mask |= 1 << square_of(i, j)
+        source_masks.append(mask & valid)
+
+    # Same rays as geometry_abalone.CELL_RAYS, by bit index and starting at the square itself
+    rays = [[[] for _ in DIRECTIONS] for _ in range(ROWS * COLS)]
+    for k, cell in enumerate(CELLS):
+        for d in range(len(DIRECTIONS)):
+            rays[square_of(*cell)][d] = [square_of(*cell)] + [square_of(*CELLS[n]) for n in CELL_RAYS[k][d]]
+    return valid, shifts, source_masks, rays
+
+
+VALID, SHIFTS, SOURCE_MASKS, RAYS = _build_tables()
+
+CELL_SQUARES = np.array([square_of(i, j) for i, j in CELLS])
+BITBOARD_BYTES = (ROWS * COLS + 7) // 8
+
+# Distance of each square to the centre of the board, used to break ties at the end of the game
+CENTRE_DISTANCE = [hex_distance(CENTRE, cell_of(sq)) for sq in range(ROWS * COLS)]
+
+
+def centre_distance(bits: int) -> int:
+    """
+    Return the sum of the distances to the centre of the marbles of a bitboard (see MasterAbalone.compute_winner).
+    """
+    return sum(CENTRE_DISTANCE[sq] for sq in iter_bits(bits))
+
+
+def cell_mask(bits: int) -> np.ndarray:
+    """
+    Return the occupancy of the 61 cells (indexed like CELLS) in a bitboard, as a vector of 0 and 1.
+    """
+    squares = np.unpackbits(np.frombuffer(bits.to_bytes(BITBOARD_BYTES, "little"), dtype=np.uint8), bitorder="little")
+    return squares[CELL_SQUARES]
+
+
+def pair_distance(bits: int) -> int:
+    """
+    Return the sum of the hex distances over the pairs of marbles of a bitboard, with one product by HEX_DISTANCE.
+    """
+    mask = cell_mask(bits).astype(np.float64)
+    return int(mask @ HEX_DISTANCE @ mask) // 2
+
+
+# Incremental evaluation terms of a marble on each square: (marble count, Manhattan distance to the centre
+# (see NodeState.distanceFromCenter)). The terms of a player are their sums over its marbles.
+SQUARE_TERMS = [
+    (1, abs(i - CENTRE[0]) + abs(j - CENTRE[1])) if VALID >> square_of(i, j) & 1 else None
+    for i, j in map(cell_of, range(ROWS * COLS))
+]
+NO_TERMS = (0, 0)
+
+
+def _build_step_terms():
+    # Change of the terms of a marble moved one cell from a square along each direction (or pushed off the board)
+    steps = [None] * (ROWS * COLS)
+    for sq, terms in enumerate(SQUARE_TERMS):
+        if terms is None:
+            continue
+        steps[sq] = []
+        for ray in RAYS[sq]:
+            target = SQUARE_TERMS[ray[1]] if len(ray) > 1 else NO_TERMS
+            steps[sq].append(tuple(b - a for a, b in zip(terms, target)))
+    return steps
+
+
+STEP_TERMS = _build_step_terms()
+
+
+def board_terms(bits: int) -> Tuple[int, ...]:
+    """
+    Return the sums of the evaluation terms (see SQUARE_TERMS) over the marbles of a bitboard.
+    """
+    terms = NO_TERMS
+    for sq in iter_bits(bits):
+        terms = tuple(map(add, terms, SQUARE_TERMS[sq]))
+    return terms
+
+
+def move_terms(own_terms: Tuple[int, ...], opp_terms: Tuple[int, ...], move: int) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    """
+    Update the evaluation terms of both players after a move, in O(moved marbles).
+
+    Args:
+        own_terms (Tuple[int]): terms of the player to move
+        opp_terms (Tuple[int]): terms of the opponent
+        move (int): compact move as yielded by generate_moves
+
+    Returns:
+        Tuple[Tuple[int],Tuple[int]]: new (own, opp) terms
+    """
+    sq, d, length, pushed, _ = decode_move(move)
+    ray = RAYS[sq][d]
+    for k in range(length):
+        own_terms = tuple(map(add, own_terms, STEP_TERMS[ray[k]][d]))
+    for k in range(length, length + pushed):
+        opp_terms = tuple(map(add, opp_terms, STEP_TERMS[ray[k]][d]))
+    return own_terms, opp_terms
+
+
+def shift(bits: int, d: int) -> int:
+    """
+    Move every set bit one cell along the direction d, dropping the bits that leave the board.
+
+    Args:
+        bits (int): bitboard
+        d (int): direction index in DIRECTIONS
+
+    Returns:
+        int: shifted bitboard
+    """
+    bits &= SOURCE_MASKS[d]
+    s = SHIFTS[d]
+    if s > 0:
+        return (bits << s) & VALID
+    return (bits >> -s) & VALID
+
+
+def _build_off_masks():
+    # OFF_MASKS[d][k]: cells whose k-th neighbour along d is outside the hexagon
+    off = []
+    for d in range(len(DIRECTIONS)):
+        back = OPPOSITE[d]
+        inside = [VALID]
+        for _ in range(5):
+            inside.append(shift(inside[-1], back))
+        off.append([VALID & ~x for x in inside])
+    return off
+
+
+OFF_MASKS = _build_off_masks()
+# generate_captures: (d, opponent marbles pushed off the board along d, then the source mask, left and right
+# shift amounts of shift(bits, OPPOSITE[d]), so that the shift is written inline)
+CAPTURE_DIRECTIONS = [
+    (d, OFF_MASKS[d][1], SOURCE_MASKS[OPPOSITE[d]], max(SHIFTS[OPPOSITE[d]], 0), max(-SHIFTS[OPPOSITE[d]], 0))
+    for d in range(len(DIRECTIONS))
+]
+
+
+# Compact move: an int packing the tail square, the direction, the line length,
+# the number of pushed opponent marbles and whether a marble leaves the board.
+MOVE_SQUARE_MASK = 0xFF
+MOVE_DIRECTION_SHIFT = 8
+MOVE_LENGTH_SHIFT = 11
+MOVE_PUSHED_SHIFT = 13
+MOVE_EJECT = 1 << 15
+
+
+def encode_move(square: int, d: int, length: int = 0, pushed: int = 0, eject: bool = False) -> int:
+    """
+    Pack a move into an int.
+
+    Args:
+        square (int): bit index of the tail marble
+        d (int): direction index in DIRECTIONS
+        length (int): number of own marbles moved
+        pushed (int): number of opponent marbles pushed
+        eject (bool): whether a marble leaves the board
+
+    Returns:
+        int: the compact move
+    """
+    move = square | d << MOVE_DIRECTION_SHIFT | length << MOVE_LENGTH_SHIFT | pushed << MOVE_PUSHED_SHIFT
+    if eject:
+        move |= MOVE_EJECT
+    return move
+
+
+def decode_move(move: int) -> Tuple[int, int, int, int, bool]:
+    """
+    Unpack a compact move.
+
+    Returns:
+        Tuple[int,int,int,int,bool]: (tail square, direction, line length, pushed marbles, marble ejected)
+    """
+    return (
+        move & MOVE_SQUARE_MASK,
+        (move >> MOVE_DIRECTION_SHIFT) & 7,
+        (move >> MOVE_LENGTH_SHIFT) & 3,
+        (move >> MOVE_PUSHED_SHIFT) & 3,
+        bool(move & MOVE_EJECT),
+    )
+
+
+def _build_light_moves():
+    # (from, to) cells of a light action -> compact move without length nor push information
+    index = {}
+    for i, j in CELLS:
+        for d, (di, dj) in enumerate(DIRECTIONS):
+            index[((i, j), (i + di, j + dj))] = encode_move(square_of(i, j), d)
+    return index
+
+
+LIGHT_MOVES = _build_light_moves()
+
+MOVE_KEY_MASK = MOVE_EJECT - 1 # Square, direction, length and pushed marbles: the eject flag follows from them
+
+
+def _build_move_masks():
+    # MOVE_MASKS[move & MOVE_KEY_MASK]: (own, opp) bits toggled by a legal move. Each moved line leaves its
+    # first cell and fills the cell after its last marble, unless that cell is outside the board.
+    masks = [None] * (MOVE_KEY_MASK + 1)
+    for i, j in CELLS:
+        sq = square_of(i, j)
+        for d in range(len(DIRECTIONS)):
+            ray = RAYS[sq][d]
+            for k in range(1, min(3, len(ray)) + 1):
+                own = 1 << ray[0] | (1 << ray[k] if k < len(ray) else 0)
+                masks[encode_move(sq, d, k)] = (own, 0)
+                for m in range(1, min(k, len(ray) - k + 1)):
+                    opp = 1 << ray[k] | (1 << ray[k + m] if k + m < len(ray) else 0)
+                    masks[encode_move(sq, d, k, m)] = (own, opp)
+    return masks
+
+
+MOVE_MASKS = _build_move_masks()
+# Bits of the cells of each ray, RAY_BITS[square][d][k] == 1 << RAYS[square][d][k]
+RAY_BITS = [[[1 << cell for cell in ray] for ray in rays] for rays in RAYS]
+
+
+def _build_symmetries():
+    # Axial coordinates around the centre: q = j - 4, r = (i - 8 - q) / 2 (i + j is even on every playable cell)
+    def to_axial(di, dj):
+        return dj, (di - dj) // 2
+
+    def from_axial(q, r):
+        return 2 * r + q, q
+
+    def rotate(q, r):
+        # 60 degree rotation: (q, r, s) -> (-r, -s, -q)
+        return -r, q + r
+
+    def mirror(q, r):
+        # Reflection exchanging r and s
+        return q, -q - r
+
+    squares, directions = [], []
+    for reflect in (False, True):
+        for turns in range(6):
+            def transform(di, dj):
+                q, r = to_axial(di, dj)
+                if reflect:
+                    q, r = mirror(q, r)
+                for _ in range(turns):
+                    q, r = rotate(q, r)
+                return from_axial(q, r)
+
+            image = [0] * (ROWS * COLS)
+            for i, j in CELLS:
+                ti, tj = transform(i - CENTRE[0], j - CENTRE[1])
+                image[square_of(i, j)] = square_of(CENTRE[0] + ti, CENTRE[1] + tj)
+            squares.append(image)
+            directions.append([DIRECTIONS.index(transform(di, dj)) for di, dj in DIRECTIONS])
+    playable = [square_of(i, j) for i, j in CELLS]
+    inverses = [next(t for t in range(len(squares)) if all(squares[t][squares[s][sq]] == sq for sq in playable))
+                for s in range(len(squares))]
+    return squares, directions, inverses
+
+
+# The 12 symmetries of the hexagonal board (6 rotations, with or without reflection), symmetry 0 is the identity:
+# SYMMETRY_SQUARES[s][sq] is the image of a playable square, SYMMETRY_DIRECTIONS[s][d] the image of a direction
+# and INVERSE_SYMMETRY[s] the symmetry undoing s.
+SYMMETRY_SQUARES, SYMMETRY_DIRECTIONS, INVERSE_SYMMETRY = _build_symmetries()
+
+# Symmetries keeping the evaluation terms of every square (SQUARE_TERMS). The Manhattan distance to the centre
+# in doubled coordinates is only kept by the identity, the half turn and the two reflections along the axes
+# of the grid: the images of a position by the other symmetries may not have the same evaluation.
+EVALUATION_SYMMETRIES = [
+    s for s, image in enumerate(SYMMETRY_SQUARES)
+    if all(SQUARE_TERMS[image[square_of(i, j)]] == SQUARE_TERMS[square_of(i, j)] for i, j in CELLS)
+]
+
+
+def transform_move(move: int, s: int) -> int:
+    """
+    Return the image of a compact move by a symmetry of the board (same length, pushes and ejection).
+
+    Args:
+        move (int): compact move
+        s (int): symmetry index in SYMMETRY_SQUARES
+
+    Returns:
+        int: the compact move played on the image of the board
+    """
+    square = SYMMETRY_SQUARES[s][move & MOVE_SQUARE_MASK]
+    d = SYMMETRY_DIRECTIONS[s][(move >> MOVE_DIRECTION_SHIFT) & 7]
+    return (move & ~(MOVE_SQUARE_MASK | 7 << MOVE_DIRECTION_SHIFT)) | square | d << MOVE_DIRECTION_SHIFT
+
+
+def line_mask(square: int, d: int, length: int) -> int:
+    """
+    Return the bitboard of the `length` first cells of the ray starting at `square` along d.
+    """
+    mask = 0
+    for sq in RAYS[square][d][:length]:
+        mask |= 1 << sq
+    return mask
+
+
+def iter_bits(bits: int) -> Iterator[int]:
+    """
+    Iterate over the bit indices set in a bitboard.
+    """
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def generate_moves(own: int, opp: int) -> Iterator[int]:
+    """
+    Generate the inline moves of the player owning `own`, by shift-and-mask along the six directions.
+
+    A move starts from a marble (the tail) and pushes the line of at most 3 marbles ahead of it,
+    with the same rules as GameStateAbalone.detect_conflict.
+
+    Args:
+        own (int): bitboard of the player to move
+        opp (int): bitboard of the opponent
+
+    Returns:
+        Iterator[int]: compact moves (see encode_move)
+    """
+    empty = VALID & ~(own | opp)
+    for d in range(6):
+        base = d << MOVE_DIRECTION_SHIFT
+        back = OPPOSITE[d]
+        off = OFF_MASKS[d]
+        # e[k] / p[k]: cells whose k-th neighbour along d is empty / an opponent marble
+        e1 = shift(empty, back)
+        e2 = shift(e1, back)
+        e3 = shift(e2, back)
+        e4 = shift(e3, back)
+        e5 = shift(e4, back)
+        p2 = shift(shift(opp, back), back)
+        p3 = shift(p2, back)
+        p4 = shift(p3, back)
+
+        own2 = own & shift(own, back)
+        own3 = own & shift(own2, back)
+        own4 = own & shift(own3, back)
+        lines = ((1, own & ~own2), (2, own2 & ~own3), (3, own3 & ~own4))
+        for k, tails in lines:
+            if not tails:
+                continue
+            if k == 1:
+                ahead_empty, ahead_off = e1, off[1]
+            elif k == 2:
+                ahead_empty, ahead_off = e2, off[2]
+            else:
+                ahead_empty, ahead_off = e3, off[3]
+            move = base | k << MOVE_LENGTH_SHIFT
+            for sq in iter_bits(tails & ahead_empty):
+                yield move | sq
+            for sq in iter_bits(tails & ahead_off):
+                yield move | MOVE_EJECT | sq
+            if k == 2:
+                push = tails & p2
+                for sq in iter_bits(push & e3):
+                    yield move | 1 << MOVE_PUSHED_SHIFT | sq
+                for sq in iter_bits(push & off[3]):
+                    yield move | 1 << MOVE_PUSHED_SHIFT | MOVE_EJECT | sq
+            elif k == 3:
+                push = tails & p3
+                for sq in iter_bits(push & e4):
+                    yield move | 1 << MOVE_PUSHED_SHIFT | sq
+                for sq in iter_bits(push & off[4]):
+                    yield move | 1 << MOVE_PUSHED_SHIFT | MOVE_EJECT | sq
+                push = push & p4
+                for sq in iter_bits(push & e5):
+                    yield move | 2 << MOVE_PUSHED_SHIFT | sq
+                for sq in iter_bits(push & off[5]):
+                    yield move | 2 << MOVE_PUSHED_SHIFT | MOVE_EJECT | sq
+
+
+def generate_captures(own: int, opp: int) -> Iterator[int]:
+    """
+    Generate only the moves that push an opponent marble off the board (2 against 1, 3 against 1
+    or 3 against 2 with the last pushed marble on the edge), with the same rules as generate_moves.
+    The lines are built backwards from the opponent marbles on the edge, so most directions stop early.
+
+    Args:
+        own (int): bitboard of the player to move
+        opp (int): bitboard of the opponent
+
+    Returns:
+        Iterator[int]: compact moves (see encode_move)
+    """
+    for d, edge_mask, mask, left, right in CAPTURE_DIRECTIONS:
+        # Opponent marbles that would leave the board when pushed along d
+        edge = opp & edge_mask
+        if not edge:
+            continue
+        # shift(x, OPPOSITE[d]) is ((x & mask) << left >> right) & VALID
+        behind = ((edge & mask) << left >> right) & VALID
+        move = d << MOVE_DIRECTION_SHIFT | MOVE_EJECT
+        # Own line ending right behind the edge marble: 2 against 1, then 3 against 1
+        line = own & behind
+        if line:
+            tails = own & ((line & mask) << left >> right)
+            if tails:
+                for sq in iter_bits(tails):
+                    yield move | 2 << MOVE_LENGTH_SHIFT | 1 << MOVE_PUSHED_SHIFT | sq
+                tails = own & ((tails & mask) << left >> right)
+                for sq in iter_bits(tails):
+                    yield move | 3 << MOVE_LENGTH_SHIFT | 1 << MOVE_PUSHED_SHIFT | sq
+        # Own line of 3 behind two opponent marbles: 3 against 2
+        pair = opp & behind
+        if pair:
+            tails = own & ((pair & mask) << left >> right)
+            if tails:
+                tails = own & ((tails & mask) << left >> right)
+                tails = own & ((tails & mask) << left >> right)
+                for sq in iter_bits(tails):
+                    yield move | 3 << MOVE_LENGTH_SHIFT | 2 << MOVE_PUSHED_SHIFT | sq
+
+
+def complete_move(move: int, own: int, opp: int) -> Optional[int]:
+    """
+    Complete a move known only by its tail and direction (see LIGHT_MOVES) with its
+    line length and push information, following the rules of generate_moves.
+
+    Args:
+        move (int): compact move without length nor push information
+        own (int): bitboard of the player to move
+        opp (int): bitboard of the opponent
+
+    Returns:
+        int: the complete move, None if it is not legal
+    """
+    sq = move & MOVE_SQUARE_MASK
+    d = move >> MOVE_DIRECTION_SHIFT & 7
+    move = sq | d << MOVE_DIRECTION_SHIFT
+    length = 0
+    pushed = 0
+    for bit in RAY_BITS[sq][d]:
+        if own & bit:
+            if pushed:
+                return None
+            length += 1
+        elif opp & bit:
+            pushed += 1
+        else:
+            return move | length << MOVE_LENGTH_SHIFT | pushed << MOVE_PUSHED_SHIFT if 0 < length <= 3 and pushed < length else None
+        if length > 3 or (pushed and pushed >= length):
+            return None
+    if length == 0:
+        return None
+    return move | length << MOVE_LENGTH_SHIFT | pushed << MOVE_PUSHED_SHIFT | MOVE_EJECT
+
+
+def apply_move(own: int, opp: int, move: int) -> Tuple[int, int]:
+    """
+    Apply a move generated by generate_moves, by toggling the bits of MOVE_MASKS.
+
+    Args:
+        own (int): bitboard of the player to move
+        opp (int): bitboard of the opponent
+        move (int): compact move as yielded by generate_moves
+
+    Returns:
+        Tuple[int,int]: new (own, opp) bitboards
+    """
+    own_bits, opp_bits = MOVE_MASKS[move & MOVE_KEY_MASK]
+    return own ^ own_bits, opp ^ opp_bits
+
+
+class BitBoardAbalone:
+    """
+    Bitboard representation of an Abalone board: one integer per player over the 17x9 grid,
+    where bit i*9+j is set when the player owns a marble on the cell (i,j).
+
+    Attributes:
+        bits (dict[int, int]): bitboard of each player ID.
+    """
+
+    __slots__ = ("bits",)
+
+    def __init__(self, bits: Dict[int, int]) -> None:
+        self.bits = bits
+
+    @classmethod
+    def from_env(cls, env: Dict[Tuple[int, int], Piece], player_ids: List[int]) -> BitBoardAbalone:
+        """
+        Build the bitboards from a BoardAbalone environment.
+
+        Args:
+            env (dict[Tuple[int], Piece]): The environment dictionary composed of pieces.
+            player_ids (list[int]): IDs of the players.
+
+        Returns:
+            BitBoardAbalone: the bitboard representation
+        """
+        bits = dict.fromkeys(player_ids, 0)
+        for (i, j), p in env.items():
+            bits[p.get_owner_id()] |= 1 << square_of(i, j)
+        return cls(bits)
+
+    def get_moves(self, player_id: int) -> Iterator[int]:
+        """
+        Generate the moves of a player.
+
+        Args:
+            player_id (int): ID of the player to move.
+
+        Returns:
+            Iterator[int]: compact moves as yielded by generate_moves
+        """
+        return generate_moves(*self.get_sides(player_id))
+
+    def get_captures(self, player_id: int) -> Iterator[int]:
+        """
+        Generate the moves of a player that push an opponent marble off the board.
+
+        Args:
+            player_id (int): ID of the player to move.
+
+        Returns:
+            Iterator[int]: compact moves as yielded by generate_captures
+        """
+        return generate_captures(*self.get_sides(player_id))
+
+    def get_sides(self, player_id: int) -> Tuple[int, int]:
+        """
+        Return the bitboard of a player and the bitboard of its opponent.
+
+        Args:
+            player_id (int): ID of the player.
+
+        Returns:
+            Tuple[int, int]: (own, opp) bitboards
+        """
+        own = self.bits[player_id]
+        opp = 0
+        for pid, b in self.bits.items():
+            if pid != player_id:
+                opp |= b
+        return own, opp
+
+    def __eq__(self, __value: object) -> bool:
+        return isinstance(__value, BitBoardAbalone) and self.bits == __value.bits
+
+    def __hash__(self) -> int:
+        return hash(frozenset(self.bits.items()))
@@ -0,0 +1,229 @@
+from __future__ import annotations
+from typing import Dict, List, Sequence, Tuple
+
+from bitboard_abalone import CELL_SQUARES, iter_bits
+from geometry_abalone import CELL_NEIGHBOURS, CELLS
+
+# Axes of the board as pairs of opposite directions (indices in DIRECTIONS),
+# in the order of the horizontal, eastDiagonal and westDiagonal axes of Heuristic 1
+AXES = [(1, 2), (4, 5), (0, 3)]
+
+# Strengths of a cell without marble
+NO_STRENGTH = (0, 0, 0)
+
+# Cell index of each bit index of the bitboards
+SQUARE_CELL = {int(sq): k for k, sq in enumerate(CELL_SQUARES)}
+
+
+def _build_strength_zones():
+    # The strengths of a marble depend on its first and second neighbours on each axis,
+    # so a change on a cell only affects the cell and its first and second neighbours in every direction
+    zones = []
+    for k, neighbours in enumerate(CELL_NEIGHBOURS):
+        zone = {k}
+        for d, n in enumerate(neighbours):
+            if n >= 0:
+                zone.add(n)
+                if CELL_NEIGHBOURS[n][d] >= 0:
+                    zone.add(CELL_NEIGHBOURS[n][d])
+        zones.append(tuple(zone))
+    return zones
+
+
+STRENGTH_ZONES = _build_strength_zones()
+
+
+def _find(parent: Dict[int, int], k: int) -> int:
+    # Root of a cell in a union-find, with path halving
+    while parent[k] != k:
+        parent[k] = parent[parent[k]]
+        k = parent[k]
+    return k
+
+
+class ClusterAbalone:
+    """
+    Clusters (groups of connected marbles) and line strengths of the marbles of one player, updated incrementally.
+
+    The clusters are a union-find over the 61 cells, kept fully compressed: every marble points to the root of its
+    cluster, its smallest cell index. A move only rebuilds the clusters containing or touching the changed cells, and
+    the strengths of the cells around them, so that the aggregates below are read in O(1).
+
+    The strength of a marble on an axis is 1, plus 1 for each allied neighbour on the axis, plus 1 when the line
+    continues with a third allied marble. Its total strength is 1 plus the same counts over the three axes.
+
+    Attributes:
+        root (list[int]): root cell index of the cluster of each cell, -1 on the cells without a marble of the player
+        members (dict[int, Tuple[int]]): cells of each cluster, by root
+        strengths (list[Tuple[int]]): strengths of each cell on the three AXES, NO_STRENGTH without marble
+        marbles (int): number of marbles
+        size_squares (int): sum of the squared sizes of the clusters
+        total_strength (int): sum of the total strengths of the marbles
+        strength_squares (int): sum of the squared total strengths of the marbles
+        axis_strength (list[int]): sum of the strengths of the marbles on each axis
+    """
+
+    __slots__ = ("root", "members", "strengths", "marbles", "size_squares", "total_strength", "strength_squares",
+                 "axis_strength")
+
+    def __init__(self) -> None:
+        self.root = [-1] * len(CELLS)
+        self.members = {}
+        self.strengths = [NO_STRENGTH] * len(CELLS)
+        self.marbles = 0
+        self.size_squares = 0
+        self.total_strength = 0
+        self.strength_squares = 0
+        self.axis_strength = [0] * len(AXES)
+
+    @classmethod
+    def from_bits(cls, bits: int) -> ClusterAbalone:
+        """
+        Build the clusters of the marbles of a bitboard.
+
+        Args:
+            bits (int): bitboard of the player
+
+        Returns:
+            ClusterAbalone: clusters of the player
+        """
+        clusters = cls()
+        clusters._update((), [SQUARE_CELL[sq] for sq in iter_bits(bits)])
+        return clusters
+
+    def moved(self, before: int, after: int) -> ClusterAbalone:
+        """
+        Return the clusters after a change of the marbles of the player, leaving this object unchanged.
+
+        Args:
+            before (int): bitboard of the player for these clusters
+            after (int): bitboard of the player after the move
+
+        Returns:
+            ClusterAbalone: updated clusters (this object when the marbles did not change)
+        """
+        if before == after:
+            return self
+        clusters = ClusterAbalone.__new__(ClusterAbalone)
+        clusters.root = self.root.copy()
+        clusters.members = self.members.copy()
+        clusters.strengths = self.strengths.copy()
+        clusters.marbles = self.marbles
+        clusters.size_squares = self.size_squares
+        clusters.total_strength = self.total_strength
+        clusters.strength_squares = self.strength_squares
+        clusters.axis_strength = self.axis_strength.copy()
+        clusters._update([SQUARE_CELL[sq] for sq in iter_bits(before & ~after)],
+                         [SQUARE_CELL[sq] for sq in iter_bits(after & ~before)])
+        return clusters
+
+    def _update(self, vacated: Sequence[int], occupied: Sequence[int]) -> None:
+        root = self.root
+
+        # Clusters losing a marble or touching a new marble: they are removed, then their cells are regrouped
+        old_roots = {root[k] for k in vacated}
+        for k in occupied:
+            for n in CELL_NEIGHBOURS[k]:
+                if n >= 0 and root[n] >= 0:
+                    old_roots.add(root[n])
+        region = set(occupied)
+        for r in old_roots:
+            cells = self.members.pop(r)
+            region.update(cells)
+            self.size_squares -= len(cells) ** 2
+        for k in vacated:
+            root[k] = -1
+            region.discard(k)
+        self.marbles += len(occupied) - len(vacated)
+
+        parent = {k: k for k in region}
+        for k in region:
+            for n in CELL_NEIGHBOURS[k]:
+                if n in parent:
+                    a, b = _find(parent, k), _find(parent, n)
+                    if a < b:
+                        parent[b] = a
+                    elif b < a:
+                        parent[a] = b
+        groups = {}
+        for k in region:
+            r = _find(parent, k)
+            root[k] = r
+            groups.setdefault(r, []).append(k)
+        for r, cells in groups.items():
+            self.members[r] = tuple(cells)
+            self.size_squares += len(cells) ** 2
+
+        zone = set()
+        for k in vacated:
+            zone.update(STRENGTH_ZONES[k])
+        for k in occupied:
+            zone.update(STRENGTH_ZONES[k])
+        for k in zone:
+            self._set_strengths(k, self._cell_strengths(k))
+
+    def _cell_strengths(self, k: int) -> Tuple[int, ...]:
+        root = self.root
+        if root[k] < 0:
+            return NO_STRENGTH
+        neighbours = CELL_NEIGHBOURS[k]
+        strengths = []
+        for axis in AXES:
+            strength = 1
+            for d in axis:
+                n = neighbours[d]
+                if n >= 0 and root[n] >= 0:
+                    strength += 1
+                    n = CELL_NEIGHBOURS[n][d]
+                    if n >= 0 and root[n] >= 0:
+                        strength += 1
+            strengths.append(strength)
+        return tuple(strengths)
+
+    def _set_strengths(self, k: int, strengths: Tuple[int, ...]) -> None:
+        old = self.strengths[k]
+        if old == strengths:
+            return
+        old_total = sum(old) - 2 if old[0] else 0
+        total = sum(strengths) - 2 if strengths[0] else 0
+        self.total_strength += total - old_total
+        self.strength_squares += total ** 2 - old_total ** 2
+        for a in range(len(AXES)):
+            self.axis_strength[a] += strengths[a] - old[a]
+        self.strengths[k] = strengths
+
+    def get_clusters(self) -> int:
+        """
+        Return the number of clusters.
+        """
+        return len(self.members)
+
+    def get_mean_size(self) -> float:
+        """
+        Return the mean number of marbles per cluster (0 without marble).
+        """
+        return self.marbles / len(self.members) if self.members else 0
+
+    def get_count_cohesion(self) -> float:
+        """
+        Return the sum over the clusters of (cluster size / number of marbles)**2.
+        """
+        return self.size_squares / self.marbles ** 2 if self.marbles else 0
+
+    def get_strength_cohesion(self) -> float:
+        """
+        Return the sum over the marbles of (total strength / sum of the total strengths)**2.
+        """
+        return self.strength_squares / self.total_strength ** 2 if self.total_strength else 0
+
+    def get_cells(self) -> List[Tuple[int, int]]:
+        """
+        Return the (i,j) cells of the marbles of the player.
+        """
+        return [CELLS[k] for cells in self.members.values() for k in cells]
+
+    def __eq__(self, __value: object) -> bool:
+        return isinstance(__value, ClusterAbalone) and self.root == __value.root and self.strengths == __value.strengths \
+            and (self.marbles, self.size_squares, self.total_strength, self.strength_squares, self.axis_strength) \
+            == (__value.marbles, __value.size_squares, __value.total_strength, __value.strength_squares,
+                __value.axis_strength)
@@ -1,14 +1,26 @@
 import copy
 import json
+import os
+from operator import xor
 from typing import Dict, List, Optional, Set, Tuple
 
+from bitboard_abalone import (LIGHT_MOVES, RAYS, BitBoardAbalone, apply_move, board_terms, cell_of, complete_move, decode_move,
+                              move_terms)
 from board_abalone import BoardAbalone
+from cluster_abalone import ClusterAbalone
+from geometry_abalone import CELL_INDEX, CELL_RAYS, CELLS, DIRECTION_INDEX
 from player_abalone import PlayerAbalone
 from seahorse.game.action import Action
 from seahorse.game.game_layout.board import Piece
 from seahorse.game.game_state import GameState
 from seahorse.player.player import Player
 from seahorse.utils.serializer import Serializable
+from zobrist_abalone import KEYS_BY_SQUARE, SIDE_KEY, hash_env, symmetric_hashes, symmetric_move_deltas
+
+# Debug mode: check every incremental update of the evaluation terms against a full recomputation (slow)
+CHECK_TERMS = os.environ.get("ABALONE_CHECK_TERMS") == "1"
+
+
 class GameStateAbalone(GameState):
     """
     A class representing the state of an Abalone game.
@@ -25,6 +37,11 @@ class GameStateAbalone(GameState):
         self.max_score = -6
         self.max_step = 50
         self.step = step
+        self._bitboard = None
+        self._hash = None
+        self._symmetric_hashes = None
+        self._terms = None
+        self._clusters = None
 
     def get_step(self) -> int:
         """
@@ -66,15 +83,16 @@ class GameStateAbalone(GameState):
         result = []
         current_rep = self.get_rep()
         b = current_rep.get_env()
-        tmp_n_i = n_i
-        tmp_n_j = n_j
         my_count = 1
         other_count = 0
         switch = False
         max_deplacement = 3
         result.append((i, j))
-        while b.get((i + tmp_n_i, j + tmp_n_j), False):
-            p = b[(i + tmp_n_i, j + tmp_n_j)]
+        # The cells after (i,j) in the direction of movement, up to the border of the board
+        for k in CELL_RAYS[CELL_INDEX[(i, j)]][DIRECTION_INDEX[(n_i, n_j)]]:
+            p = b.get(CELLS[k])
+            if not p:
+                break
             if p.get_owner_id() == self.next_player.get_id() and switch is False:
                 my_count += 1
                 if my_count > max_deplacement:
@@ -86,9 +104,7 @@ class GameStateAbalone(GameState):
                 switch = True
             if other_count >= my_count:
                 return None
-            result.append((i + tmp_n_i, j + tmp_n_j))
-            tmp_n_i += n_i
-            tmp_n_j += n_j
+            result.append(CELLS[k])
         return result
 
     def in_hexa(self, index) -> bool:
@@ -164,6 +180,393 @@ class GameStateAbalone(GameState):
                                 copy_b.pop((n_index[0] + n_i, n_index[1] + n_j, 1))
                         yield BoardAbalone(env=copy_b, dim=d), id_add
 
+    def get_bitboard(self) -> BitBoardAbalone:
+        """
+        Return the bitboard representation of the current board.
+
+        Returns:
+            BitBoardAbalone: One bitboard per player.
+        """
+        if self._bitboard is None:
+            self._bitboard = BitBoardAbalone.from_env(self.get_rep().get_env(), [p.get_id() for p in self.players])
+        return self._bitboard
+
+    def legal_moves(self) -> List[int]:
+        """
+        Generate the moves of the next player without building the successor states.
+
+        Returns:
+            List[int]: compact moves (see bitboard_abalone.encode_move).
+        """
+        return list(self.get_bitboard().get_moves(self.next_player.get_id()))
+
+    def capture_moves(self) -> List[int]:
+        """
+        Generate only the moves of the next player that push an opponent marble off the board.
+
+        Returns:
+            List[int]: compact moves (see bitboard_abalone.generate_captures).
+        """
+        return list(self.get_bitboard().get_captures(self.next_player.get_id()))
+
+    def get_hash(self) -> int:
+        """
+        Return the Zobrist hash of the state (pieces and side to move).
+        It is computed once, then carried by the successors built from this state.
+
+        Returns:
+            int: 64-bit hash of the state.
+        """
+        if self._hash is None:
+            self._hash = hash_env(self.get_rep().get_env(), self.next_player is self.players[0])
+        return self._hash
+
+    def get_symmetric_hashes(self) -> Tuple[int, ...]:
+        """
+        Return the hashes of the images of the state by the symmetries of the board keeping the evaluation
+        (see zobrist_abalone.symmetric_hashes).
+        They are computed on the first call, then updated by the successors built from this state and by make_move.
+
+        Returns:
+            Tuple[int, ...]: 64-bit hash of each image.
+        """
+        if self._symmetric_hashes is None:
+            self._symmetric_hashes = self.compute_symmetric_hashes()
+        return self._symmetric_hashes
+
+    def compute_symmetric_hashes(self) -> Tuple[int, ...]:
+        """
+        Compute the hashes of the images of the state from the whole board.
+
+        Returns:
+            Tuple[int, ...]: 64-bit hash of each image.
+        """
+        bits = BitBoardAbalone.from_env(self.get_rep().get_env(), [p.get_id() for p in self.players]).bits
+        return symmetric_hashes({p.get_piece_type(): bits[p.get_id()] for p in self.players}, self.next_player is self.players[0])
+
+    def moved_symmetric_hashes(self, move: int) -> Optional[Tuple[int, ...]]:
+        """
+        Return the hashes of the images of the state after a move of the next player.
+        Nothing is computed while the hashes of this state have never been requested.
+
+        Args:
+            move (int): The compact move to play.
+
+        Returns:
+            Tuple[int, ...]: 64-bit hash of each image, or None.
+        """
+        if self._symmetric_hashes is None:
+            return None
+        return tuple(map(xor, self._symmetric_hashes, symmetric_move_deltas(move, self.next_player.get_piece_type())))
+
+    def get_terms(self) -> Dict[int, Tuple[int, ...]]:
+        """
+        Return the evaluation terms of each player (see bitboard_abalone.SQUARE_TERMS).
+        They are computed once, then updated by the successors built from this state and by make_move.
+
+        Returns:
+            dict[int, Tuple[int]]: terms of each player ID.
+        """
+        if self._terms is None:
+            self._terms = self.compute_terms()
+        return self._terms
+
+    def compute_terms(self) -> Dict[int, Tuple[int, ...]]:
+        """
+        Compute the evaluation terms of each player from the whole board.
+
+        Returns:
+            dict[int, Tuple[int]]: terms of each player ID.
+        """
+        bitboard = BitBoardAbalone.from_env(self.get_rep().get_env(), [p.get_id() for p in self.players])
+        return {player_id: board_terms(bits) for player_id, bits in bitboard.bits.items()}
+
+    def moved_terms(self, move: int) -> Dict[int, Tuple[int, ...]]:
+        """
+        Return the evaluation terms of each player after a move of the next player, in O(moved marbles).
+
+        Args:
+            move (int): The compact move to play.
+
+        Returns:
+            dict[int, Tuple[int]]: terms of each player ID.
+        """
+        terms = dict(self.get_terms())
+        player_id = self.next_player.get_id()
+        opp_id = next(pid for pid in terms if pid != player_id)
+        terms[player_id], terms[opp_id] = move_terms(terms[player_id], terms[opp_id], move)
+        return terms
+
+    def get_clusters(self) -> Dict[int, ClusterAbalone]:
+        """
+        Return the clusters and line strengths of each player.
+        They are computed on the first call, then updated by the successors built from this state and by make_move.
+
+        Returns:
+            dict[int, ClusterAbalone]: clusters of each player ID.
+        """
+        if self._clusters is None:
+            self._clusters = {player_id: ClusterAbalone.from_bits(bits) for player_id, bits in self.get_bitboard().bits.items()}
+        return self._clusters
+
+    def compute_clusters(self) -> Dict[int, ClusterAbalone]:
+        """
+        Compute the clusters of each player from the whole board.
+
+        Returns:
+            dict[int, ClusterAbalone]: clusters of each player ID.
+        """
+        bitboard = BitBoardAbalone.from_env(self.get_rep().get_env(), [p.get_id() for p in self.players])
+        return {player_id: ClusterAbalone.from_bits(bits) for player_id, bits in bitboard.bits.items()}
+
+    def moved_clusters(self, bitboard: BitBoardAbalone) -> Optional[Dict[int, ClusterAbalone]]:
+        """
+        Return the clusters of each player after a move, rebuilt only around the cells that changed.
+        Nothing is computed while the clusters of this state have never been requested.
+
+        Args:
+            bitboard (BitBoardAbalone): The bitboard after the move.
+
+        Returns:
+            dict[int, ClusterAbalone]: clusters of each player ID, or None.
+        """
+        if self._clusters is None:
+            return None
+        before = self.get_bitboard().bits
+        return {player_id: clusters.moved(before[player_id], bitboard.bits[player_id])
+                for player_id, clusters in self._clusters.items()}
+
+    def move_pieces(self, env: Dict, move: int) -> Tuple[int, Optional[Piece], int]:
+        """
+        Move in place the pieces of env involved in a move.
+
+        Args:
+            env (dict[Tuple[int], Piece]): The environment to update.
+            move (int): The compact move to play.
+
+        Returns:
+            Tuple[int, Piece, int]: The ID of the player losing a marble, the ejected piece (None if no marble is ejected)
+                and the change of the Zobrist hash due to the moved pieces.
+        """
+        sq, direction, length, pushed, _ = decode_move(move)
+        ray = RAYS[sq][direction]
+        id_add = None
+        ejected = None
+        delta = 0
+        # The line is moved from its head so that every destination is free
+        for k in range(length + pushed - 1, -1, -1):
+            p = env.pop(cell_of(ray[k]))
+            keys = KEYS_BY_SQUARE[p.get_type()]
+            delta ^= keys[ray[k]]
+            if k + 1 < len(ray):
+                env[cell_of(ray[k + 1])] = p
+                delta ^= keys[ray[k + 1]]
+            else:
+                id_add = p.get_owner_id()
+                ejected = p
+        return id_add, ejected, delta
+
+    def bitboard_generator(self):
+        """
+        Generate the same successors as generator, using the bitboard move generator.
+
+        Returns:
+            Iterator[Tuple[BoardAbalone, int]]: successor boards and the ID of the player losing a marble.
+        """
+        current_rep = self.get_rep()
+        b = current_rep.get_env()
+        d = current_rep.get_dimensions()
+        for move in self.legal_moves():
+            copy_b = copy.copy(b)
+            id_add, _, _ = self.move_pieces(copy_b, move)
+            yield BoardAbalone(env=copy_b, dim=d), id_add
+
+    def successor(self, move: int) -> "GameStateAbalone":
+        """
+        Build the state reached by a move, carrying its updated Zobrist hash.
+
+        Args:
+            move (int): The compact move to play.
+
+        Returns:
+            GameStateAbalone: The successor state.
+        """
+        current_rep = self.get_rep()
+        copy_b = copy.copy(current_rep.get_env())
+        id_add, _, delta = self.move_pieces(copy_b, move)
+        next_state = GameStateAbalone(
+            self.compute_scores(id_add=id_add),
+            self.compute_next_player(),
+            self.players,
+            BoardAbalone(env=copy_b, dim=current_rep.get_dimensions()),
+            step=self.step + 1,
+        )
+        next_state._hash = self.get_hash() ^ delta ^ SIDE_KEY
+        next_state._symmetric_hashes = self.moved_symmetric_hashes(move)
+        next_state._terms = self.moved_terms(move)
+        if self._clusters is not None:
+            player_id = self.next_player.get_id()
+            bits = dict(self.get_bitboard().bits)
+            own = bits.pop(player_id)
+            (opp_id, opp), = bits.items()
+            own, opp = apply_move(own, opp, move)
+            next_state._bitboard = BitBoardAbalone({player_id: own, opp_id: opp})
+            next_state._clusters = self.moved_clusters(next_state._bitboard)
+        if CHECK_TERMS:
+            assert next_state._terms == next_state.compute_terms(), "incremental evaluation terms differ"
+            if next_state._clusters is not None:
+                assert next_state._clusters == next_state.compute_clusters(), "incremental clusters differ"
+            if next_state._symmetric_hashes is not None:
+                assert next_state._symmetric_hashes == next_state.compute_symmetric_hashes(), "incremental symmetric hashes differ"
+        return next_state
+
+    def move_to_action(self, move: int) -> Action:
+        """
+        Build the Action corresponding to a move.
+
+        Args:
+            move (int): The compact move to play.
+
+        Returns:
+            Action: The action leading to the successor state.
+        """
+        return Action(self, self.successor(move))
+
+    def search_copy(self) -> "GameStateAbalone":
+        """
+        Copy the state so that it can be modified in place by make_move and unmake_move.
+
+        Returns:
+            GameStateAbalone: A state owning its scores and its environment.
+        """
+        current_rep = self.get_rep()
+        state = GameStateAbalone(
+            copy.copy(self.scores),
+            self.next_player,
+            self.players,
+            BoardAbalone(env=copy.copy(current_rep.get_env()), dim=current_rep.get_dimensions()),
+            step=self.step,
+        )
+        state._hash = self.get_hash()
+        state._symmetric_hashes = self._symmetric_hashes
+        state._terms = self.get_terms()
+        state._clusters = self._clusters
+        return state
+
+    def detached_copy(self) -> "GameStateAbalone":
+        """
+        Copy the state like search_copy, with plain PlayerAbalone players (same IDs, names and piece types)
+        so that it can be pickled and sent to another process without the agents and their search tables.
+
+        Returns:
+            GameStateAbalone: A state owning its scores, its environment and its players.
+        """
+        players = [PlayerAbalone(p.get_piece_type(), p.get_name(), id=p.get_id()) for p in self.players]
+        current_rep = self.get_rep()
+        state = GameStateAbalone(
+            copy.copy(self.scores),
+            players[self.players.index(self.next_player)],
+            players,
+            BoardAbalone(env=copy.copy(current_rep.get_env()), dim=current_rep.get_dimensions()),
+            step=self.step,
+        )
+        state._hash = self.get_hash()
+        state._symmetric_hashes = self._symmetric_hashes
+        state._terms = self.get_terms()
+        state._clusters = self._clusters
+        return state
+
+    def make_move(self, move: int) -> Tuple:
+        """
+        Play a move in place. Only to be used on a state returned by search_copy.
+
+        Args:
+            move (int): The compact move to play.
+
+        Returns:
+            Tuple: The undo token to give to unmake_move.
+        """
+        bitboard = self.get_bitboard()
+        zobrist_hash = self.get_hash()
+        hashes = self._symmetric_hashes
+        terms = self.get_terms()
+        self._terms = self.moved_terms(move)
+        self._symmetric_hashes = self.moved_symmetric_hashes(move)
+        id_add, ejected, delta = self.move_pieces(self.get_rep().get_env(), move)
+        self._hash = zobrist_hash ^ delta ^ SIDE_KEY
+        if id_add is not None:
+            self.scores[id_add] -= 1
+        player_id = self.next_player.get_id()
+        bits = dict(bitboard.bits)
+        own = bits.pop(player_id)
+        (opp_id, opp), = bits.items()
+        own, opp = apply_move(own, opp, move)
+        clusters = self._clusters
+        next_bitboard = BitBoardAbalone({player_id: own, opp_id: opp})
+        self._clusters = self.moved_clusters(next_bitboard)
+        self._bitboard = next_bitboard
+        token = (move, id_add, ejected, self.next_player, bitboard, zobrist_hash, hashes, terms, clusters)
+        self.next_player = self.compute_next_player()
+        self.step += 1
+        if CHECK_TERMS:
+            assert self._terms == self.compute_terms(), "incremental evaluation terms differ"
+            if self._clusters is not None:
+                assert self._clusters == self.compute_clusters(), "incremental clusters differ"
+            if self._symmetric_hashes is not None:
+                assert self._symmetric_hashes == self.compute_symmetric_hashes(), "incremental symmetric hashes differ"
+        return token
+
+    def unmake_move(self, token: Tuple) -> None:
+        """
+        Restore exactly the state preceding a make_move.
+
+        Args:
+            token (Tuple): The undo token returned by make_move.
+        """
+        move, id_add, ejected, next_player, bitboard, zobrist_hash, hashes, terms, clusters = token
+        sq, direction, length, pushed, _ = decode_move(move)
+        env = self.get_rep().get_env()
+        ray = RAYS[sq][direction]
+        for k in range(length + pushed):
+            if k + 1 < len(ray):
+                env[cell_of(ray[k])] = env.pop(cell_of(ray[k + 1]))
+            else:
+                env[cell_of(ray[k])] = ejected
+        if id_add is not None:
+            self.scores[id_add] += 1
+        self.next_player = next_player
+        self.step -= 1
+        self._bitboard = bitboard
+        self._hash = zobrist_hash
+        self._symmetric_hashes = hashes
+        self._terms = terms
+        self._clusters = clusters
+
+    def make_null_move(self) -> Tuple:
+        """
+        Pass the turn in place (null move, used by the search only). Only to be used on a state returned by search_copy.
+
+        Returns:
+            Tuple: The undo token to give to unmake_null_move.
+        """
+        token = (self.next_player, self.get_hash(), self._symmetric_hashes)
+        self._hash ^= SIDE_KEY
+        if self._symmetric_hashes is not None:
+            self._symmetric_hashes = tuple(h ^ SIDE_KEY for h in self._symmetric_hashes)
+        self.next_player = self.compute_next_player()
+        self.step += 1
+        return token
+
+    def unmake_null_move(self, token: Tuple) -> None:
+        """
+        Restore exactly the state preceding a make_null_move.
+
+        Args:
+            token (Tuple): The undo token returned by make_null_move.
+        """
+        self.next_player, self._hash, self._symmetric_hashes = token
+        self.step -= 1
+
     def generate_possible_actions(self) -> Set[Action]:
         """
         Generate possible actions for the current game state.
@@ -171,67 +574,16 @@ class GameStateAbalone(GameState):
         Returns:
             List[Action]: List of possible actions.
         """
-        poss_actions = {
-            Action(
-                self,
-                GameStateAbalone(
-                    self.compute_scores(id_add=id_add),
-                    self.compute_next_player(),
-                    self.players,
-                    valid_next_rep,
-                    step=self.step + 1,
-                ),
-            )
-            for valid_next_rep, id_add in self.generator()
-        }
+        poss_actions = {self.move_to_action(move) for move in self.legal_moves()}
         return poss_actions
 
     def convert_light_action_to_action(self,data) ->  Action :
         src,dst=data["from"],data["to"]
-        current_game_state = self
-        b = current_game_state.get_rep().get_env()
-        d = current_game_state.get_rep().get_dimensions()
-        n_i, n_j = dst[0]-src[0],dst[1]-src[1]
-        to_move_pieces = current_game_state.detect_conflict(src[0],src[1],n_i,n_j)
-        if to_move_pieces is not None:
-            copy_b = copy.copy(b)
-            id_add = None
-            pop_piece = None
-            for k in range(len(to_move_pieces)):
-                n_index = to_move_pieces[k]
-                if (
-                    n_index[0] + n_i >= 0
-                    and n_index[0] + n_i < d[0]
-                    and n_index[1] + n_j >= 0
-                    and n_index[1] + n_j < d[1]
-                    and current_game_state.in_hexa((n_index[0] + n_i, n_index[1] + n_j))
-                ):
-                    copy_b[(n_index[0] + n_i, n_index[1] + n_j, 1)] = Piece(
-                        piece_type=copy_b[(n_index[0], n_index[1])].get_type(),
-                        owner=current_game_state.get_player_id(copy_b[(n_index[0], n_index[1])].get_owner_id()),
-                    )
-                    copy_b.pop((n_index[0], n_index[1]))
-                else:
-                    id_add = copy_b[(n_index[0], n_index[1])].get_owner_id()
-                    pop_piece = (n_index[0], n_index[1])
-                    copy_b.pop((n_index[0], n_index[1]))
-            for k in range(len(to_move_pieces)):
-                n_index = to_move_pieces[k]
-                if pop_piece != (n_index[0], n_index[1]):
-                    copy_b[(n_index[0] + n_i, n_index[1] + n_j)] = copy.copy(
-                        copy_b[(n_index[0] + n_i, n_index[1] + n_j, 1)]
-                    )
-                    copy_b.pop((n_index[0] + n_i, n_index[1] + n_j, 1))
-            return Action(
-                    current_game_state,
-                    GameStateAbalone(
-                        current_game_state.compute_scores(id_add=id_add),
-                        current_game_state.compute_next_player(),
-                        current_game_state.players,
-                        BoardAbalone(env=copy_b, dim=d),
-                        step=current_game_state.step + 1,
-                        ),
-                    )
+        move = LIGHT_MOVES.get((tuple(src), tuple(dst)))
+        if move is not None:
+            move = complete_move(move, *self.get_bitboard().get_sides(self.next_player.get_id()))
+        if move is not None:
+            return self.move_to_action(move)
         return None
 
     def compute_scores(self, id_add: int) -> Dict[int, float]:
@@ -257,7 +609,7 @@ class GameStateAbalone(GameState):
         return "The game is finished!"
 
     def to_json(self) -> str:
-        return { i:j for i,j in self.__dict__.items() if i!="_possible_actions"}
+        return { i:j for i,j in self.__dict__.items() if i not in ("_possible_actions", "_bitboard", "_hash", "_symmetric_hashes", "_clusters", "_terms")}
 
     @classmethod
     def from_json(cls,data:str,*,next_player:Optional[PlayerAbalone]=None) -> Serializable:
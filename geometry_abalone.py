@@ -0,0 +1,94 @@
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+ROWS = 17
+COLS = 9
+
+# Directions in the same order as GameStateAbalone.generator
+DIRECTIONS = [(-1, -1), (1, -1), (-1, 1), (1, 1), (2, 0), (-2, 0)]
+DIRECTION_INDEX = {direction: d for d, direction in enumerate(DIRECTIONS)}
+
+CENTRE = (ROWS // 2, COLS // 2)
+DISPLAY_SIZE = 9
+
+
+def on_board(i: int, j: int) -> bool:
+    """
+    Check if (i,j) is one of the 61 cells of the hexagonal board in doubled coordinates.
+
+    Args:
+        i (int): line indice
+        j (int): column indice
+
+    Returns:
+        bool: True if the cell is playable
+    """
+    return 0 <= j < COLS and (i + j) % 2 == 0 and 4 <= i + j <= 20 and -4 <= i - j <= 12
+
+
+def hex_distance(a: Tuple[int, int], b: Tuple[int, int]) -> int:
+    """
+    Return the number of moves between two cells: a diagonal move changes i and j by 1, a vertical move changes i by 2.
+    """
+    di, dj = abs(b[0] - a[0]), abs(b[1] - a[1])
+    return max(dj, (di + dj) // 2)
+
+
+def display_of(i: int, j: int) -> Tuple[int, int]:
+    """
+    Return the coordinates of a cell in the 9x9 grid of BoardAbalone.get_grid (one line per row of the hexagon).
+    """
+    row = (i + j) // 2 - 2
+    return row, j + (4 - row) // 2
+
+
+def _build_geometry() -> Dict[str, Any]:
+    cells = [(i, j) for i in range(ROWS) for j in range(COLS) if on_board(i, j)]
+    index = {cell: k for k, cell in enumerate(cells)}
+
+    neighbours = []
+    rays = []
+    for i, j in cells:
+        neighbours.append([index.get((i + di, j + dj), -1) for di, dj in DIRECTIONS])
+        cell_rays = []
+        for di, dj in DIRECTIONS:
+            ray = []
+            n_i, n_j = i + di, j + dj
+            while (n_i, n_j) in index:
+                ray.append(index[(n_i, n_j)])
+                n_i += di
+                n_j += dj
+            cell_rays.append(ray)
+        rays.append(cell_rays)
+
+    return {
+        "cells": cells,
+        "neighbours": neighbours,
+        "rays": rays,
+        # Number of cells between a cell and the outside of the board (0 on the border)
+        "edge_distance": [min(len(ray) for ray in cell_rays) for cell_rays in rays],
+        "centre_distance": [hex_distance(CENTRE, cell) for cell in cells],
+        "display": [display_of(i, j) for i, j in cells],
+        "hex_distance": [[hex_distance(a, b) for b in cells] for a in cells],
+    }
+
+
+# The tables are built at import (about 1.5 ms)
+_GEOMETRY = _build_geometry()
+
+# Dense index of the 61 playable cells, in (i,j) order
+CELLS: List[Tuple[int, int]] = [tuple(cell) for cell in _GEOMETRY["cells"]]
+CELL_INDEX: Dict[Tuple[int, int], int] = {cell: k for k, cell in enumerate(CELLS)}
+
+FORBIDDEN_MASK: List[List[bool]] = [[(i, j) not in CELL_INDEX for j in range(COLS)] for i in range(ROWS)]
+
+# Tables indexed by cell index (then by direction index in DIRECTIONS)
+CELL_NEIGHBOURS: List[List[int]] = _GEOMETRY["neighbours"] # neighbour cell index, -1 outside the board
+CELL_RAYS: List[List[List[int]]] = _GEOMETRY["rays"] # cells from the neighbour to the border, in order
+CELL_EDGE_DISTANCE: List[int] = _GEOMETRY["edge_distance"]
+CELL_CENTRE_DISTANCE: List[int] = _GEOMETRY["centre_distance"]
+CELL_DISPLAY: List[Tuple[int, int]] = [tuple(pos) for pos in _GEOMETRY["display"]]
+
+# Hex distance between the 61 cells (as floats: the products with the matrix are faster)
+HEX_DISTANCE = np.array(_GEOMETRY["hex_distance"], dtype=np.float64)
@@ -91,6 +91,11 @@ def play(player1, player2, log_level, port, address, gui, record, gui_path, conf
         listeners.append(StateRecorder())
     master.record_game(listeners=listeners)
 
+def enable_pondering(player) :
+    """The opponent plays on another machine: let the player search during its turn, if it supports it."""
+    if hasattr(player, "ponder") :
+        player.ponder = True
+
 if __name__=="__main__":
 
     parser = argparse.ArgumentParser(
@@ -151,6 +156,7 @@ if __name__=="__main__":
         sys.path.append(folder)
         player1_class = __import__(splitext(basename(list_players[0]))[0], fromlist=[None])
         player1 = LocalPlayerProxy(player1_class.MyPlayer("W", name=splitext(basename(list_players[0]))[0]+"_local", time_limit=time_limit),gs=GameStateAbalone)
+        enable_pondering(player1.wrapped_player)
         player2 = RemotePlayerProxy(mimics=PlayerAbalone,piece_type="B",name="_remote", time_limit=time_limit)
         if address=='localhost':
             logger.warning('Using `localhost` with `host_game` mode, if both players are on different machines')
@@ -161,6 +167,7 @@ if __name__=="__main__":
         sys.path.append(folder)
         player2_class = __import__(splitext(basename(list_players[0]))[0], fromlist=[None])
         player2 = LocalPlayerProxy(player2_class.MyPlayer("B", name="_remote", time_limit=time_limit),gs=GameStateAbalone)
+        enable_pondering(player2.wrapped_player)
         if address=='localhost':
             logger.warning('Using `localhost` with `connect` mode, if both players are on different machines')
             logger.warning('use ipconfig/ifconfig to get your external ip and specity the ip with -a')
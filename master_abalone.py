@@ -5,6 +5,8 @@ from seahorse.game.game_state import GameState
 from seahorse.game.master import GameMaster
 from seahorse.player.player import Player
 
+from geometry_abalone import CELL_CENTRE_DISTANCE, CELL_INDEX
+
 
 class MasterAbalone(GameMaster):
     """
@@ -32,30 +34,17 @@ class MasterAbalone(GameMaster):
         Returns:
             Iterable[Player]: List of the players who won the game
         """
-        def manhattanDist(A, B):
-            mask1 = [(0,2),(1,3),(2,4)]
-            mask2 = [(0,4)]
-            diff = (abs(B[0] - A[0]),abs(B[1] - A[1]))
-            dist = (abs(B[0] - A[0]) + abs(B[1] - A[1]))/2
-            if diff in mask1:
-                dist += 1
-            if diff in mask2:
-                dist += 2
-            return dist
-        
         max_val = max(scores.values())
         players_id = list(filter(lambda key: scores[key] == max_val, scores))
         itera = list(filter(lambda x: x.get_id() in players_id, self.players))
         if len(itera) > 1: #égalité
+            # Hex distance to the centre, read from the geometry tables
             final_rep = self.current_game_state.get_rep()
             env = final_rep.get_env()
-            dim = final_rep.get_dimensions()
             dist = dict.fromkeys(players_id, 0)
-            center = (dim[0]//2, dim[1]//2)
-            for i, j in list(env.keys()):
-                p = env.get((i, j), None)
+            for (i, j), p in env.items():
                 if p.get_owner_id():
-                    dist[p.get_owner_id()] += manhattanDist(center, (i, j))
+                    dist[p.get_owner_id()] += CELL_CENTRE_DISTANCE[CELL_INDEX[(i, j)]]
             min_dist = min(dist.values())
             players_id = list(filter(lambda key: dist[key] == min_dist, dist))
             itera = list(filter(lambda x: x.get_id() in players_id, self.players))
@@ -7,7 +7,9 @@ from game_state_abalone import GameStateAbalone
 from seahorse.game.game_layout.board import Piece
 from seahorse.game.action import Action
 import json
+import os
 from AlphaBetaZobrist import AlphaBetaZobrist
+from MonteCarloTreeSearch import MonteCarloTreeSearch
 from TranspositionTable import ZobristTable
 
 class MyPlayer(PlayerAbalone):
@@ -19,7 +21,7 @@ class MyPlayer(PlayerAbalone):
     """
 
 
-    def __init__(self, piece_type: str, name: str = "Alpha Beta", time_limit: float=60*15,*args) -> None:
+    def __init__(self, piece_type: str, name: str = "Alpha Beta", time_limit: float=60*15, workers: int = 1, lazySMP: bool = False, ponder: bool = False, engine: str = "alphabeta", symmetric: bool = False, tablePath: str = None,*args) -> None:
         """
         Initialise l'instance PlayerAbalone.
 
@@ -27,13 +29,44 @@ class MyPlayer(PlayerAbalone):
             piece_type (str): Type de la pièce de jeu du joueur
             name (str, facultatif): Nom du joueur (par défaut "bob")
             time_limit (float, facultatif): limite de temps en (s)
+            workers (int, facultatif): nombre de processus de la recherche (1 : recherche séquentielle)
+            lazySMP (bool, facultatif): recherche Lazy SMP avec une table de transposition en mémoire partagée
+            ponder (bool, facultatif): recherche pendant le temps de l'adversaire (modes host_game et connect)
+            engine (str, facultatif): stratégie de recherche, "alphabeta" ou "mcts" (Monte Carlo Tree Search)
+            symmetric (bool, facultatif): table de transposition commune aux positions symétriques
+            tablePath (str, facultatif): fichier où la table de transposition est gardée d'une partie à l'autre
+                (un fichier par couleur, les scores étant ceux du joueur ; pas avec lazySMP).
+                Par défaut, la variable d'environnement ABALONE_TABLE_PATH (utilisée par Gym), ignorée avec lazySMP.
+                Si le fichier est déjà ouvert par un autre processus, la table est gardée en mémoire pour cette partie.
         """
         super().__init__(piece_type,name,time_limit,*args)
         self.myStep = 0        
-        self.strategy = AlphaBetaZobrist(depth =1 , playerID=self.id)
+        self.sharedTableMB = 64 # Taille de la table de transposition partagée (Lazy SMP) ou enregistrée (tablePath)
+        if lazySMP and tablePath:
+            raise ValueError("tablePath cannot be used with lazySMP, which needs a table in shared memory")
+        if tablePath is None:
+            tablePath = os.environ.get("ABALONE_TABLE_PATH")
+            if tablePath and lazySMP:
+                print("ABALONE_TABLE_PATH ignored: Lazy SMP needs a table in shared memory")
+                tablePath = None
+        self.zobrist_table = None
+        if tablePath:
+            base, extension = os.path.splitext(tablePath)
+            try:
+                self.zobrist_table = ZobristTable(sharedMB=self.sharedTableMB, symmetric=symmetric, path=f"{base}_{piece_type}{extension}")
+            except BlockingIOError as e:
+                print(f"{e}: the table is kept in memory for this game")
+        if self.zobrist_table is None:
+            self.zobrist_table = ZobristTable(sharedMB=self.sharedTableMB if lazySMP else None, symmetric=symmetric)
+        if engine == "mcts":
+            self.strategy = MonteCarloTreeSearch(playerID=self.id, workers=workers)
+        else:
+            self.strategy = AlphaBetaZobrist(depth =1 , playerID=self.id, zobristTable=self.zobrist_table, workers=workers, lazySMP=lazySMP)
         self.hit_rate= 0
-        self.zobrist_table = ZobristTable()
         self.node_visits=0
+        self.timeMargin = 0.9 # Part du temps restant réellement répartie entre les coups
+        self.ponder = ponder
+        self.ponderHitFactor = 0.5 # Part du temps alloué gardée quand la position a déjà été cherchée
     
     def compute_action(self, current_state: GameState, **kwargs) -> Action:
         """
@@ -53,8 +86,35 @@ class MyPlayer(PlayerAbalone):
         print(f"Max player color : {node.maxPlayerPieceType} score : {node.maxPlayerScore}")
         print(f"Min player color : {node.minPlayerPieceType} score : {node.minPlayerScore}")
 
-        _,action = self.strategy.search(node)
+        if isinstance(self.strategy, MonteCarloTreeSearch):
+            self.strategy.timeLimit = self.timeBudget(current_state)
+            _,action = self.strategy.search(node)
+            self.myStep += 1
+            return action
+
+        ponderResult = self.strategy.stopPondering(node)
+        budget = self.timeBudget(current_state)
+        if ponderResult is not None:
+            budget *= self.ponderHitFactor
+        _,action = self.strategy.iterativeDeepening(node, budget, ponderResult=ponderResult)
+        self.zobrist_table.flush()
+        if self.ponder and action is not None:
+            self.strategy.startPondering(node, self.strategy.bestMove)
             
         self.myStep += 1
         return action
 
+    def timeBudget(self, current_state: GameState) -> float:
+        """
+        Calcule le temps alloué au coup courant : le temps restant est réparti
+        également entre les coups qu'il nous reste à jouer avant la fin de la partie.
+
+        Args:
+            current_state (GameState): Représentation de l'état de jeu actuel
+
+        Returns:
+            float: temps alloué à la recherche (s)
+        """
+        remainingMoves = max(1, (current_state.max_step - current_state.get_step() + 1) // 2)
+        return self.get_remaining_time() * self.timeMargin / remainingMoves
+
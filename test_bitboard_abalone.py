@@ -0,0 +1,189 @@
+import random
+from collections import Counter
+
+from AlphaBetaZobrist import AlphaBetaZobrist
+from NodeState import NodeState
+from TranspositionTable import ZobristTable
+from bitboard_abalone import EVALUATION_SYMMETRIES, MOVE_EJECT, MOVE_PUSHED_SHIFT, SYMMETRY_SQUARES, cell_of, square_of
+from board_abalone import BoardAbalone
+from game_state_abalone import GameStateAbalone
+from player_abalone import PlayerAbalone
+from seahorse.game.game_layout.board import Piece
+
+# Starting positions of main_abalone.py: 1 first player, 2 second player
+CLASSIC = [
+    "    1    ",
+    "   1 1   ",
+    "  1 1    ",
+    " 1 1     ",
+    "1 1 1    ",
+    " 1 1     ",
+    "1 1      ",
+    "         ",
+    "         ",
+    "         ",
+    "      2 2",
+    "     2 2 ",
+    "    2 2 2",
+    "     2 2 ",
+    "    2 2  ",
+    "   2 2   ",
+    "    2    ",
+]
+ALIEN = [
+    "    2    ",
+    "         ",
+    "  2 2    ",
+    "   1 2   ",
+    "2 1 1    ",
+    " 2 2     ",
+    "  1 2    ",
+    " 2 2     ",
+    "         ",
+    "     1 1 ",
+    "    1 2  ",
+    "     1 1 ",
+    "    2 2 1",
+    "   1 2   ",
+    "    1 1  ",
+    "         ",
+    "    1    ",
+]
+
+
+def initial_state(layout):
+    players = [PlayerAbalone("W", "white"), PlayerAbalone("B", "black")]
+    env = {}
+    for i, line in enumerate(layout):
+        for j, c in enumerate(line):
+            if c in "12":
+                player = players[int(c) - 1]
+                env[(i, j)] = Piece(piece_type=player.get_piece_type(), owner=player)
+    scores = {player.get_id(): 0 for player in players}
+    return GameStateAbalone(scores, players[0], players, BoardAbalone(env=env, dim=[17, 9]), step=0)
+
+
+def successors(pairs):
+    # A successor is identified by its pieces (cell, type, owner) and the player losing a marble
+    return Counter(
+        (frozenset((cell, p.get_type(), p.get_owner_id()) for cell, p in board.get_env().items()), id_add)
+        for board, id_add in pairs
+    )
+
+
+def image(state, s):
+    # Image of a state by the symmetry s of the board, same players and scores
+    env = {cell_of(SYMMETRY_SQUARES[s][square_of(i, j)]): p for (i, j), p in state.get_rep().get_env().items()}
+    return GameStateAbalone(dict(state.scores), state.next_player, state.players, BoardAbalone(env=env, dim=[17, 9]), step=state.get_step())
+
+
+def random_positions(layout, seed, games=3, plies=30):
+    rng = random.Random(seed)
+    for _ in range(games):
+        state = initial_state(layout)
+        for _ in range(plies):
+            if state.is_done():
+                break
+            yield state
+            state = state.successor(rng.choice(state.legal_moves()))
+
+
+def snapshot(state):
+    # Position of a state (pieces, scores, side to move, step) and its incremental caches
+    pieces = frozenset((cell, p.get_type(), p.get_owner_id()) for cell, p in state.get_rep().get_env().items())
+    return (pieces, dict(state.scores), state.next_player.get_id(), state.get_step(), state.get_bitboard().bits,
+            state.get_hash(), state.get_symmetric_hashes(), state.get_terms(), state.get_clusters())
+
+
+def assert_matches_recomputation(state):
+    # The incremental caches equal those of the same position built from scratch
+    fresh = GameStateAbalone(dict(state.scores), state.next_player, state.players,
+                             BoardAbalone(env=dict(state.get_rep().get_env()), dim=[17, 9]), step=state.get_step())
+    assert state.get_bitboard().bits == fresh.get_bitboard().bits
+    assert state.get_hash() == fresh.get_hash()
+    assert state.get_symmetric_hashes() == fresh.get_symmetric_hashes()
+    assert state.get_terms() == fresh.get_terms()
+    assert state.get_clusters() == fresh.get_clusters()
+
+
+def test_bitboard_generator_matches_generator():
+    for layout, seed in ((CLASSIC, 1), (ALIEN, 2)):
+        for state in random_positions(layout, seed):
+            assert successors(state.bitboard_generator()) == successors(state.generator())
+
+
+def test_make_unmake_matches_recomputation():
+    for layout, seed in ((CLASSIC, 7), (ALIEN, 8)):
+        rng = random.Random(seed)
+        state = initial_state(layout).search_copy()
+        # Caches computed only on request are requested first, so that make_move updates them
+        state.get_symmetric_hashes()
+        state.get_clusters()
+        tokens, snapshots = [], []
+        for _ in range(200):
+            if tokens and (state.is_done() or rng.random() < 0.3):
+                state.unmake_move(tokens.pop())
+                assert snapshot(state) == snapshots.pop()
+            else:
+                move = rng.choice(state.legal_moves())
+                snapshots.append(snapshot(state))
+                expected = snapshot(state.successor(move))[:4]
+                tokens.append(state.make_move(move))
+                assert snapshot(state)[:4] == expected
+            assert_matches_recomputation(state)
+
+
+def test_capture_moves_are_the_ejecting_legal_moves():
+    captures = 0
+    for layout, seed in ((CLASSIC, 8), (ALIEN, 9)):
+        for state in random_positions(layout, seed, games=4, plies=50):
+            # A capture ejects a marble and pushes at least one opponent marble (the ejected one)
+            ejecting = [move for move in state.legal_moves() if move & MOVE_EJECT and move >> MOVE_PUSHED_SHIFT & 3]
+            assert sorted(state.capture_moves()) == sorted(ejecting)
+            captures += len(ejecting)
+    assert captures
+
+
+def test_successor_clusters_match_recomputation():
+    for layout, seed in ((CLASSIC, 10), (ALIEN, 11)):
+        rng = random.Random(seed)
+        for _ in range(3):
+            state = initial_state(layout)
+            # The clusters of the first state are computed, those of its successors are updated by moved_clusters
+            state.get_clusters()
+            while not state.is_done():
+                state = state.successor(rng.choice(state.legal_moves()))
+                assert state._clusters is not None
+                assert state.get_clusters() == state.compute_clusters()
+
+
+def test_symmetric_table_only_shares_positions_with_equal_evaluation():
+    table = ZobristTable(size=2**10, symmetric=True)
+    for layout, seed in ((CLASSIC, 3), (ALIEN, 4)):
+        for state in random_positions(layout, seed):
+            player = state.players[0]
+            search = AlphaBetaZobrist(1, player.get_id(), evalCacheSize=0)
+            nodes = [NodeState(image(state, s), player.get_id(), player.get_name(), player.get_piece_type()) for s in EVALUATION_SYMMETRIES]
+            assert len({search.evaluate(node) for node in nodes}) == 1
+            hashes = [table.boardHash(node) for node in nodes]
+            assert len({table.canonicalForm(h)[0] for h in hashes}) == 1
+            # The best move stored for one image is found in the frame of every other image
+            move = state.legal_moves()[0]
+            table.store(hashes[0], 1, 0, 0, move)
+            for node, h in zip(nodes, hashes):
+                assert table.lookup(h)[4] in node.gameState.legal_moves()
+
+
+def test_parallel_search_matches_serial_search():
+    for layout, seed in ((CLASSIC, 5), (ALIEN, 6)):
+        state = list(random_positions(layout, seed, games=1, plies=12))[-1]
+        player = state.next_player
+        node = NodeState(state, player.get_id(), player.get_name(), player.get_piece_type())
+        results = []
+        for workers in (1, 2):
+            search = AlphaBetaZobrist(4, player.get_id(), workers=workers)
+            try:
+                results.append(search.searchRoot(node, 4))
+            finally:
+                search.close()
+        assert results[0] == results[1]
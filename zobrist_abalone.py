@@ -0,0 +1,154 @@
+import random
+from typing import Dict, Tuple
+
+from bitboard_abalone import CELLS, COLS, EVALUATION_SYMMETRIES, RAYS, ROWS, SYMMETRY_SQUARES, decode_move, iter_bits, square_of
+from seahorse.game.game_layout.board import Piece
+
+# Seed of the key generator: keys are identical across processes and runs
+ZOBRIST_SEED = 0x5EA405E
+
+# Piece index of each piece type, "V" stands for an empty cell
+PIECE_INDEX = {"V": 0, "W": 1, "B": 2}
+NB_PIECE_TYPES = len(PIECE_INDEX)
+
+
+def _build_keys():
+    rng = random.Random(ZOBRIST_SEED)
+    keys = tuple(rng.getrandbits(64) for _ in range(len(CELLS) * NB_PIECE_TYPES))
+    side = rng.getrandbits(64)
+    return keys, side
+
+
+# ZOBRIST_KEYS[cell_index * NB_PIECE_TYPES + piece_index] is the 64-bit key of a piece on a playable cell
+ZOBRIST_KEYS, SIDE_KEY = _build_keys()
+
+
+def _build_keys_by_square():
+    # Same keys indexed by bit index (i*9 + j) of the bitboards, 0 on forbidden cells
+    by_square = {}
+    for piece_type, piece_index in PIECE_INDEX.items():
+        keys = [0] * (ROWS * COLS)
+        for k, (i, j) in enumerate(CELLS):
+            keys[square_of(i, j)] = ZOBRIST_KEYS[k * NB_PIECE_TYPES + piece_index]
+        by_square[piece_type] = keys
+    return by_square
+
+
+KEYS_BY_SQUARE = _build_keys_by_square()
+
+# SYMMETRIC_KEYS[k][piece_type][sq] is the key of the image of the square sq by the symmetry EVALUATION_SYMMETRIES[k]
+# of the board. Only the symmetries keeping the evaluation are used: the images of a position share its table entry.
+SYMMETRIC_KEYS = [
+    {piece_type: [keys[SYMMETRY_SQUARES[s][sq]] for sq in range(ROWS * COLS)] for piece_type, keys in KEYS_BY_SQUARE.items()}
+    for s in EVALUATION_SYMMETRIES
+]
+
+
+def hash_env(env: Dict[Tuple[int, int], Piece], first_player_to_move: bool) -> int:
+    """
+    Compute from scratch the Zobrist hash of a board. Empty cells do not contribute to the hash.
+
+    Args:
+        env (dict[Tuple[int], Piece]): The environment dictionary composed of pieces.
+        first_player_to_move (bool): Whether the first player of the game is the next to play.
+
+    Returns:
+        int: 64-bit hash
+    """
+    h = SIDE_KEY if first_player_to_move else 0
+    for (i, j), p in env.items():
+        h ^= KEYS_BY_SQUARE[p.get_type()][square_of(i, j)]
+    return h
+
+
+def symmetric_hashes(bits_by_type: Dict[str, int], first_player_to_move: bool) -> Tuple[int, ...]:
+    """
+    Compute from scratch the hashes of the images of a board by the symmetries of EVALUATION_SYMMETRIES.
+
+    Args:
+        bits_by_type (dict[str, int]): Bitboard of each piece type ("W", "B").
+        first_player_to_move (bool): Whether the first player of the game is the next to play.
+
+    Returns:
+        Tuple[int, ...]: hash of the image by each symmetry of EVALUATION_SYMMETRIES
+    """
+    side = SIDE_KEY if first_player_to_move else 0
+    squares = [(piece_type, list(iter_bits(bits))) for piece_type, bits in bits_by_type.items()]
+    hashes = []
+    for keys_by_type in SYMMETRIC_KEYS:
+        h = side
+        for piece_type, piece_squares in squares:
+            keys = keys_by_type[piece_type]
+            for sq in piece_squares:
+                h ^= keys[sq]
+        hashes.append(h)
+    return tuple(hashes)
+
+
+# (move, piece type of the player moving) -> changes of the hashes of the images (see symmetric_move_deltas)
+SYMMETRIC_MOVE_DELTAS: Dict[Tuple[int, str], Tuple[int, ...]] = {}
+
+
+def symmetric_move_deltas(move: int, own_type: str) -> Tuple[int, ...]:
+    """
+    Return the change of the hash of each image of a board (see symmetric_hashes) due to an inline move, side to move included.
+    Each line of marbles moves by one square, so only its tail and its new head change. The changes only depend
+    on the move and on the piece type of the player moving: they are computed once and kept in SYMMETRIC_MOVE_DELTAS.
+
+    Args:
+        move (int): compact move (see bitboard_abalone.encode_move).
+        own_type (str): piece type of the player moving ("W" or "B").
+
+    Returns:
+        Tuple[int, ...]: value to xor with the hash of each image
+    """
+    deltas = SYMMETRIC_MOVE_DELTAS.get((move, own_type))
+    if deltas is None:
+        sq, direction, length, pushed, _ = decode_move(move)
+        ray = RAYS[sq][direction]
+        opp_type = "B" if own_type == "W" else "W"
+        head = length + pushed
+        deltas = []
+        for keys_by_type in SYMMETRIC_KEYS:
+            keys = keys_by_type[own_type]
+            d = SIDE_KEY ^ keys[ray[0]]
+            if length < len(ray):
+                d ^= keys[ray[length]]
+            if pushed:
+                keys = keys_by_type[opp_type]
+                d ^= keys[ray[length]]
+                if head < len(ray):
+                    d ^= keys[ray[head]]
+            deltas.append(d)
+        deltas = SYMMETRIC_MOVE_DELTAS[(move, own_type)] = tuple(deltas)
+    return deltas
+
+
+def canonical_form(hashes: Tuple[int, ...]) -> Tuple[int, int]:
+    """
+    Return the hash of the canonical form of a board from the hashes of its images: the smallest one.
+
+    Args:
+        hashes (Tuple[int, ...]): hashes of the images (see symmetric_hashes).
+
+    Returns:
+        Tuple[int, int]: canonical hash, symmetry (index in SYMMETRY_SQUARES) mapping the board to its canonical form
+    """
+    best = min(hashes)
+    return best, EVALUATION_SYMMETRIES[hashes.index(best)]
+
+
+def canonical_hash(bits_by_type: Dict[str, int], first_player_to_move: bool) -> Tuple[int, int]:
+    """
+    Compute the hash of the canonical form of a board: the smallest hash of its images by the symmetries
+    of EVALUATION_SYMMETRIES.
+    Boards that are images of each other share the same canonical hash.
+
+    Args:
+        bits_by_type (dict[str, int]): Bitboard of each piece type ("W", "B").
+        first_player_to_move (bool): Whether the first player of the game is the next to play.
+
+    Returns:
+        Tuple[int, int]: canonical hash, symmetry mapping the board to its canonical form
+    """
+    return canonical_form(symmetric_hashes(bits_by_type, first_player_to_move))